@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Background delivery of classification updates to the SDN controller.
+
+Request handlers call notify(), which only records the update in memory and
+returns. One worker thread waits a short coalescing window, so repeated
+updates for the same source IP collapse into the latest one, then sends the
+pending updates in batches over a single keep-alive HTTP session, one
+POST to the controller's batch endpoint per batch (controllers without it
+get one POST per update on the same connection). Failed
+sends are retried with exponential backoff, across the configured controller
+URLs, starting from the last one that answered.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class ControllerNotifier(object):
+    """Coalescing, batching sender of classification updates"""
+
+    def __init__(self, controller_urls, honeypot_type, window=0.2, batch_size=100,
+                 max_pending=10000, timeout=1.0, retries=3, backoff=0.5, max_backoff=10.0):
+        self.controller_urls = list(controller_urls)
+        self.honeypot_type = honeypot_type
+        self.window = window
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # source_ip -> latest update not yet delivered, oldest first
+        self._pending = OrderedDict()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._preferred = 0
+        self._stopped = False
+        # Controller URLs that answered 404 for the batch endpoint
+        self._no_batch = set()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.controller_urls), pool_maxsize=2)
+        self._session.mount('http://', adapter)
+
+        self.counters = {'queued': 0, 'coalesced': 0, 'sent': 0, 'batches': 0,
+                         'retries': 0, 'failed_batches': 0, 'dropped': 0}
+        self.last_error = None
+        self.last_success = None
+
+        self._worker = threading.Thread(target=self._run, name='controller-notifier', daemon=True)
+        self._worker.start()
+
+    def notify(self, classification, source_ip, risk_score, ml_prediction=None):
+        """Queue an update for source_ip; never blocks on the controller. False if dropped."""
+        update = {
+            'source_ip': source_ip,
+            'classification': classification,
+            'risk_score': risk_score * 100,  # Convert to 0-100 scale
+            'honeypot_type': self.honeypot_type,
+            'ml_prediction': ml_prediction,
+            'timestamp': datetime.datetime.now().isoformat()
+        }
+        with self._cond:
+            if source_ip in self._pending:
+                # Only the latest verdict for a source matters
+                self._pending[source_ip] = update
+                self.counters['coalesced'] += 1
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.counters['dropped'] += 1
+                return False
+            self._pending[source_ip] = update
+            self.counters['queued'] += 1
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, pending=len(self._pending),
+                        controller=self.controller_urls[self._preferred],
+                        last_success=self.last_success, last_error=self.last_error)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far has been handed to the controller (or timeout)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._pending or self._in_flight) and time.monotonic() < deadline:
+                self._cond.wait(min(0.05, max(0.0, deadline - time.monotonic())))
+            return not (self._pending or self._in_flight)
+
+    def stop(self, timeout=5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        self._session.close()
+
+    def _run(self):
+        delay = 0.0
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped and not self._pending:
+                    return
+
+            # Let repeated updates for the same sources pile up into one
+            time.sleep(max(self.window, delay))
+
+            with self._cond:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popitem(last=False)[1])
+                self._in_flight = len(batch)
+
+            if self._deliver(batch):
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+                delay = 0.0
+                continue
+
+            # Put the batch back unless newer verdicts arrived meanwhile, and back off
+            with self._cond:
+                for update in reversed(batch):
+                    ip = update['source_ip']
+                    if ip not in self._pending:
+                        self._pending[ip] = update
+                        self._pending.move_to_end(ip, last=False)
+                self._in_flight = 0
+                self.counters['failed_batches'] += 1
+                self._cond.notify_all()
+            delay = min(self.max_backoff, max(self.backoff, delay * 2))
+
+    def _deliver(self, batch):
+        """Send one batch, retrying across controllers; True once the controller has it"""
+        wait = self.backoff
+        for attempt in range(self.retries):
+            if attempt:
+                self.counters['retries'] += 1
+                time.sleep(wait)
+                wait = min(self.max_backoff, wait * 2)
+            for offset in range(len(self.controller_urls)):
+                index = (self._preferred + offset) % len(self.controller_urls)
+                try:
+                    self._send(self.controller_urls[index], batch)
+                except requests.RequestException as e:
+                    self.last_error = f"{self.controller_urls[index]}: {e}"
+                    logger.debug(f"Controller {self.controller_urls[index]} unreachable: {e}")
+                    continue
+                with self._cond:
+                    self._preferred = index
+                    self.counters['sent'] += len(batch)
+                    self.counters['batches'] += 1
+                    self.last_success = datetime.datetime.now().isoformat()
+                return True
+        logger.error(f"Could not deliver {len(batch)} classification updates: {self.last_error}")
+        return False
+
+    def _send(self, base_url, batch):
+        if base_url not in self._no_batch:
+            response = self._session.post(f'{base_url}/honeypot/classification/batch', json=batch,
+                                          timeout=self.timeout)
+            if response.status_code != 404:
+                response.raise_for_status()
+                return
+            self._no_batch.add(base_url)
+        for update in batch:
+            response = self._session.post(f'{base_url}/honeypot/classification', json=update,
+                                          timeout=self.timeout)
+            response.raise_for_status()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Bounded per-source-IP state for the honeypots and the ML simulator.
+
+Services keep one small record per source IP (failed logins, recent
+request times, the last risk score). Plain dicts keyed by IP grow forever
+when sources are spoofed or spread over many addresses, so this store
+keeps records in least-recently-used order and evicts them when they
+
+- have not been touched for idle_ttl seconds,
+- exceed max_entries, or
+- together exceed the max_bytes memory budget.
+
+Records are plain objects with __slots__, created by the store's factory
+on first access. A record's size is taken with sys.getsizeof, so records
+holding containers should override __sizeof__ to include them and the
+objects in them (getsizeof of a container counts only its pointers).
+Sizes are re-measured whenever a record is accessed; a record's growth
+since its last access is counted on the next one.
+
+Eviction runs on every access and costs O(1) amortized: the least
+recently used records are also the longest idle ones, so all three limits
+only ever evict from the front.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Per-entry bookkeeping not seen by sys.getsizeof(record): the ordered dict
+# slot and link, the entry object and its float
+ENTRY_OVERHEAD = 200
+
+
+class _Entry(object):
+    __slots__ = ('record', 'last_seen', 'size')
+
+    def __init__(self, record, last_seen, size):
+        self.record = record
+        self.last_seen = last_seen
+        self.size = size
+
+
+class IPStateStore(object):
+    """LRU map of source IP -> record, bounded by count, idle time and memory"""
+
+    def __init__(self, factory, max_entries=100000, max_bytes=64 * 1024 * 1024, idle_ttl=3600):
+        self.factory = factory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+
+        self._lock = threading.Lock()
+        # source ip -> _Entry, least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+        self.peak_entries = 0
+        self.counters = {'created': 0, 'hits': 0, 'removed': 0, 'evicted_idle': 0,
+                         'evicted_lru': 0, 'evicted_memory': 0}
+
+    def get(self, source_ip):
+        """Record for source_ip, created if missing; marks it most recently used"""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.pop(source_ip, None)
+            if entry is None:
+                entry = _Entry(self.factory(), now, 0)
+                self.counters['created'] += 1
+            else:
+                entry.last_seen = now
+                self.counters['hits'] += 1
+            self._entries[source_ip] = entry
+            self._measure(source_ip, entry)
+            self.peak_entries = max(self.peak_entries, len(self._entries))
+            self._evict(now)
+            return entry.record
+
+    def peek(self, source_ip):
+        """Record for source_ip or None, without creating it or marking it used"""
+        with self._lock:
+            entry = self._entries.get(source_ip)
+            return entry.record if entry is not None else None
+
+    def remove(self, source_ip):
+        with self._lock:
+            entry = self._entries.pop(source_ip, None)
+            if entry is not None:
+                self._bytes -= entry.size
+                self.counters['removed'] += 1
+
+    def items(self):
+        """(source ip, record) pairs, expired records left out"""
+        with self._lock:
+            self._evict(time.monotonic())
+            return [(ip, entry.record) for ip, entry in self._entries.items()]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, source_ip):
+        return source_ip in self._entries
+
+    def stats(self):
+        with self._lock:
+            self._evict(time.monotonic())
+            entries = len(self._entries)
+            return dict(self.counters,
+                        entries=entries,
+                        peak_entries=self.peak_entries,
+                        max_entries=self.max_entries,
+                        estimated_bytes=self._bytes,
+                        max_bytes=self.max_bytes,
+                        idle_ttl=self.idle_ttl,
+                        entry_occupancy=round(entries / self.max_entries, 4) if self.max_entries else None,
+                        memory_occupancy=round(self._bytes / self.max_bytes, 4) if self.max_bytes else None,
+                        evicted=(self.counters['evicted_idle'] + self.counters['evicted_lru']
+                                 + self.counters['evicted_memory']))
+
+    def _measure(self, source_ip, entry):
+        size = ENTRY_OVERHEAD + sys.getsizeof(source_ip) + sys.getsizeof(entry.record)
+        self._bytes += size - entry.size
+        entry.size = size
+
+    def _evict(self, now):
+        entries = self._entries
+        while entries:
+            source_ip, entry = next(iter(entries.items()))
+            if self.idle_ttl and now - entry.last_seen >= self.idle_ttl:
+                reason = 'evicted_idle'
+            elif len(entries) == 1:
+                # The most recently used record stays, even on its own over budget
+                break
+            elif self.max_entries and len(entries) > self.max_entries:
+                reason = 'evicted_lru'
+            elif self.max_bytes and self._bytes > self.max_bytes:
+                reason = 'evicted_memory'
+            else:
+                break
+            del entries[source_ip]
+            self._bytes -= entry.size
+            self.counters[reason] += 1
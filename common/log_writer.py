@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Buffered, asynchronous JSON-lines log writer for the web services.
+
+Request handlers call write() with the log entry dict; that is a bounded
+in-memory queue append and never touches the disk. One writer thread
+drains the queue every flush interval (sooner once a full batch is
+waiting), serializes the batch and appends it to a file it keeps open,
+with one write and flush per batch. When the queue is full, entries are
+dropped and counted instead of blocking the request.
+
+The file is rotated when it would grow past max_bytes or has been open
+for rotate_interval seconds: it is renamed with a timestamp suffix,
+gzip-compressed in the background, and only the newest backups are
+kept. Under eventlet.monkey_patch() threads are green threads sharing one
+hub, so the compression goes to eventlet's pool of real OS threads
+instead of stalling every connection while it runs. Readers following the file by inode (the dashboard) notice the
+rotation; truncation from the dashboard's reset is safe because the
+file is opened in append mode.
+"""
+
+import atexit
+import datetime
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def _green_threads():
+    """True when eventlet.monkey_patch() has turned threads into green threads"""
+    patcher = sys.modules.get('eventlet.patcher')
+    return patcher is not None and patcher.is_monkey_patched('thread')
+
+
+class AsyncLogWriter(object):
+    """Queue-backed JSON-lines file writer with batching and rotation"""
+
+    def __init__(self, path, flush_interval=0.5, batch_size=256, max_queue=10000,
+                 max_bytes=50 * 1024 * 1024, rotate_interval=None, backups=5, compress=True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        # Notified after every drain cycle of the writer thread
+        self._idle = threading.Condition()
+        self._cycles = 0
+        self._closed = False
+
+        self._file = None
+        self._opened_at = None
+
+        self.counters = {'written': 0, 'dropped': 0, 'batches': 0, 'rotations': 0,
+                         'write_errors': 0}
+        self.last_error = None
+
+        self._worker = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def write(self, entry):
+        """Queue one log entry (a JSON-serializable dict); False if it was dropped"""
+        if len(self._queue) >= self.max_queue:
+            self.counters['dropped'] += 1
+            return False
+        self._queue.append(entry)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def stats(self):
+        return dict(self.counters, queued=len(self._queue), path=self.path,
+                    last_error=self.last_error)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is on disk (or timeout)"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            # A cycle in progress may have started before this call; the next one did not
+            target = self._cycles + 2
+            while self._cycles < target and time.monotonic() < deadline:
+                self._wakeup.set()
+                self._idle.wait(min(0.05, max(0.0, deadline - time.monotonic())))
+            return self._cycles >= target
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._wakeup.set()
+        self._worker.join(timeout)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                # Keep the thread alive; the batch is lost but later ones may succeed
+                self.counters['write_errors'] += 1
+                self.last_error = str(e)
+                logger.error(f"Log writer for {self.path} failed: {e}")
+                self._close_file()
+            with self._idle:
+                self._cycles += 1
+                self._idle.notify_all()
+            if self._closed and not self._queue:
+                self._close_file()
+                return
+
+    def _drain(self):
+        while self._queue:
+            lines = []
+            while self._queue and len(lines) < self.batch_size:
+                lines.append(json.dumps(self._queue.popleft(), default=str))
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+
+            self._rotate_if_due(len(data))
+            if self._file is None:
+                self._open_file()
+            self._file.write(data)
+            self._file.flush()
+            self.counters['written'] += len(lines)
+            self.counters['batches'] += 1
+
+    def _open_file(self):
+        self._file = open(self.path, 'ab')
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+
+    def _rotate_if_due(self, incoming):
+        if self._file is None and not os.path.exists(self.path):
+            return
+        if self._file is None:
+            self._open_file()
+        size = self._file.tell()
+        too_big = self.max_bytes and size and size + incoming > self.max_bytes
+        too_old = (self.rotate_interval and size
+                   and time.time() - self._opened_at >= self.rotate_interval)
+        if not (too_big or too_old):
+            return
+
+        self._close_file()
+        rotated = f"{self.path}.{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.rename(self.path, rotated)
+        self.counters['rotations'] += 1
+        if self.compress and _green_threads():
+            import eventlet
+            from eventlet import tpool
+            eventlet.spawn(tpool.execute, self._compress, rotated)
+        elif self.compress:
+            threading.Thread(target=self._compress, args=(rotated,),
+                             name='log-compress', daemon=True).start()
+        else:
+            self._prune()
+
+    def _compress(self, rotated):
+        try:
+            with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        except OSError as e:
+            self.last_error = f"compress {rotated}: {e}"
+            logger.error(f"Could not compress rotated log {rotated}: {e}")
+        self._prune()
+
+    def _prune(self):
+        """Delete all but the newest `backups` rotated files"""
+        pattern = glob.escape(self.path) + ('.*.gz' if self.compress else '.*')
+        rotated = sorted(glob.glob(pattern))
+        for old in rotated[:-self.backups] if self.backups else rotated:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
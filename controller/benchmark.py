@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Controller performance benchmarks
+
+Usage:
+    python3 benchmark.py parse [--packets N] [--rounds R]
+    python3 benchmark.py flows [--sources N]
+    python3 benchmark.py load [--packets N] [--rate PPS] [--mix benign=70,scan=20,brute=10]
+                              [--shape tree|fattree|leafspine] [--depth D] [--fanout F]
+                              [--spines S] [--leaves L] [--clients C] [--tracemalloc]
+    python3 benchmark.py synflood [--syns N] [--rate SPS]
+
+parse: PacketIn header decoding throughput, comparing the legacy full ryu
+       parse (Packet + repeated get_protocols lookups) against the
+       header-only fast path used by packet_in_handler.
+flows: flow entries installed per switch and pipeline table when N external
+       sources use the service, some get flagged, and every one gets a reply.
+       The controller runs against in-memory switches, no Mininet needed.
+load:  PacketIns/sec, p50/p99 handler latency, FlowMods and PacketOuts per
+       PacketIn and memory growth for a synthetic mix of benign clients,
+       port scanners and brute-forcers, fed as fast as possible or at a fixed
+       rate into the controller on any generated topology, no Mininet needed.
+synflood: check that a source allowed to a server after one normal
+       connection still gets rate-flagged when it floods that server with
+       SYNs. Frames go through the flows the controller installed on the
+       in-memory switch, so SYNs the switch would carry never reach it.
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from ryu.lib.packet import packet
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ether_types
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import tcp
+from ryu.lib.packet import arp
+from ryu.controller import ofp_event
+from ryu.controller.handler import MAIN_DISPATCHER
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.app.wsgi import WSGIApplication
+
+from packet_headers import decode_headers
+from flow_cookies import cookie_kind
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../topology'))
+from layouts import build_layout
+
+ATTACKER_MAC = '00:00:00:00:00:06'
+TARGET_MAC = '00:00:00:00:00:01'
+TARGET_IP = '10.0.0.1'
+
+
+def build_tcp_frame(src_ip, dst_ip, src_port, dst_port, bits=tcp.TCP_SYN,
+                    src_mac=ATTACKER_MAC, dst_mac=TARGET_MAC):
+    """Serialize an Ethernet/IPv4/TCP frame"""
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst=dst_mac, src=src_mac,
+                                       ethertype=ether_types.ETH_TYPE_IP))
+    pkt.add_protocol(ipv4.ipv4(src=src_ip, dst=dst_ip, proto=6))
+    pkt.add_protocol(tcp.tcp(src_port=src_port, dst_port=dst_port,
+                             seq=random.getrandbits(32), bits=bits))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def build_arp_request(src_ip, dst_ip, src_mac=ATTACKER_MAC):
+    """Serialize a broadcast ARP request"""
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=src_mac,
+                                       ethertype=ether_types.ETH_TYPE_ARP))
+    pkt.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac=src_mac, src_ip=src_ip,
+                             dst_mac='00:00:00:00:00:00', dst_ip=dst_ip))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def random_source_ip(rng):
+    return f"10.{rng.randint(1, 254)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def source_mac(ip):
+    """Locally administered MAC derived from an IPv4 address"""
+    return '02:00:' + ':'.join(f'{int(octet):02x}' for octet in ip.split('.'))
+
+
+def syn_flood_frames(count, seed=1):
+    """SYN flood from randomized sources against a web port, with some ARP noise"""
+    rng = random.Random(seed)
+    frames = []
+    for i in range(count):
+        src_ip = random_source_ip(rng)
+        if i % 20 == 0:
+            frames.append(build_arp_request(src_ip, TARGET_IP))
+        else:
+            frames.append(build_tcp_frame(src_ip, TARGET_IP, rng.randint(1024, 65535), 8001))
+    return frames
+
+
+def legacy_parse(data):
+    """Header work done per PacketIn before the fast path existed"""
+    pkt = packet.Packet(data)
+    eth = pkt.get_protocols(ethernet.ethernet)[0]
+    if eth.ethertype == ether_types.ETH_TYPE_ARP:
+        pkt.get_protocols(ethernet.ethernet)
+        pkt.get_protocols(arp.arp)
+    elif eth.ethertype == ether_types.ETH_TYPE_IP:
+        # _handle_ipv4, _handle_web_traffic and _forward_to_target each re-walked the list
+        pkt.get_protocols(ethernet.ethernet)
+        pkt.get_protocols(ipv4.ipv4)
+        tcp_pkt = pkt.get_protocol(tcp.tcp)
+        if tcp_pkt:
+            pkt.get_protocols(ethernet.ethernet)
+            pkt.get_protocols(ipv4.ipv4)
+            pkt.get_protocol(tcp.tcp)
+            pkt.get_protocols(ethernet.ethernet)
+            pkt.get_protocols(ipv4.ipv4)
+    return eth
+
+
+def measure(func, frames, rounds):
+    """Best packets/sec over a number of rounds"""
+    best = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for data in frames:
+            func(data)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(frames) / elapsed)
+    return best
+
+
+def run_parse_benchmark(args):
+    frames = syn_flood_frames(args.packets)
+    print(f"Decoding {len(frames)} PacketIn frames (SYN flood + ARP), best of {args.rounds} rounds")
+
+    before = measure(legacy_parse, frames, args.rounds)
+    after = measure(decode_headers, frames, args.rounds)
+
+    print(f"  before (ryu Packet parse) : {before:12,.0f} packets/sec")
+    print(f"  after  (header fast path) : {after:12,.0f} packets/sec")
+    print(f"  speedup                   : {after / before:12.1f}x")
+
+
+class StubDatapath(object):
+    """In-memory OpenFlow 1.3 switch that keeps the flow entries sent to it"""
+
+    def __init__(self, dpid):
+        self.id = dpid
+        self.ofproto = ofproto_v1_3
+        self.ofproto_parser = ofproto_v1_3_parser
+        self.xid = 0
+        # (table_id, priority, match) -> cookie
+        self.flows = {}
+        # Same keys -> the FlowMod, for walking frames through the pipeline
+        self.entries = {}
+        # Message class name -> number sent to this switch
+        self.sent = Counter()
+        # Flow kind -> number of flow entries added
+        self.added = Counter()
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+
+    def send_msg(self, msg):
+        self.sent[type(msg).__name__] += 1
+        if not isinstance(msg, ofproto_v1_3_parser.OFPFlowMod):
+            return
+        ofproto = self.ofproto
+        if msg.command == ofproto.OFPFC_ADD:
+            key = (msg.table_id, msg.priority, str(msg.match))
+            self.flows[key] = msg.cookie
+            self.entries[key] = msg
+            self.added[cookie_kind(msg.cookie)] += 1
+        elif msg.command in (ofproto.OFPFC_DELETE, ofproto.OFPFC_DELETE_STRICT):
+            mask = msg.cookie_mask
+            for key, cookie in list(self.flows.items()):
+                if msg.table_id not in (ofproto.OFPTT_ALL, key[0]):
+                    continue
+                if cookie & mask == msg.cookie & mask:
+                    del self.flows[key]
+                    del self.entries[key]
+
+    def lookup(self, table_id, fields):
+        """Highest-priority flow entry of a table matching the packet fields, or None"""
+        best = None
+        for (entry_table, priority, _), msg in self.entries.items():
+            if entry_table != table_id or (best is not None and priority <= best.priority):
+                continue
+            if all(field_matches(fields.get(name), value) for name, value in msg.match.items()):
+                best = msg
+        return best
+
+
+def field_matches(packet_value, match_value):
+    if packet_value is None:
+        return False
+    if isinstance(match_value, tuple):
+        value, mask = match_value
+        return packet_value & mask == value
+    return packet_value == match_value
+
+
+def seed_topology(app, layout):
+    """Feed the route table what ryu's topology discovery would report for a layout"""
+    for switch in layout['switches']:
+        app.routes.add_switch(switch['dpid'], switch['ports'])
+    for link in layout['links']:
+        app.routes.add_link(link['src'], link['src_port'], link['dst'], link['dst_port'])
+        app.routes.add_link(link['dst'], link['dst_port'], link['src'], link['src_port'])
+    for host in layout['hosts']:
+        app.routes.learn_host(host['ip'], host['switch'], host['port'])
+    app.sync_routes()
+
+
+def start_controller(layout=None):
+    """Controller app with every switch of the layout (default: the depth-3 tree) connected and routed"""
+    import controller
+
+    layout = layout or build_layout()
+    # The controller's host map comes from the layout, as from a --manifest on a real run
+    controller.use_topology_manifest(layout)
+    app = controller.HoneypotSDNController(wsgi=WSGIApplication())
+    datapaths = {switch['dpid']: StubDatapath(switch['dpid']) for switch in layout['switches']}
+    for datapath in datapaths.values():
+        features = ofproto_v1_3_parser.OFPSwitchFeatures(datapath)
+        features.datapath = datapath
+        app.switch_features_handler(ofp_event.EventOFPSwitchFeatures(features))
+        state = ofp_event.EventOFPStateChange(datapath)
+        state.state = MAIN_DISPATCHER
+        app.state_change_handler(state)
+    seed_topology(app, layout)
+    return app, datapaths
+
+
+def packet_in(app, datapath, in_port, data, table_id):
+    """Deliver one PacketIn from a pipeline table to the controller"""
+    ofproto = datapath.ofproto
+    msg = datapath.ofproto_parser.OFPPacketIn(
+        datapath, buffer_id=ofproto.OFP_NO_BUFFER, table_id=table_id,
+        match=datapath.ofproto_parser.OFPMatch(in_port=in_port), data=data)
+    msg.datapath = datapath
+    app.packet_in_handler(ofp_event.EventOFPPacketIn(msg))
+
+
+def send_frame(app, datapath, in_port, data):
+    """
+    Walk a frame arriving on a switch port through the flow entries the
+    controller installed there (matches and table jumps only; rewrites and
+    meters are not applied). Frames punted to the controller become
+    PacketIns; returns the punting table, or None if the switch handled it.
+    """
+    hdr = decode_headers(data)
+    fields = {'in_port': in_port, 'eth_type': hdr.ethertype, 'eth_src': hdr.eth_src,
+              'eth_dst': hdr.eth_dst, 'ipv4_src': hdr.ip_src, 'ipv4_dst': hdr.ip_dst,
+              'ip_proto': hdr.ip_proto, 'tcp_src': hdr.src_port, 'tcp_dst': hdr.dst_port,
+              'tcp_flags': hdr.tcp_flags, 'metadata': 0}
+    ofproto = datapath.ofproto
+    parser = datapath.ofproto_parser
+    table_id = 0
+    while True:
+        entry = datapath.lookup(table_id, fields)
+        if entry is None:
+            return None
+        goto_table = None
+        for inst in entry.instructions:
+            if isinstance(inst, parser.OFPInstructionGotoTable):
+                goto_table = inst.table_id
+            elif isinstance(inst, parser.OFPInstructionActions):
+                if any(isinstance(action, parser.OFPActionOutput)
+                       and action.port == ofproto.OFPP_CONTROLLER for action in inst.actions):
+                    packet_in(app, datapath, in_port, data, table_id)
+                    return table_id
+        if goto_table is None:
+            return None
+        table_id = goto_table
+
+
+def run_flows_benchmark(args):
+    import controller as ctl
+
+    app, datapaths = start_controller()
+    rng = random.Random(1)
+    # External sources (h6's position in the tree) attach to s4 port 3
+    ingress = datapaths[4]
+    external_port = 3
+    servers = ctl.NORMAL_SERVERS
+
+    print(f"Synthetic load: {args.sources} external sources entering at s{ingress.id}")
+    start = time.perf_counter()
+    for i in range(args.sources):
+        src_ip = random_source_ip(rng)
+        src_mac = source_mac(src_ip)
+        if i % 7:
+            dst_ip, dst_port, dst_mac = ctl.SERVICE_IP, ctl.SERVICE_PORT, ctl.SERVICE_MAC
+        else:
+            dst_ip = rng.choice(servers)
+            dst_port, dst_mac = ctl.HOSTS[dst_ip]['port'], ctl.HOSTS[dst_ip]['mac']
+        client_port = rng.randint(1024, 65535)
+        packet_in(app, ingress, external_port,
+                  build_tcp_frame(src_ip, dst_ip, client_port, dst_port,
+                                  src_mac=src_mac, dst_mac=dst_mac),
+                  ctl.TABLE_SERVICE)
+
+        # Verdicts from the honeypots for a few percent of the sources
+        if i % 20 == 0:
+            app.update_classification(src_ip, 'suspicious', 50)
+        elif i % 97 == 0:
+            app.update_classification(src_ip, 'malicious', 90, ml_prediction=1)
+
+        # The server's reply misses the forwarding table once per client MAC
+        server_ip = rng.choice(servers)
+        packet_in(app, ingress, 1 + (i % 2),
+                  build_tcp_frame(server_ip, src_ip, ctl.HOSTS[server_ip]['port'], client_port,
+                                  bits=tcp.TCP_SYN | tcp.TCP_ACK,
+                                  src_mac=ctl.HOSTS[server_ip]['mac'], dst_mac=src_mac),
+                  ctl.TABLE_FORWARD)
+    elapsed = time.perf_counter() - start
+    print(f"  {2 * args.sources} PacketIns handled in {elapsed:.2f}s")
+
+    print(f"\n  {'switch':<8}{'table 0':>10}{'table 1':>10}{'table 2':>10}{'total':>10}")
+    kinds = Counter()
+    for dpid, datapath in sorted(datapaths.items()):
+        per_table = Counter(table_id for table_id, _, _ in datapath.flows)
+        kinds.update(cookie_kind(cookie) for cookie in datapath.flows.values())
+        print(f"  s{dpid:<7}{per_table[0]:>10}{per_table[1]:>10}{per_table[2]:>10}"
+              f"{len(datapath.flows):>10}")
+
+    print("\n  Flow entries by kind (all switches):")
+    for kind, count in kinds.most_common():
+        print(f"    {kind:<14}{count:>8}")
+    per_source = sum(count for kind, count in kinds.items()
+                     if kind in ('service', 'redirect', 'police', 'drop', 'allow'))
+    print(f"\n  per-source entries : {per_source} ({per_source / args.sources:.2f} per source)")
+    print(f"  flagged sources    : {len(app.suspicious_ips | app.malicious_ips)}")
+
+
+def run_synflood_check(args):
+    import controller as ctl
+
+    app, datapaths = start_controller()
+    # An external source at h6's position in the tree (s4 port 3)
+    ingress = datapaths[4]
+    external_port = 3
+    src_ip = '198.51.100.7'
+    dst_ip = ctl.NORMAL_SERVERS[0]
+    dst_port, dst_mac = ctl.HOSTS[dst_ip]['port'], ctl.HOSTS[dst_ip]['mac']
+
+    def syn(client_port):
+        return build_tcp_frame(src_ip, dst_ip, client_port, dst_port,
+                               src_mac=source_mac(src_ip), dst_mac=dst_mac)
+
+    # One ordinary connection gets the source its allow flow
+    send_frame(app, ingress, external_port, syn(1024))
+    print(f"SYN flood from {src_ip} to {dst_ip}:{dst_port} after one normal connection "
+          f"(classified {app.get_classification(src_ip)}, "
+          f"allow flow {'installed' if ingress.added['allow'] else 'missing'})")
+
+    interval = 1.0 / args.rate
+    punted = 0
+    flagged_after = None
+    start = time.perf_counter()
+    for i in range(args.syns):
+        next_send = start + i * interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if send_frame(app, ingress, external_port, syn(1025 + i)) is not None:
+            punted += 1
+        if flagged_after is None and app.get_classification(src_ip) != 'normal':
+            flagged_after = i + 1
+    elapsed = time.perf_counter() - start
+
+    print(f"  SYNs sent           : {args.syns} at {args.rate:g}/s ({elapsed:.2f}s)")
+    print(f"  reached controller  : {punted}")
+    print(f"  carried by switch   : {args.syns - punted}")
+    print(f"  final classification: {app.get_classification(src_ip)}")
+    if flagged_after is None:
+        print("  FAIL: the flood was never rate-flagged")
+        sys.exit(1)
+    print(f"  OK: flagged after {flagged_after} SYNs "
+          f"(thresholds {ctl.CONF.honeypot.rate_threshold_1s:g}/s over 1 s, "
+          f"{ctl.CONF.honeypot.rate_threshold_10s:g}/s over 10 s, "
+          f"{ctl.CONF.honeypot.rate_threshold_60s:g}/s over 60 s)")
+
+
+TRAFFIC_KINDS = ('benign', 'scan', 'brute')
+
+# Destination ports a scanner sweeps (web ports are punted from table 1, the rest miss table 2)
+SCAN_PORTS = (21, 22, 23, 25, 80, 443, 445, 3306, 3389, 5432, 8001, 8002, 8003, 8004, 8005, 8080)
+
+
+def parse_mix(text):
+    """'benign=70,scan=20,brute=10' -> {kind: weight}"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in TRAFFIC_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown traffic kind {kind!r} "
+                                             f"(expected {', '.join(TRAFFIC_KINDS)})")
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {kind}: {weight!r}")
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("mix weights must add up to more than 0")
+    return mix
+
+
+def load_events(layout, count, mix, seed=1):
+    """
+    PacketIns (kind, dpid, in_port, frame, table_id) for a traffic mix:
+
+    benign: a pool of clients opening connections to the service; the first
+            server reply to each client misses the forwarding table
+    scan:   a few scanners sweeping hosts and ports with SYNs
+    brute:  a few attackers opening login connections to the service back to back
+    """
+    import controller as ctl
+
+    rng = random.Random(seed)
+    entry_points = [(h['switch'], h['port']) for h in layout['hosts']
+                    if h['role'] == 'external_source']
+    if not entry_points:
+        raise ValueError("Layout has no client hosts to enter the network through")
+    locations = {h['ip']: (h['switch'], h['port']) for h in layout['hosts']}
+
+    def source(pool_size, salt):
+        # Same address and entry point every time a pool member is drawn
+        member = random.Random(f'{salt}{rng.randrange(pool_size)}')
+        return random_source_ip(member), member.choice(entry_points)
+
+    replied = set()
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    events = []
+    while len(events) < count:
+        kind = rng.choices(kinds, weights)[0]
+        client_port = rng.randint(1024, 65535)
+        if kind == 'benign':
+            src_ip, (dpid, in_port) = source(500, 'client')
+            events.append((kind, dpid, in_port,
+                           build_tcp_frame(src_ip, ctl.SERVICE_IP, client_port, ctl.SERVICE_PORT,
+                                           src_mac=source_mac(src_ip), dst_mac=ctl.SERVICE_MAC),
+                           ctl.TABLE_SERVICE))
+            if src_ip not in replied:
+                replied.add(src_ip)
+                server_ip = rng.choice(ctl.NORMAL_SERVERS)
+                server = ctl.HOSTS[server_ip]
+                dpid, in_port = locations.get(server_ip, entry_points[0])
+                events.append((kind, dpid, in_port,
+                               build_tcp_frame(server_ip, src_ip, server['port'], client_port,
+                                               bits=tcp.TCP_SYN | tcp.TCP_ACK,
+                                               src_mac=server['mac'], dst_mac=source_mac(src_ip)),
+                               ctl.TABLE_FORWARD))
+        elif kind == 'scan':
+            src_ip, (dpid, in_port) = source(5, 'scanner')
+            dst_ip = rng.choice(list(ctl.HOSTS))
+            dst_port = rng.choice(SCAN_PORTS)
+            table_id = ctl.TABLE_SERVICE if dst_port in ctl.WEB_PORTS else ctl.TABLE_FORWARD
+            events.append((kind, dpid, in_port,
+                           build_tcp_frame(src_ip, dst_ip, client_port, dst_port,
+                                           src_mac=source_mac(src_ip),
+                                           dst_mac=ctl.HOSTS[dst_ip]['mac']),
+                           table_id))
+        else:
+            src_ip, (dpid, in_port) = source(3, 'brute')
+            events.append((kind, dpid, in_port,
+                           build_tcp_frame(src_ip, ctl.SERVICE_IP, client_port, ctl.SERVICE_PORT,
+                                           src_mac=source_mac(src_ip), dst_mac=ctl.SERVICE_MAC),
+                           ctl.TABLE_SERVICE))
+    return events[:count]
+
+
+def resident_memory():
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_load_benchmark(args):
+    layout = build_layout(args.shape, depth=args.depth, fanout=args.fanout, spines=args.spines,
+                          leaves=args.leaves, clients=args.clients)
+    app, datapaths = start_controller(layout)
+    events = load_events(layout, args.packets, args.mix)
+
+    total_weight = sum(args.mix.values())
+    mix_text = ', '.join(f"{kind} {weight / total_weight:.0%}" for kind, weight in args.mix.items())
+    pace = f"{args.rate:,.0f} PacketIns/sec offered" if args.rate else "as fast as possible"
+    print(f"Synthetic load: {len(events)} PacketIns ({mix_text}) on a {args.shape} of "
+          f"{len(datapaths)} switches, {pace}")
+
+    for datapath in datapaths.values():
+        datapath.sent.clear()
+    if args.tracemalloc:
+        tracemalloc.start()
+    heap_before = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+    rss_before = resident_memory()
+
+    latencies = {kind: [] for kind in TRAFFIC_KINDS}
+    interval = 1.0 / args.rate if args.rate else 0.0
+    start = time.perf_counter()
+    for i, (kind, dpid, in_port, frame, table_id) in enumerate(events):
+        if interval:
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        handled = time.perf_counter()
+        packet_in(app, datapaths[dpid], in_port, frame, table_id)
+        latencies[kind].append(time.perf_counter() - handled)
+    elapsed = time.perf_counter() - start
+
+    rss_growth = resident_memory() - rss_before
+    if args.tracemalloc:
+        heap_growth = tracemalloc.get_traced_memory()[0] - heap_before
+        tracemalloc.stop()
+
+    print(f"\n  {'traffic':<10}{'PacketIns':>10}{'p50 us':>10}{'p99 us':>10}")
+    everything = []
+    for kind in TRAFFIC_KINDS:
+        values = sorted(latencies[kind])
+        everything.extend(values)
+        if values:
+            print(f"  {kind:<10}{len(values):>10}{percentile(values, 0.5) * 1e6:>10.1f}"
+                  f"{percentile(values, 0.99) * 1e6:>10.1f}")
+    everything.sort()
+    print(f"  {'all':<10}{len(everything):>10}{percentile(everything, 0.5) * 1e6:>10.1f}"
+          f"{percentile(everything, 0.99) * 1e6:>10.1f}")
+
+    sent = Counter()
+    for datapath in datapaths.values():
+        sent.update(datapath.sent)
+    packet_ins = len(events)
+    print(f"\n  throughput           : {packet_ins / elapsed:12,.0f} PacketIns/sec "
+          f"({elapsed:.2f}s, handler time {sum(everything):.2f}s)")
+    print(f"  FlowMods / PacketIn  : {sent['OFPFlowMod'] / packet_ins:12.2f}")
+    print(f"  PacketOuts / PacketIn: {sent['OFPPacketOut'] / packet_ins:12.2f}")
+    print(f"  memory growth        : {rss_growth / 2**20:12.1f} MiB RSS", end='')
+    if args.tracemalloc:
+        print(f", {heap_growth / 2**20:.1f} MiB Python heap")
+    else:
+        print()
+    print(f"  controller state     : {len(app.traffic_stats)} sources, {len(app.flow_stats)} flows, "
+          f"{len(app.installed_flows)} installed flows, "
+          f"{len(app.suspicious_ips | app.malicious_ips)} flagged sources")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SDN honeypot controller benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_cmd = subparsers.add_parser('parse', help='PacketIn header decoding throughput')
+    parse_cmd.add_argument('--packets', type=int, default=20000)
+    parse_cmd.add_argument('--rounds', type=int, default=5)
+    parse_cmd.set_defaults(func=run_parse_benchmark)
+
+    flows_cmd = subparsers.add_parser('flows', help='Flow table size per switch under load')
+    flows_cmd.add_argument('--sources', type=int, default=10000)
+    flows_cmd.set_defaults(func=run_flows_benchmark)
+
+    load_cmd = subparsers.add_parser('load', help='PacketIn throughput, latency and memory under a traffic mix')
+    load_cmd.add_argument('--packets', type=int, default=20000)
+    load_cmd.add_argument('--rate', type=float, default=0,
+                          help='PacketIns/sec to offer (default: as fast as possible)')
+    load_cmd.add_argument('--mix', type=parse_mix, default=parse_mix('benign=70,scan=20,brute=10'),
+                          help='Traffic weights, e.g. benign=70,scan=20,brute=10')
+    load_cmd.add_argument('--shape', choices=('tree', 'fattree', 'leafspine'), default='tree')
+    load_cmd.add_argument('--depth', type=int, default=3)
+    load_cmd.add_argument('--fanout', type=int, default=2)
+    load_cmd.add_argument('--spines', type=int, default=2)
+    load_cmd.add_argument('--leaves', type=int, default=4)
+    load_cmd.add_argument('--clients', type=int, default=1,
+                          help='Client hosts whose ports external sources enter through')
+    load_cmd.add_argument('--tracemalloc', action='store_true',
+                          help='Also report Python heap growth (slows the handler down)')
+    load_cmd.set_defaults(func=run_load_benchmark)
+
+    synflood_cmd = subparsers.add_parser('synflood',
+                                         help='Check a SYN flood from an allowed source gets flagged')
+    synflood_cmd.add_argument('--syns', type=int, default=200)
+    synflood_cmd.add_argument('--rate', type=float, default=100, help='SYNs/sec (default: 100)')
+    synflood_cmd.set_defaults(func=run_synflood_check)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
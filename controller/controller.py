@@ -2,16 +2,18 @@
 
 from ryu.base import app_manager
 from ryu.controller import ofp_event
-from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
 from ryu.lib.packet import packet
 from ryu.lib.packet import ethernet
 from ryu.lib.packet import ether_types
-from ryu.lib.packet import ipv4
-from ryu.lib.packet import tcp
 from ryu.lib.packet import arp
+from ryu.lib.packet import tcp
 from ryu.app.wsgi import ControllerBase, WSGIApplication, route
+from ryu.topology import event as topo_event
+from ryu.lib import hub
+from ryu import cfg
 from webob import Response
 import json
 import time
@@ -19,6 +21,51 @@ import threading
 from collections import defaultdict
 import requests
 
+from packet_headers import IPPROTO_TCP, decode_headers, headers_from_packet, int_to_ip, ip_to_int
+from flow_table import FlowTable, flow_key
+from rate_estimator import RING_SECONDS, SourceRate
+from topology_routes import RouteTable
+from event_stream import EventStream
+from flow_cookies import (FLOW_KINDS, KIND_ALLOW, KIND_ARP, KIND_CLASSIFY, KIND_DROP, KIND_L2,
+                          KIND_POLICE, KIND_REDIRECT, KIND_SERVER_REPLY, KIND_SERVICE,
+                          KIND_TABLE_MISS, KIND_ROUTE, PER_SOURCE_MASK, cookie_kind,
+                          cookie_source, kind_filter, make_cookie, per_source_filter,
+                          source_filter)
+
+# Controller tunables, read from the [honeypot] section of a ryu-manager --config-file
+CONF = cfg.CONF
+CONF.register_opts([
+    cfg.IntOpt('flow-table-capacity', default=100000,
+               help='Maximum number of tracked flows (src, dst, port) in flow_stats'),
+    cfg.IntOpt('flow-idle-timeout', default=60,
+               help='Seconds without packets before a tracked flow is evicted'),
+    cfg.IntOpt('traffic-table-capacity', default=50000,
+               help='Maximum number of tracked source IPs in traffic_stats'),
+    cfg.IntOpt('traffic-idle-timeout', default=300,
+               help='Seconds without packets before a source IP is evicted'),
+    cfg.FloatOpt('rate-threshold-1s', default=20,
+                 help='Web requests/sec within the current second that mark a source suspicious'),
+    cfg.FloatOpt('rate-threshold-10s', default=5,
+                 help='Average web requests/sec over 10 s that mark a source suspicious'),
+    cfg.FloatOpt('rate-threshold-60s', default=2,
+                 help='Average web requests/sec over 60 s that mark a source suspicious'),
+    cfg.IntOpt('suspicious-meter-rate', default=200,
+               help='Packets/sec admitted from each suspicious source at its ingress switch'),
+    cfg.IntOpt('malicious-meter-rate', default=50,
+               help='Packets/sec admitted from each malicious source at its ingress switch'),
+    cfg.IntOpt('meter-burst-size', default=50,
+               help='Burst size (packets) of the per-source drop meter band'),
+    cfg.BoolOpt('arp-responder-flows', default=True,
+                help='Answer ARP for known addresses with switch flows (Open vSwitch '
+                     'register moves) instead of PacketIns to the controller'),
+    cfg.BoolOpt('syn-only-packet-in', default=True,
+                help='Send only connection-opening TCP SYNs of web traffic to the '
+                     'controller instead of every web packet'),
+    cfg.StrOpt('topology-manifest', default='',
+               help='Host/port manifest written by topology/topology.py --manifest; '
+                    'replaces the built-in h1-h6 host map'),
+], group='honeypot')
+
 # Host mapping for our topology
 HOSTS = {
     '10.0.0.1': {'name': 'h1', 'type': 'normal_server', 'port': 8001, 'mac': '00:00:00:00:00:01'},
@@ -34,6 +81,100 @@ NORMAL_SERVERS = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
 TRIAGE_HONEYPOT = '10.0.0.4'
 DEEP_HONEYPOT = '10.0.0.5'
 
+# ip -> (dpid, port) where hosts attach, when known ahead of discovery
+HOST_LOCATIONS = {}
+
+
+def load_topology_manifest(manifest):
+    """
+    Host map, server/honeypot addresses and host locations from a generated
+    topology manifest, given as its path or as the layout dict it holds.
+    With several honeypots of a kind the first one takes redirected traffic.
+    """
+    path = manifest if isinstance(manifest, str) else 'Topology manifest'
+    if isinstance(manifest, str):
+        with open(manifest) as f:
+            manifest = json.load(f)
+    
+    hosts = {}
+    locations = {}
+    for host in manifest['hosts']:
+        hosts[host['ip']] = {'name': host['name'], 'type': host['role'],
+                             'port': host['service_port'], 'mac': host['mac']}
+        locations[host['ip']] = (host['switch'], host['port'])
+    
+    def role(name):
+        return [ip for ip, info in hosts.items() if info['type'] == name]
+    
+    if not role('normal_server') or not role('triage_honeypot') or not role('deep_honeypot'):
+        raise ValueError(f"{path} needs at least one normal server, triage and deep honeypot")
+    return (hosts, role('normal_server'), role('triage_honeypot')[0],
+            role('deep_honeypot')[0], locations)
+
+
+# Virtual web service balanced across NORMAL_SERVERS by a switch SELECT group
+SERVICE_IP = '10.0.0.100'
+SERVICE_MAC = '00:00:00:00:00:64'
+SERVICE_PORT = 80
+SERVICE_GROUP_ID = 1
+
+
+def host_tables(hosts):
+    """
+    Tables derived from a host map: the addresses the controller answers ARP
+    for instead of flooding the request, the TCP destination ports treated
+    as web traffic (the service and every host's web port) and the hosts
+    always reported as active
+    """
+    proxy_arp = dict({ip: info['mac'] for ip, info in hosts.items()}, **{SERVICE_IP: SERVICE_MAC})
+    web_ports = frozenset([80] + [info['port'] for info in hosts.values() if info['port']])
+    return proxy_arp, web_ports, frozenset(hosts)
+
+
+PROXY_ARP, WEB_PORTS, BASELINE_IPS = host_tables(HOSTS)
+
+
+def use_topology_manifest(manifest):
+    """
+    Switch the host map and everything derived from it to a topology
+    manifest (path or layout dict). Runs at import for the
+    topology_manifest option; tools driving the controller in-process call
+    it before creating the app.
+    """
+    global HOSTS, NORMAL_SERVERS, TRIAGE_HONEYPOT, DEEP_HONEYPOT, HOST_LOCATIONS
+    global PROXY_ARP, WEB_PORTS, BASELINE_IPS
+    (HOSTS, NORMAL_SERVERS, TRIAGE_HONEYPOT, DEEP_HONEYPOT,
+     HOST_LOCATIONS) = load_topology_manifest(manifest)
+    PROXY_ARP, WEB_PORTS, BASELINE_IPS = host_tables(HOSTS)
+
+
+if CONF.honeypot.topology_manifest:
+    use_topology_manifest(CONF.honeypot.topology_manifest)
+
+# OpenFlow pipeline: per-source state lives in tables 0-1, per-destination state in table 2
+TABLE_CLASSIFY = 0  # Source policy: meters for flagged sources, server reply tagging
+TABLE_SERVICE = 1   # Honeypot redirection, service load balancing, web classification
+TABLE_FORWARD = 2   # Destination forwarding (tree routes, learned MACs, ARP)
+
+# Topology events arriving within this many seconds are applied to the switches together
+ROUTE_SYNC_DELAY = 0.5
+
+# Seconds between counter snapshots on the dashboard event stream
+EVENT_STATS_INTERVAL = 1.0
+
+# Seconds between polls of the switches' web SYN counters
+CONNECTION_STATS_INTERVAL = 5.0
+
+# Hard timeout of the per-source redirection and service flows
+FLOW_HARD_TIMEOUT = 600
+
+# Idle timeout of the per-connection service return flows
+SERVICE_CONNECTION_IDLE_TIMEOUT = 60
+
+# Metadata bit set in TABLE_CLASSIFY on replies from a normal server's web port
+METADATA_SERVER_REPLY = 0x1
+
+
 class HoneypotSDNController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
     _CONTEXTS = {'wsgi': WSGIApplication}
@@ -47,23 +188,88 @@ class HoneypotSDNController(app_manager.RyuApp):
         # Traffic analysis
         self.suspicious_ips = set()
         self.malicious_ips = set()
-        self.traffic_stats = defaultdict(lambda: {'packets': 0, 'last_seen': 0})
-        self.load_balancer_index = 0
-        
-        # Flow tracking for analysis
-        self.flow_stats = defaultdict(lambda: {
-            'packet_count': 0,
-            'request_rate': 0,
-            'last_packet_time': 0,
-            'classification': 'normal'
-        })
+        self.traffic_stats = FlowTable(
+            'traffic_stats',
+            CONF.honeypot.traffic_table_capacity,
+            CONF.honeypot.traffic_idle_timeout,
+            factory=lambda: {'packets': 0, 'last_seen': 0})
+        
+        # Connected switches and SELECT group bucket weights for the service
+        self.datapaths = {}
+        self.lb_weights = {ip: 1 for ip in NORMAL_SERVERS}
+        
+        # Serializes classification updates arriving over REST
+        self.classification_lock = threading.Lock()
+        
+        # Routing derived from the discovered topology, and the
+        # topology-dependent state currently installed on each switch
+        self.routes = RouteTable()
+        for ip, (dpid, port) in HOST_LOCATIONS.items():
+            self.routes.learn_host(ip, dpid, port)
+        self._route_sync_scheduled = False
+        self._installed_routes = defaultdict(dict)   # dpid -> {host ip: output port}
+        self._classified_ports = defaultdict(set)    # dpid -> edge ports punting web traffic
+        self._installed_flood = {}                   # dpid -> ports of the ARP flood flow
+        self._installed_server_ports = {}            # dpid -> group bucket output ports
+        
+        # Per-source rate limiting meters: source_ip -> (dpid, meter_id, classification)
+        self.source_meters = {}
+        self._free_meter_ids = defaultdict(list)
+        self._next_meter_id = defaultdict(lambda: 1)
+        
+        # Outstanding barrier requests: (dpid, xid) -> hub.Event
+        self._barrier_waiters = {}
+        
+        # Flow tracking for analysis, keyed by packed (src, dst, dst_port)
+        self.flow_stats = FlowTable(
+            'flow_stats',
+            CONF.honeypot.flow_table_capacity,
+            CONF.honeypot.flow_idle_timeout,
+            factory=lambda: {
+                'packet_count': 0,
+                'last_packet_time': 0,
+                'classification': 'normal'
+            })
+        
+        # Per-source flows already on the switches, to skip duplicate installs:
+        # src_ip_n -> {(dpid, kind, dst_ip_n, dst_port): hard timeout expiry}
+        self.installed_flows = FlowTable(
+            'installed_flows',
+            CONF.honeypot.traffic_table_capacity,
+            FLOW_HARD_TIMEOUT)
+        # connections: web SYNs counted by the switches, whatever handled them;
+        # syn_packet_ins: the ones that reached the controller
+        self.packet_in_stats = {
+            'web_packet_ins': 0,
+            'syn_packet_ins': 0,
+            'connections': 0,
+            'flow_installs': 0,
+            'flow_installs_deduplicated': 0
+        }
+        
+        # Windowed per-source web request rates (1 s / 10 s / 60 s)
+        self.source_rates = FlowTable(
+            'source_rates',
+            CONF.honeypot.traffic_table_capacity,
+            RING_SECONDS,
+            factory=SourceRate)
         
         # Initialize baseline active IPs from topology
         self._initialize_baseline_ips()
         
+        # Classification changes, flow installs and counters for /api/events
+        self.events = EventStream()
+        
         # Start monitoring thread
         self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitoring_thread.start()
+        hub.spawn(self._event_stats_loop)
+        
+        # dpid -> {SYN counter flow: packets at the last poll}, and the
+        # parts of a flow stats reply still being received
+        self._syn_counters = {}
+        self._syn_stats_parts = defaultdict(list)
+        hub.spawn(self._connection_stats_loop)
         
         # Setup REST API
         wsgi = kwargs['wsgi']
@@ -75,57 +281,268 @@ class HoneypotSDNController(app_manager.RyuApp):
         """Initialize all host IPs as active for baseline monitoring"""
         current_time = time.time()
         
-        # Mark all host IPs as active (except h6 which is external source)
-        baseline_ips = ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.5', '10.0.0.6']
-        
-        for ip in baseline_ips:
+        # Mark all topology host IPs as active
+        for ip in BASELINE_IPS:
             self.traffic_stats[ip] = {
                 'packets': 1,  # Initialize with 1 packet to show as active
                 'last_seen': current_time
             }
         
-        self.logger.info(f"Initialized {len(baseline_ips)} baseline active IPs")
+        self.logger.info(f"Initialized {len(BASELINE_IPS)} baseline active IPs")
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
         """Handle switch connection with improved flow installation"""
         datapath = ev.msg.datapath
         ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
 
         self.logger.info(f"Switch s{datapath.id} connected - installing flows")
 
-        # Install default flow to controller (lowest priority)
-        match = parser.OFPMatch()
-        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
-                                          ofproto.OFPCML_NO_BUFFER)]
-        self.add_flow(datapath, 0, match, actions)
+        self._install_table_miss(datapath)
         
-        # Install tree topology forwarding flows
-        self._install_tree_forwarding_flows(datapath)
+        # Whatever this switch held before the (re)connect is gone
+        dpid = datapath.id
+        self._forget_installed_flows(dpid)
+        self._installed_routes.pop(dpid, None)
+        self._classified_ports.pop(dpid, None)
+        self._installed_flood.pop(dpid, None)
+        self._installed_server_ports.pop(dpid, None)
+        self._syn_counters.pop(dpid, None)
         
-        # Install ARP flooding rule (medium priority)
-        arp_match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP)
-        arp_actions = [parser.OFPActionOutput(ofproto.OFPP_FLOOD)]
-        self.add_flow(datapath, 10, arp_match, arp_actions)
+        # Tag replies from the normal servers for the service return rewrite
+        self._install_server_reply_flows(datapath)
+        
+        # ARP requests for known hosts and the service are answered locally
+        self._install_arp_responder(datapath)
+        
+        # Load balancing group for the virtual service (replace any stale copy)
+        self._send_service_group(datapath, ofproto.OFPGC_DELETE)
+        self._send_service_group(datapath, ofproto.OFPGC_ADD)
+        
+        # Routes, classification and flooding for whatever topology is known
+        self._sync_switch(datapath)
+        
+        # Re-attach rate limiting meters for flagged sources behind this switch
+        self._reinstall_source_meters(datapath)
+
+    def _install_table_miss(self, datapath):
+        """Table misses: source policy -> service -> forwarding -> controller"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        table_miss = make_cookie(KIND_TABLE_MISS)
+        self.add_flow(datapath, 0, parser.OFPMatch(), [], cookie=table_miss,
+                      table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE)
+        self.add_flow(datapath, 0, parser.OFPMatch(), [], cookie=table_miss,
+                      table_id=TABLE_SERVICE, goto_table=TABLE_FORWARD)
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
+                                          ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 0, parser.OFPMatch(), actions, cookie=table_miss,
+                      table_id=TABLE_FORWARD)
 
-    def add_flow(self, datapath, priority, match, actions, buffer_id=None, hard_timeout=0):
-        """Add a flow entry to the flow table"""
+    @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])
+    def state_change_handler(self, ev):
+        """Track connected switches"""
+        datapath = ev.datapath
+        if ev.state == MAIN_DISPATCHER:
+            self.datapaths[datapath.id] = datapath
+        elif ev.state == DEAD_DISPATCHER:
+            self.datapaths.pop(datapath.id, None)
+            self._syn_counters.pop(datapath.id, None)
+            self._syn_stats_parts.pop(datapath.id, None)
+
+    def add_flow(self, datapath, priority, match, actions, buffer_id=None, hard_timeout=0,
+                 meter_id=None, cookie=0, table_id=TABLE_FORWARD, goto_table=None,
+                 metadata=None, idle_timeout=0):
+        """
+        Add a flow entry to a pipeline table. Actions are applied in place;
+        goto_table continues the pipeline and metadata is (value, mask)
+        written for the following tables.
+        """
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
 
-        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS,
-                                             actions)]
+        inst = []
+        if meter_id is not None:
+            inst.append(parser.OFPInstructionMeter(meter_id))
+        if actions or goto_table is None:
+            inst.append(parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS,
+                                                     actions))
+        if metadata is not None:
+            inst.append(parser.OFPInstructionWriteMetadata(*metadata))
+        if goto_table is not None:
+            inst.append(parser.OFPInstructionGotoTable(goto_table))
         if buffer_id:
-            mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id,
-                                    priority=priority, match=match,
-                                    instructions=inst, hard_timeout=hard_timeout)
+            mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id, table_id=table_id,
+                                    priority=priority, match=match, cookie=cookie,
+                                    instructions=inst, hard_timeout=hard_timeout,
+                                    idle_timeout=idle_timeout)
         else:
-            mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
-                                    match=match, instructions=inst,
-                                    hard_timeout=hard_timeout)
+            mod = parser.OFPFlowMod(datapath=datapath, priority=priority, table_id=table_id,
+                                    match=match, instructions=inst, cookie=cookie,
+                                    hard_timeout=hard_timeout, idle_timeout=idle_timeout)
+        datapath.send_msg(mod)
+        
+        if cookie & PER_SOURCE_MASK and self.events.active:
+            self.events.publish('flow_install', {
+                'switch': datapath.id,
+                'kind': cookie_kind(cookie),
+                'source_ip': int_to_ip(cookie_source(cookie)),
+                'table': table_id,
+                'priority': priority,
+                'timestamp': time.time()
+            })
+
+    def delete_flow(self, datapath, priority, match, table_id=TABLE_FORWARD):
+        """Remove the flow entry with exactly this priority and match"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_DELETE_STRICT,
+                                table_id=table_id, priority=priority, match=match,
+                                out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY)
         datapath.send_msg(mod)
 
+    def delete_flows_by_cookie(self, datapath, cookie, cookie_mask, match=None, table_id=None):
+        """
+        Remove every flow whose cookie matches under the mask (and that is at
+        least as specific as match), in all tables unless table_id is given
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        mod = parser.OFPFlowMod(datapath=datapath, command=ofproto.OFPFC_DELETE,
+                                table_id=ofproto.OFPTT_ALL if table_id is None else table_id,
+                                cookie=cookie, cookie_mask=cookie_mask,
+                                out_port=ofproto.OFPP_ANY, out_group=ofproto.OFPG_ANY,
+                                match=match or parser.OFPMatch())
+        datapath.send_msg(mod)
+
+    def purge_flows(self, cookie, cookie_mask, source_ip_n=None, barrier=True):
+        """
+        Delete the flows selected by a cookie filter on every connected switch,
+        one message per switch; returns how many switches were purged.
+        source_ip_n narrows the install bookkeeping that is forgotten to one source.
+        barrier=False leaves ordering the purge before later installs to the caller.
+        """
+        if source_ip_n is None:
+            self.installed_flows.clear()
+        else:
+            self.installed_flows.pop(source_ip_n)
+        datapaths = list(self.datapaths.values())
+        for datapath in datapaths:
+            self.delete_flows_by_cookie(datapath, cookie, cookie_mask)
+            # Keep the purge ordered before any flow installed after it
+            if barrier:
+                datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+        return len(datapaths)
+
+    def purge_kind(self, kind):
+        """
+        Delete every flow of one kind on all switches; returns how many
+        switches were purged. Flows the controller installs proactively
+        (table misses, routes, classification punts, ARP handling, server
+        reply tagging and police flows) are put back from its own records
+        straight away; per-source flows come back on the next PacketIn.
+        """
+        switches = self.purge_flows(*kind_filter(kind))
+        for datapath in list(self.datapaths.values()):
+            self._restore_flows(datapath, kind)
+        return switches
+
+    def purge_source(self, source_ip):
+        """
+        Delete every flow installed for one source on all switches; returns
+        how many switches were purged. The police flow of a source that
+        still holds a meter is put back.
+        """
+        source_ip_n = ip_to_int(source_ip)
+        switches = self.purge_flows(*source_filter(source_ip_n), source_ip_n=source_ip_n)
+        meter = self.source_meters.get(source_ip)
+        if meter is not None:
+            dpid, meter_id, classification = meter
+            datapath = self.datapaths.get(dpid)
+            if datapath is not None:
+                self._install_police_flow(datapath, source_ip, meter_id, classification)
+        return switches
+
+    def _restore_flows(self, datapath, kind):
+        """Reinstall the proactive flows of one kind after they were purged from a switch"""
+        dpid = datapath.id
+        if kind == KIND_TABLE_MISS:
+            self._install_table_miss(datapath)
+        elif kind == KIND_ROUTE:
+            self._installed_routes.pop(dpid, None)
+            self._sync_host_routes(datapath)
+        elif kind == KIND_CLASSIFY:
+            self._classified_ports.pop(dpid, None)
+            self._sync_classification_flows(datapath)
+        elif kind == KIND_ARP:
+            self._installed_flood.pop(dpid, None)
+            self._install_arp_responder(datapath)
+            self._sync_flood(datapath)
+        elif kind == KIND_SERVER_REPLY:
+            self._install_server_reply_flows(datapath)
+        elif kind in (KIND_POLICE, KIND_DROP):
+            # Meters go too, so flows still using them cannot outlive the restore
+            self._reinstall_source_meters(datapath)
+
+    def send_barrier(self, datapath):
+        """Send a barrier request and return an event set when the switch replies"""
+        parser = datapath.ofproto_parser
+        
+        req = parser.OFPBarrierRequest(datapath)
+        datapath.set_xid(req)
+        waiter = hub.Event()
+        self._barrier_waiters[(datapath.id, req.xid)] = waiter
+        datapath.send_msg(req)
+        return waiter
+
+    def wait_for_switches(self, datapaths, timeout=2.0):
+        """
+        Block until every switch has processed the messages sent to it so
+        far (barrier reply). Must not be called from an OpenFlow event
+        handler, which is where the replies are delivered.
+        """
+        waiters = [self.send_barrier(datapath) for datapath in datapaths]
+        deadline = time.time() + timeout
+        acknowledged = True
+        for waiter in waiters:
+            if not waiter.wait(timeout=max(0, deadline - time.time())):
+                acknowledged = False
+        return acknowledged
+
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, MAIN_DISPATCHER)
+    def barrier_reply_handler(self, ev):
+        waiter = self._barrier_waiters.pop((ev.msg.datapath.id, ev.msg.xid), None)
+        if waiter is not None:
+            waiter.set()
+
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        """Add the web SYNs the switch counted since the last poll to the connection count"""
+        msg = ev.msg
+        dpid = msg.datapath.id
+        parts = self._syn_stats_parts[dpid]
+        parts.extend(msg.body)
+        if msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE:
+            return
+        del self._syn_stats_parts[dpid]
+        
+        last = self._syn_counters.get(dpid, {})
+        counters = {}
+        connections = 0
+        for stat in parts:
+            if 'tcp_flags' not in stat.match:
+                continue
+            key = (stat.priority, str(stat.match))
+            counters[key] = stat.packet_count
+            previous = last.get(key, 0)
+            # A flow re-added since the last poll starts counting from zero again
+            connections += stat.packet_count - previous if stat.packet_count >= previous else stat.packet_count
+        self._syn_counters[dpid] = counters
+        self.packet_in_stats['connections'] += connections
+
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
         """Handle incoming packets"""
@@ -135,34 +552,31 @@ class HoneypotSDNController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        # Decode headers once; full ryu parse only for frames the fast path skips
+        hdr = decode_headers(msg.data)
+        if hdr is None:
+            hdr = headers_from_packet(packet.Packet(msg.data))
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if hdr.ethertype == ether_types.ETH_TYPE_LLDP:
             return
 
-        dst = eth.dst
-        src = eth.src
         dpid = datapath.id
 
-        self.mac_to_port.setdefault(dpid, {})
-
         # Learn MAC address
-        self.mac_to_port[dpid][src] = in_port
-
+        self.mac_to_port.setdefault(dpid, {})[hdr.eth_src] = in_port
+        
         # Handle ARP
-        if eth.ethertype == ether_types.ETH_TYPE_ARP:
-            self._handle_arp(datapath, pkt, in_port)
+        if hdr.ethertype == ether_types.ETH_TYPE_ARP:
+            self._handle_arp(datapath, hdr, in_port, msg)
             return
 
         # Handle IPv4
-        if eth.ethertype == ether_types.ETH_TYPE_IP:
-            self._handle_ipv4(datapath, pkt, in_port, msg)
+        if hdr.ethertype == ether_types.ETH_TYPE_IP:
+            self._handle_ipv4(datapath, hdr, in_port, msg)
             return
 
         # Default flooding for unknown protocols
-        out_port = ofproto.OFPP_FLOOD
-        actions = [parser.OFPActionOutput(out_port)]
+        actions = self._flood_actions(datapath)
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
@@ -171,92 +585,154 @@ class HoneypotSDNController(app_manager.RyuApp):
                                   in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
-    def _handle_arp(self, datapath, pkt, in_port):
-        """Handle ARP packets"""
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        arp_pkt = pkt.get_protocols(arp.arp)[0]
+    def _install_arp_responder(self, datapath):
+        """
+        Proxy ARP for every address in PROXY_ARP on this switch, so requests
+        for them never get broadcast across the tree. The reply is built in
+        the switch by swapping the request's addresses, or by the controller
+        when arp_responder_flows is off. Replies to the controller's host
+        location probes come back to it.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        for ip, mac in PROXY_ARP.items():
+            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP,
+                                    arp_op=arp.ARP_REQUEST, arp_tpa=ip)
+            if CONF.honeypot.arp_responder_flows:
+                actions = [
+                    parser.NXActionRegMove(src_field='eth_src', dst_field='eth_dst', n_bits=48),
+                    parser.OFPActionSetField(eth_src=mac),
+                    parser.OFPActionSetField(arp_op=arp.ARP_REPLY),
+                    parser.NXActionRegMove(src_field='arp_sha', dst_field='arp_tha', n_bits=48),
+                    parser.NXActionRegMove(src_field='arp_spa', dst_field='arp_tpa', n_bits=32),
+                    parser.OFPActionSetField(arp_sha=mac),
+                    parser.OFPActionSetField(arp_spa=ip),
+                    parser.OFPActionOutput(ofproto.OFPP_IN_PORT)
+                ]
+            else:
+                actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
+                                                  ofproto.OFPCML_NO_BUFFER)]
+            self.add_flow(datapath, 20, match, actions, cookie=make_cookie(KIND_ARP),
+                          table_id=TABLE_FORWARD)
         
-        if arp_pkt.opcode != arp.ARP_REQUEST:
+        probe_match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP,
+                                      arp_op=arp.ARP_REPLY, arp_tpa=SERVICE_IP)
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 30, probe_match, actions, cookie=make_cookie(KIND_ARP),
+                      table_id=TABLE_FORWARD)
+
+    def _handle_arp(self, datapath, hdr, in_port, msg):
+        """Handle ARP packets"""
+        if hdr.arp_opcode == arp.ARP_REPLY and hdr.ip_dst == SERVICE_IP:
+            self._learn_host_location(datapath.id, in_port, hdr.ip_src)
+            return
+        if hdr.arp_opcode != arp.ARP_REQUEST:
             return
 
-        # Simple ARP flooding for now
+        reply_mac = PROXY_ARP.get(hdr.ip_dst)
+        if reply_mac is not None:
+            self._send_arp_reply(datapath, in_port, hdr, reply_mac)
+            return
+
+        # Unknown target: flood the request
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
-        actions = [parser.OFPActionOutput(ofproto.OFPP_FLOOD)]
-        
-        data = None
-        if hasattr(datapath, 'buffer_id'):
-            data = pkt.data
+        actions = self._flood_actions(datapath)
 
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
-                                  in_port=in_port, actions=actions, data=data)
+                                  in_port=in_port, actions=actions, data=msg.data)
         datapath.send_msg(out)
 
-    def _handle_ipv4(self, datapath, pkt, in_port, msg):
-        """Handle IPv4 packets with traffic analysis"""
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        ipv4_pkt = pkt.get_protocols(ipv4.ipv4)[0]
+    def _send_arp_reply(self, datapath, in_port, hdr, reply_mac):
+        """Answer an ARP request on behalf of hdr.ip_dst"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(dst=hdr.eth_src, src=reply_mac,
+                                           ethertype=ether_types.ETH_TYPE_ARP))
+        pkt.add_protocol(arp.arp(opcode=arp.ARP_REPLY,
+                                 src_mac=reply_mac, src_ip=hdr.ip_dst,
+                                 dst_mac=hdr.eth_src, dst_ip=hdr.ip_src))
+        pkt.serialize()
         
-        src_ip = ipv4_pkt.src
-        dst_ip = ipv4_pkt.dst
+        actions = [parser.OFPActionOutput(in_port)]
+        out = parser.OFPPacketOut(datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
+                                  in_port=ofproto.OFPP_CONTROLLER, actions=actions,
+                                  data=pkt.data)
+        datapath.send_msg(out)
+
+    def _handle_ipv4(self, datapath, hdr, in_port, msg):
+        """Handle IPv4 packets with traffic analysis"""
+        src_ip = hdr.ip_src
+        dst_ip = hdr.ip_dst
         
         # Update traffic stats
         current_time = time.time()
-        self.traffic_stats[src_ip]['packets'] += 1
-        self.traffic_stats[src_ip]['last_seen'] = current_time
+        source_stats = self.traffic_stats.touch(src_ip, current_time)
+        source_stats['packets'] += 1
+        source_stats['last_seen'] = current_time
+        if 'ingress' not in source_stats:
+            # First switch to report a source is its ingress edge
+            source_stats['ingress'] = datapath.id
         
-        # Temporarily disable web traffic handling for debugging
-        # Regular L2 switching for all traffic
-        self._l2_switching(datapath, pkt, in_port, msg)
+        # Web traffic from a host port is punted by TABLE_SERVICE for flow
+        # analysis and honeypot redirection; forwarding misses are switched
+        if (msg.table_id == TABLE_SERVICE and hdr.ip_proto == IPPROTO_TCP
+                and hdr.dst_port in WEB_PORTS):
+            self.packet_in_stats['web_packet_ins'] += 1
+            if hdr.tcp_flags & (tcp.TCP_SYN | tcp.TCP_ACK) == tcp.TCP_SYN:
+                self.packet_in_stats['syn_packet_ins'] += 1
+            self.logger.info(f"Web traffic detected: {src_ip}:{hdr.src_port} -> {dst_ip}:{hdr.dst_port}")
+            classification = self._classify_traffic(hdr)
+            self._handle_web_traffic(datapath, hdr, in_port, classification, msg)
+            return
         
-        # Handle web traffic for flow analysis and honeypot redirection
-        tcp_pkt = pkt.get_protocol(tcp.tcp)
-        if tcp_pkt and tcp_pkt.dst_port in [80, 8001, 8002, 8003, 8004, 8005]:
-            self.logger.info(f"Web traffic detected: {src_ip}:{tcp_pkt.src_port} -> {dst_ip}:{tcp_pkt.dst_port}")
-            classification = self._classify_traffic(src_ip, dst_ip, tcp_pkt)
-            self._handle_web_traffic(datapath, pkt, in_port, src_ip, dst_ip, classification, msg)
+        # Regular L2 switching for everything else
+        self._l2_switching(datapath, hdr, in_port, msg)
 
-    def _classify_traffic(self, src_ip, dst_ip, tcp_pkt):
+    def _classify_traffic(self, hdr):
         """Classify traffic as normal, suspicious, or malicious"""
+        src_ip = hdr.ip_src
         current_time = time.time()
         
         # Update flow stats
-        flow_key = f"{src_ip}->{dst_ip}:{tcp_pkt.dst_port}"
-        flow_stat = self.flow_stats[flow_key]
+        flow_stat = self.flow_stats.touch(
+            flow_key(hdr.ip_src_n, hdr.ip_dst_n, hdr.dst_port), current_time)
         flow_stat['packet_count'] += 1
-        
-        # Calculate request rate (packets per minute)
-        if flow_stat['last_packet_time'] > 0:
-            time_diff = current_time - flow_stat['last_packet_time']
-            if time_diff > 0:
-                flow_stat['request_rate'] = flow_stat['packet_count'] / (time_diff / 60)
-        
         flow_stat['last_packet_time'] = current_time
         
-        # Classification logic
-        if src_ip in self.malicious_ips:
-            classification = 'malicious'
-        elif src_ip in self.suspicious_ips:
-            classification = 'suspicious'
-        elif flow_stat['request_rate'] > 30:  # More than 30 requests per minute
-            classification = 'suspicious'
-            self.suspicious_ips.add(src_ip)
-        elif flow_stat['packet_count'] > 100:  # More than 100 total packets
-            classification = 'suspicious'
-            self.suspicious_ips.add(src_ip)
-        else:
-            classification = 'normal'
+        # Windowed request rates for this source
+        source_rate = self.source_rates.touch(hdr.ip_src_n, current_time)
+        source_rate.record(current_time)
+        rate_1s, rate_10s, rate_60s = source_rate.rates(current_time)
+        
+        # Classification logic, serialized with honeypot verdicts and resets
+        with self.classification_lock:
+            if src_ip in self.malicious_ips:
+                classification = 'malicious'
+            elif src_ip in self.suspicious_ips:
+                classification = 'suspicious'
+            elif (rate_1s > CONF.honeypot.rate_threshold_1s or
+                  rate_10s > CONF.honeypot.rate_threshold_10s or
+                  rate_60s > CONF.honeypot.rate_threshold_60s):
+                classification = 'suspicious'
+                self.suspicious_ips.add(src_ip)
+                self.logger.info(f"{src_ip} exceeded request rate thresholds "
+                                 f"(1s={rate_1s}/s, 10s={rate_10s:.1f}/s, 60s={rate_60s:.1f}/s)")
+                self._on_classification_change(src_ip, 'normal', classification)
+            else:
+                classification = 'normal'
         
         flow_stat['classification'] = classification
         
         self.logger.info(f"Traffic from {src_ip} classified as: {classification}")
         return classification
 
-    def _handle_web_traffic(self, datapath, pkt, in_port, src_ip, dst_ip, classification, msg):
+    def _handle_web_traffic(self, datapath, hdr, in_port, classification, msg):
         """Handle web traffic with honeypot redirection"""
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        ipv4_pkt = pkt.get_protocols(ipv4.ipv4)[0]
-        tcp_pkt = pkt.get_protocol(tcp.tcp)
+        src_ip = hdr.ip_src
         
         # Determine destination based on classification
         if classification == 'malicious':
@@ -267,34 +743,221 @@ class HoneypotSDNController(app_manager.RyuApp):
             # Redirect to triage honeypot
             target_ip = TRIAGE_HONEYPOT
             self.logger.info(f"Redirecting suspicious traffic from {src_ip} to triage honeypot")
+        elif hdr.ip_dst == SERVICE_IP and hdr.dst_port == SERVICE_PORT:
+            # Hand the source over to the switch SELECT group
+            self.logger.info(f"Load balancing normal traffic from {src_ip} via group {SERVICE_GROUP_ID}")
+            self._install_service_flows(datapath, src_ip, in_port)
+            self._install_service_return_flow(datapath, src_ip, hdr.src_port)
+            self._resubmit(datapath, msg)
+            return
         else:
-            # Load balance to normal servers
-            target_ip = self._get_next_normal_server()
-            self.logger.info(f"Load balancing normal traffic from {src_ip} to {target_ip}")
+            # Normal traffic addressed to a specific host is switched unchanged
+            self._install_allow_flow(datapath, src_ip, hdr.ip_dst, hdr.dst_port, in_port)
+            self._l2_switching(datapath, hdr, in_port, msg)
+            return
         
         # Install flow rule for this connection
-        self._install_redirection_flow(datapath, src_ip, dst_ip, target_ip, tcp_pkt.dst_port)
+        self._install_redirection_flow(datapath, src_ip, hdr.ip_dst, target_ip, hdr.dst_port)
+        
+        # Run the current packet through the updated pipeline
+        self._resubmit(datapath, msg)
+
+    def _service_group_buckets(self, datapath):
+        """One weighted bucket per non-drained normal server"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        buckets = []
+        for server_ip in NORMAL_SERVERS:
+            weight = self.lb_weights[server_ip]
+            out_port = self.routes.port_toward(datapath.id, server_ip)
+            if weight <= 0 or out_port is None:
+                continue  # Drained, or no route to it from this switch yet
+            actions = [
+                parser.OFPActionSetField(eth_dst=HOSTS[server_ip]['mac']),
+                parser.OFPActionSetField(ipv4_dst=server_ip),
+                parser.OFPActionSetField(tcp_dst=HOSTS[server_ip]['port']),
+                parser.OFPActionOutput(out_port)
+            ]
+            buckets.append(parser.OFPBucket(weight=weight,
+                                            watch_port=ofproto.OFPP_ANY,
+                                            watch_group=ofproto.OFPG_ANY,
+                                            actions=actions))
+        return buckets
+
+    def _send_service_group(self, datapath, command):
+        """Add, modify or delete the service SELECT group on a switch"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        buckets = [] if command == ofproto.OFPGC_DELETE else self._service_group_buckets(datapath)
+        mod = parser.OFPGroupMod(datapath=datapath, command=command,
+                                 type_=ofproto.OFPGT_SELECT,
+                                 group_id=SERVICE_GROUP_ID, buckets=buckets)
+        datapath.send_msg(mod)
+
+    def set_lb_weights(self, weights):
+        """
+        Change service bucket weights at runtime (0 drains a server) and
+        push the new group to every connected switch
+        """
+        new_weights = dict(self.lb_weights)
+        for server_ip, weight in weights.items():
+            if server_ip not in new_weights:
+                raise ValueError(f"{server_ip} is not a normal server")
+            weight = int(weight)
+            if weight < 0 or weight > 0xffff:
+                raise ValueError(f"Weight for {server_ip} must be between 0 and 65535")
+            new_weights[server_ip] = weight
+        
+        if not any(new_weights.values()):
+            raise ValueError("At least one normal server must keep a non-zero weight")
+        
+        self.lb_weights = new_weights
+        for datapath in list(self.datapaths.values()):
+            self._send_service_group(datapath, datapath.ofproto.OFPGC_MODIFY)
+        
+        self.logger.info(f"Service group weights updated: {self.lb_weights}")
+        return self.lb_weights
+
+    def _install_service_flows(self, datapath, src_ip, in_port):
+        """
+        Send a source's service traffic through the SELECT group. Its
+        connection-opening SYNs still come to the controller, which installs
+        the return flow of each connection before the group balances it.
+        That is one PacketIn per service connection: replies carry nothing
+        that tells which connections the group balanced.
+        """
+        src_ip_n = ip_to_int(src_ip)
+        if not self._claim_flow_install(datapath.id, KIND_SERVICE, src_ip_n):
+            return
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        forward_match = parser.OFPMatch(
+            eth_type=ether_types.ETH_TYPE_IP,
+            ipv4_src=src_ip,
+            ipv4_dst=SERVICE_IP,
+            ip_proto=6,  # TCP
+            tcp_dst=SERVICE_PORT
+        )
+        forward_actions = [parser.OFPActionGroup(SERVICE_GROUP_ID)]
+        cookie = make_cookie(KIND_SERVICE, src_ip_n)
+        self.add_flow(datapath, 100, forward_match, forward_actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE)
+        
+        # Resubmitted SYNs enter from OFPP_CONTROLLER and fall through to the group
+        syn_match = parser.OFPMatch(
+            in_port=in_port,
+            eth_type=ether_types.ETH_TYPE_IP,
+            ipv4_src=src_ip,
+            ipv4_dst=SERVICE_IP,
+            ip_proto=6,
+            tcp_dst=SERVICE_PORT,
+            tcp_flags=(tcp.TCP_SYN, tcp.TCP_SYN | tcp.TCP_ACK)
+        )
+        syn_actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 110, syn_match, syn_actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE)
+    
+    def _install_service_return_flow(self, datapath, src_ip, src_port):
+        """
+        Rewrite server replies of one service connection back to the service
+        address. Matching the client's port keeps replies on the source's
+        direct connections to the same servers untouched.
+        """
+        parser = datapath.ofproto_parser
+        
+        match = parser.OFPMatch(
+            eth_type=ether_types.ETH_TYPE_IP,
+            ipv4_dst=src_ip,
+            ip_proto=6,
+            tcp_dst=src_port,
+            metadata=(METADATA_SERVER_REPLY, METADATA_SERVER_REPLY)
+        )
+        actions = [
+            parser.OFPActionSetField(eth_src=SERVICE_MAC),
+            parser.OFPActionSetField(ipv4_src=SERVICE_IP),
+            parser.OFPActionSetField(tcp_src=SERVICE_PORT)
+        ]
+        self.add_flow(datapath, 100, match, actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      idle_timeout=SERVICE_CONNECTION_IDLE_TIMEOUT,
+                      cookie=make_cookie(KIND_SERVICE, ip_to_int(src_ip)),
+                      table_id=TABLE_SERVICE, goto_table=TABLE_FORWARD)
+
+    def _install_allow_flow(self, datapath, src_ip, dst_ip, dst_port, in_port):
+        """
+        Let the rest of a normal source's direct web connection skip
+        classification. Its connection-opening SYNs still come to the
+        controller, so every new connection is classified and counted
+        against the rate thresholds.
+        """
+        src_ip_n = ip_to_int(src_ip)
+        if not self._claim_flow_install(datapath.id, KIND_ALLOW, src_ip_n,
+                                        ip_to_int(dst_ip), dst_port):
+            return
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        match = parser.OFPMatch(
+            eth_type=ether_types.ETH_TYPE_IP,
+            ipv4_src=src_ip,
+            ipv4_dst=dst_ip,
+            ip_proto=6,
+            tcp_dst=dst_port
+        )
+        cookie = make_cookie(KIND_ALLOW, src_ip_n)
+        self.add_flow(datapath, 100, match, [], hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE, goto_table=TABLE_FORWARD)
         
-        # Forward current packet
-        self._forward_to_target(datapath, pkt, target_ip, msg)
+        # As for the service, SYNs sent back by the controller enter from
+        # OFPP_CONTROLLER and take the allow flow
+        syn_match = parser.OFPMatch(
+            in_port=in_port,
+            eth_type=ether_types.ETH_TYPE_IP,
+            ipv4_src=src_ip,
+            ipv4_dst=dst_ip,
+            ip_proto=6,
+            tcp_dst=dst_port,
+            tcp_flags=(tcp.TCP_SYN, tcp.TCP_SYN | tcp.TCP_ACK)
+        )
+        syn_actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 110, syn_match, syn_actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE)
 
-    def _get_next_normal_server(self):
-        """Round-robin load balancing for normal servers"""
-        server = NORMAL_SERVERS[self.load_balancer_index]
-        self.load_balancer_index = (self.load_balancer_index + 1) % len(NORMAL_SERVERS)
-        return server
+    def _resubmit(self, datapath, msg):
+        """
+        Send the current packet through the switch pipeline again. It enters
+        from OFPP_CONTROLLER, so the host-port classification flows cannot
+        punt it back to the controller.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        actions = [parser.OFPActionOutput(ofproto.OFPP_TABLE)]
+        data = None
+        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+            data = msg.data
+
+        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                  in_port=ofproto.OFPP_CONTROLLER, actions=actions, data=data)
+        datapath.send_msg(out)
 
     def _install_redirection_flow(self, datapath, src_ip, original_dst, target_ip, dst_port):
         """
         Install comprehensive flow rules for traffic redirection
-        Creates bidirectional flows with proper timeout and priority
+        Creates bidirectional flows with proper timeout and priority; the
+        rewritten packets continue to TABLE_FORWARD for delivery
         """
+        src_ip_n = ip_to_int(src_ip)
+        if not self._claim_flow_install(datapath.id, KIND_REDIRECT, src_ip_n,
+                                        ip_to_int(original_dst), dst_port):
+            return
         parser = datapath.ofproto_parser
-        ofproto = datapath.ofproto
         
         # Get target information
         target_mac = HOSTS[target_ip]['mac']
-        target_port = self._get_port_for_ip(target_ip)
+        target_tcp_port = HOSTS[target_ip]['port']
         
         self.logger.info(f"Installing redirection flow: {src_ip} -> {original_dst} redirected to {target_ip}")
         
@@ -310,154 +973,286 @@ class HoneypotSDNController(app_manager.RyuApp):
         forward_actions = [
             parser.OFPActionSetField(ipv4_dst=target_ip),
             parser.OFPActionSetField(eth_dst=target_mac),
-            parser.OFPActionOutput(target_port)
+            parser.OFPActionSetField(tcp_dst=target_tcp_port)
         ]
         
         # Install forward flow with high priority and timeout
-        self.add_flow(datapath, 200, forward_match, forward_actions, hard_timeout=600)
+        cookie = make_cookie(KIND_REDIRECT, src_ip_n)
+        self.add_flow(datapath, 200, forward_match, forward_actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE, goto_table=TABLE_FORWARD)
         
         # Return direction: target -> src (modify source to appear as original destination)
         return_match = parser.OFPMatch(
             eth_type=ether_types.ETH_TYPE_IP,
             ipv4_src=target_ip,
             ipv4_dst=src_ip,
-            ip_proto=6
+            ip_proto=6,
+            tcp_src=target_tcp_port
         )
         
-        # Get source information for return path
-        src_port = self._get_port_for_ip(src_ip)
-        src_mac = HOSTS[src_ip]['mac'] if src_ip in HOSTS else "00:00:00:00:00:00"
+        original_mac = SERVICE_MAC if original_dst == SERVICE_IP else HOSTS.get(original_dst, {}).get('mac')
         
         return_actions = [
             parser.OFPActionSetField(ipv4_src=original_dst),  # Appear as original destination
-            parser.OFPActionSetField(eth_dst=src_mac) if src_mac != "00:00:00:00:00:00" else parser.OFPActionOutput(src_port),
-            parser.OFPActionOutput(src_port)
+            parser.OFPActionSetField(tcp_src=dst_port)
         ]
+        if original_mac:
+            return_actions.append(parser.OFPActionSetField(eth_src=original_mac))
+        if src_ip in HOSTS:
+            return_actions.append(parser.OFPActionSetField(eth_dst=HOSTS[src_ip]['mac']))
         
         # Install return flow
-        self.add_flow(datapath, 200, return_match, return_actions, hard_timeout=600)
+        self.add_flow(datapath, 200, return_match, return_actions, hard_timeout=FLOW_HARD_TIMEOUT,
+                      cookie=cookie, table_id=TABLE_SERVICE, goto_table=TABLE_FORWARD)
         
         self.logger.info(f"Installed bidirectional flows for {src_ip} <-> {target_ip}")
 
-    def _get_port_for_ip(self, ip):
-        """
-        Get switch port for given IP in tree topology
-        Improved with proper topology mapping
-        """
-        # Tree topology port mapping:
-        # s1 (root): connects to s2 (port 1), s3 (port 2)
-        # s2: connects to s1 (port 1), s4 (port 2), s5 (port 3)  
-        # s3: connects to s1 (port 1), s6 (port 2), s7 (port 3)
-        # s4: connects to s2 (port 1), h1 (port 2), h6 (port 3)
-        # s5: connects to s2 (port 1), h2 (port 2)
-        # s6: connects to s3 (port 1), h3 (port 2)
-        # s7: connects to s3 (port 1), h4 (port 2), h5 (port 3)
-        
-        port_map = {
-            '10.0.0.1': 2,  # h1 on s4 port 2
-            '10.0.0.2': 2,  # h2 on s5 port 2
-            '10.0.0.3': 2,  # h3 on s6 port 2
-            '10.0.0.4': 2,  # h4 on s7 port 2
-            '10.0.0.5': 3,  # h5 on s7 port 3
-            '10.0.0.6': 3,  # h6 on s4 port 3
-        }
-        return port_map.get(ip, 1)  # Default to port 1
-
-    def _get_switch_for_ip(self, ip):
-        """Get switch ID for given IP"""
-        switch_map = {
-            '10.0.0.1': 4,  # h1 on s4
-            '10.0.0.2': 5,  # h2 on s5  
-            '10.0.0.3': 6,  # h3 on s6
-            '10.0.0.4': 7,  # h4 on s7
-            '10.0.0.5': 7,  # h5 on s7
-            '10.0.0.6': 4,  # h6 on s4
-        }
-        return switch_map.get(ip, 1)  # Default to s1
+    def _get_ingress_switch(self, ip):
+        """Edge switch where traffic from ip enters the network"""
+        location = self.routes.host_location(ip)
+        if location is not None:
+            return location[0]
+        source_stats = self.traffic_stats.get(ip)
+        return source_stats.get('ingress') if source_stats else None
 
-    def _install_tree_forwarding_flows(self, datapath):
-        """
-        Install forwarding flows for tree topology
-        This creates the basic routing infrastructure
-        """
-        parser = datapath.ofproto_parser
-        dpid = datapath.id
+    @set_ev_cls(topo_event.EventSwitchEnter)
+    def switch_enter_handler(self, ev):
+        switch = ev.switch
+        self.routes.add_switch(switch.dp.id, [port.port_no for port in switch.ports])
+        self._schedule_route_sync()
+
+    @set_ev_cls(topo_event.EventSwitchLeave)
+    def switch_leave_handler(self, ev):
+        self.routes.remove_switch(ev.switch.dp.id)
+        self._schedule_route_sync()
+
+    @set_ev_cls(topo_event.EventPortAdd)
+    def port_add_handler(self, ev):
+        self.routes.add_port(ev.port.dpid, ev.port.port_no)
+        self._schedule_route_sync()
+
+    @set_ev_cls(topo_event.EventPortDelete)
+    def port_delete_handler(self, ev):
+        self.routes.remove_port(ev.port.dpid, ev.port.port_no)
+        self._schedule_route_sync()
+
+    @set_ev_cls(topo_event.EventLinkAdd)
+    def link_add_handler(self, ev):
+        link = ev.link
+        self.routes.add_link(link.src.dpid, link.src.port_no, link.dst.dpid, link.dst.port_no)
+        self._schedule_route_sync()
+
+    @set_ev_cls(topo_event.EventLinkDelete)
+    def link_delete_handler(self, ev):
+        link = ev.link
+        self.routes.remove_link(link.src.dpid, link.dst.dpid)
+        self._schedule_route_sync()
+
+    def _schedule_route_sync(self):
+        """Apply topology changes to the switches once the current burst of events settles"""
+        if not self._route_sync_scheduled:
+            self._route_sync_scheduled = True
+            hub.spawn_after(ROUTE_SYNC_DELAY, self._run_route_sync)
+
+    def _run_route_sync(self):
+        self._route_sync_scheduled = False
+        try:
+            self.sync_routes()
+        except Exception as e:
+            self.logger.error(f"Route sync error: {e}")
+
+    def sync_routes(self):
+        """Recompute changed next hops and reconcile every connected switch"""
+        changed = self.routes.refresh()
+        for datapath in list(self.datapaths.values()):
+            self._sync_switch(datapath)
+        self._probe_hosts()
+        if changed:
+            self.logger.info(f"Routes recomputed toward {len(changed)} switches")
+
+    def _sync_switch(self, datapath):
+        """Bring one switch's topology-dependent flows in line with the route table"""
+        self._sync_host_routes(datapath)
+        self._sync_classification_flows(datapath)
+        self._sync_flood(datapath)
         
-        self.logger.info(f"Installing tree forwarding flows for switch s{dpid}")
+        server_ports = tuple(self.routes.port_toward(datapath.id, ip) for ip in NORMAL_SERVERS)
+        if self._installed_server_ports.get(datapath.id) != server_ports:
+            self._installed_server_ports[datapath.id] = server_ports
+            self._send_service_group(datapath, datapath.ofproto.OFPGC_MODIFY)
+
+    def _sync_host_routes(self, datapath):
+        """Per-destination IPv4 forwarding toward every located host"""
+        parser = datapath.ofproto_parser
         
-        # Switch-specific forwarding rules based on tree topology
-        if dpid == 1:  # Root switch s1
-            # Forward to s2 (hosts h1, h2, h6)
-            for ip in ['10.0.0.1', '10.0.0.2', '10.0.0.6']:
-                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
-                actions = [parser.OFPActionOutput(1)]  # To s2
-                self.add_flow(datapath, 50, match, actions)
-            
-            # Forward to s3 (hosts h3, h4, h5)
-            for ip in ['10.0.0.3', '10.0.0.4', '10.0.0.5']:
-                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
-                actions = [parser.OFPActionOutput(2)]  # To s3
-                self.add_flow(datapath, 50, match, actions)
-                
-        elif dpid == 2:  # Switch s2
-            # Forward to s4 (hosts h1, h6)
-            for ip in ['10.0.0.1', '10.0.0.6']:
-                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
-                actions = [parser.OFPActionOutput(2)]  # To s4
-                self.add_flow(datapath, 50, match, actions)
-            
-            # Forward to s5 (host h2)
-            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst='10.0.0.2')
-            actions = [parser.OFPActionOutput(3)]  # To s5
-            self.add_flow(datapath, 50, match, actions)
-            
-        elif dpid == 3:  # Switch s3
-            # Forward to s6 (host h3)
-            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst='10.0.0.3')
-            actions = [parser.OFPActionOutput(2)]  # To s6
-            self.add_flow(datapath, 50, match, actions)
-            
-            # Forward to s7 (hosts h4, h5)
-            for ip in ['10.0.0.4', '10.0.0.5']:
-                match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
-                actions = [parser.OFPActionOutput(3)]  # To s7
-                self.add_flow(datapath, 50, match, actions)
-        
-        elif dpid in [4, 5, 6, 7]:  # Leaf switches
-            # Direct host connections handled by MAC learning
-            pass
-
-    def _forward_to_target(self, datapath, pkt, target_ip, msg):
-        """Forward packet to target host"""
+        installed = self._installed_routes[datapath.id]
+        for ip in HOSTS:
+            out_port = self.routes.port_toward(datapath.id, ip)
+            if installed.get(ip) == out_port:
+                continue
+            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_dst=ip)
+            if out_port is None:
+                self.delete_flow(datapath, 50, match)
+                del installed[ip]
+            else:
+                self.add_flow(datapath, 50, match, [parser.OFPActionOutput(out_port)],
+                              cookie=make_cookie(KIND_ROUTE))
+                installed[ip] = out_port
+
+    def _sync_classification_flows(self, datapath):
+        """Punt web traffic on host-facing ports only; links carry already handled traffic"""
         parser = datapath.ofproto_parser
-        ofproto = datapath.ofproto
         
-        target_mac = HOSTS[target_ip]['mac']
-        out_port = self._get_port_for_ip(target_ip)
+        edge_ports = self.routes.edge_ports(datapath.id)
+        classified = self._classified_ports[datapath.id]
+        for port in classified - edge_ports:
+            cookie, cookie_mask = kind_filter(KIND_CLASSIFY)
+            self.delete_flows_by_cookie(datapath, cookie, cookie_mask,
+                                        match=parser.OFPMatch(in_port=port))
+        new_ports = edge_ports - classified
+        if new_ports:
+            self._install_classification_flows(datapath, sorted(new_ports))
+        self._classified_ports[datapath.id] = edge_ports
+
+    def _sync_flood(self, datapath):
+        """Flood ARP for unknown targets along the spanning tree only"""
+        ports = self.routes.flood_ports(datapath.id)
+        if datapath.id in self._installed_flood and self._installed_flood[datapath.id] == ports:
+            return
+        self._installed_flood[datapath.id] = ports
+        
+        parser = datapath.ofproto_parser
+        arp_match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP)
+        self.add_flow(datapath, 10, arp_match, self._flood_actions(datapath),
+                      cookie=make_cookie(KIND_ARP))
+
+    def _flood_actions(self, datapath):
+        """Output to host ports and spanning-tree links (plain FLOOD before discovery)"""
+        parser = datapath.ofproto_parser
+        ports = self.routes.flood_ports(datapath.id)
+        if ports is None:
+            return [parser.OFPActionOutput(datapath.ofproto.OFPP_FLOOD)]
+        return [parser.OFPActionOutput(port) for port in sorted(ports)]
+
+    def _learn_host_location(self, dpid, in_port, ip):
+        """
+        Locate a topology host from its reply to a probe. Only hosts still
+        being probed are learned, so other traffic (spoofed or not) cannot
+        move a host, and locations from the topology manifest are never
+        overridden.
+        """
+        if ip not in HOSTS or ip in HOST_LOCATIONS or self.routes.host_location(ip) is not None:
+            return
+        if not self.routes.is_edge_port(dpid, in_port):
+            return
+        self.routes.learn_host(ip, dpid, in_port)
+        self.logger.info(f"Host {ip} located at s{dpid} port {in_port}")
+        self._schedule_route_sync()
+
+    def _probe_hosts(self):
+        """
+        ARP for topology hosts that have not been located yet from every
+        host-facing port, as the service address; the replies are sent to the
+        controller and reveal where each host attaches
+        """
+        missing = [ip for ip in HOSTS if self.routes.host_location(ip) is None]
+        if not missing:
+            return
         
-        # Modify packet destination
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        ipv4_pkt = pkt.get_protocols(ipv4.ipv4)[0]
+        for ip in missing:
+            pkt = packet.Packet()
+            pkt.add_protocol(ethernet.ethernet(dst='ff:ff:ff:ff:ff:ff', src=SERVICE_MAC,
+                                               ethertype=ether_types.ETH_TYPE_ARP))
+            pkt.add_protocol(arp.arp(opcode=arp.ARP_REQUEST, src_mac=SERVICE_MAC,
+                                     src_ip=SERVICE_IP, dst_mac='00:00:00:00:00:00',
+                                     dst_ip=ip))
+            pkt.serialize()
+            
+            for datapath in list(self.datapaths.values()):
+                ofproto = datapath.ofproto
+                parser = datapath.ofproto_parser
+                actions = [parser.OFPActionOutput(port)
+                           for port in sorted(self.routes.edge_ports(datapath.id))]
+                if not actions:
+                    continue
+                out = parser.OFPPacketOut(datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER,
+                                          in_port=ofproto.OFPP_CONTROLLER, actions=actions,
+                                          data=pkt.data)
+                datapath.send_msg(out)
+
+    def _install_classification_flows(self, datapath, ports):
+        """
+        Punt web traffic arriving from hosts on ports to the controller for
+        classification. In SYN-only mode just the opening SYN (SYN set, ACK
+        clear) of each connection is punted; the flows installed for it carry
+        the rest, and other packets go straight to forwarding. The service
+        address has no forwarding of its own, so all of its packets are
+        still punted when a source has no service flow.
         
-        actions = [
-            parser.OFPActionSetField(eth_dst=target_mac),
-            parser.OFPActionSetField(ipv4_dst=target_ip),
-            parser.OFPActionOutput(out_port)
-        ]
+        Every web SYN from those ports is also counted in TABLE_CLASSIFY, so
+        /api/packet-in sees each connection whether or not it reaches the
+        controller.
+        """
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
         
-        data = None
-        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
-            data = msg.data
+        syn_only = CONF.honeypot.syn_only_packet_in
+        cookie = make_cookie(KIND_CLASSIFY)
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+        for port in ports:
+            for web_port in sorted(WEB_PORTS):
+                counter_match = parser.OFPMatch(in_port=port, eth_type=ether_types.ETH_TYPE_IP,
+                                                ip_proto=6, tcp_dst=web_port,
+                                                tcp_flags=(tcp.TCP_SYN, tcp.TCP_SYN | tcp.TCP_ACK))
+                self.add_flow(datapath, 20, counter_match, [], cookie=cookie,
+                              table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE)
+                fields = dict(in_port=port, eth_type=ether_types.ETH_TYPE_IP,
+                              ip_proto=6, tcp_dst=web_port)
+                if syn_only:
+                    fields['tcp_flags'] = (tcp.TCP_SYN, tcp.TCP_SYN | tcp.TCP_ACK)
+                self.add_flow(datapath, 10, parser.OFPMatch(**fields), actions, cookie=cookie,
+                              table_id=TABLE_SERVICE)
+            if syn_only:
+                match = parser.OFPMatch(in_port=port, eth_type=ether_types.ETH_TYPE_IP,
+                                        ip_proto=6, ipv4_dst=SERVICE_IP, tcp_dst=SERVICE_PORT)
+                self.add_flow(datapath, 5, match, actions, cookie=cookie,
+                              table_id=TABLE_SERVICE)
 
-        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                  in_port=msg.match['in_port'], actions=actions, data=data)
-        datapath.send_msg(out)
+    def _forget_installed_flows(self, dpid):
+        """Drop the install bookkeeping of one switch, keeping every other switch's"""
+        for installed in self.installed_flows.values():
+            for key in [key for key in installed if key[0] == dpid]:
+                del installed[key]
+
+    def _claim_flow_install(self, dpid, kind, src_ip_n, dst_ip_n=0, dst_port=0):
+        """
+        True if the flows of this kind for (src, dst, port) still have to be
+        installed on the switch; False if an earlier install is still live
+        """
+        now = time.time()
+        installed = self.installed_flows.touch(src_ip_n, now)
+        key = (dpid, kind, dst_ip_n, dst_port)
+        if installed.get(key, 0) > now:
+            self.packet_in_stats['flow_installs_deduplicated'] += 1
+            return False
+        installed[key] = now + FLOW_HARD_TIMEOUT
+        self.packet_in_stats['flow_installs'] += 1
+        return True
 
-    def _l2_switching(self, datapath, pkt, in_port, msg):
+    def _install_server_reply_flows(self, datapath):
+        """Mark replies from the normal servers' web ports in metadata"""
+        parser = datapath.ofproto_parser
+        
+        for server_ip in NORMAL_SERVERS:
+            match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ip_proto=6,
+                                    ipv4_src=server_ip, tcp_src=HOSTS[server_ip]['port'])
+            self.add_flow(datapath, 50, match, [], cookie=make_cookie(KIND_SERVER_REPLY),
+                          table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE,
+                          metadata=(METADATA_SERVER_REPLY, METADATA_SERVER_REPLY))
+
+    def _l2_switching(self, datapath, hdr, in_port, msg):
         """Standard L2 switching for non-web traffic"""
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
-        dst = eth.dst
-        src = eth.src
+        dst = hdr.eth_dst
         dpid = datapath.id
         
         ofproto = datapath.ofproto
@@ -465,15 +1260,14 @@ class HoneypotSDNController(app_manager.RyuApp):
 
         if dst in self.mac_to_port[dpid]:
             out_port = self.mac_to_port[dpid][dst]
+            actions = [parser.OFPActionOutput(out_port)]
+            
+            # Install a flow to avoid packet_in next time; keyed on the
+            # destination only so it serves every ingress port
+            match = parser.OFPMatch(eth_dst=dst)
+            self.add_flow(datapath, 1, match, actions, cookie=make_cookie(KIND_L2))
         else:
-            out_port = ofproto.OFPP_FLOOD
-
-        actions = [parser.OFPActionOutput(out_port)]
-
-        # Install a flow to avoid packet_in next time
-        if out_port != ofproto.OFPP_FLOOD:
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst)
-            self.add_flow(datapath, 1, match, actions)
+            actions = self._flood_actions(datapath)
 
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
@@ -485,27 +1279,23 @@ class HoneypotSDNController(app_manager.RyuApp):
 
     def _monitoring_loop(self):
         """Background monitoring and logging"""
-        baseline_ips = {'10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.5', '10.0.0.6'}
-        
         while True:
             try:
                 current_time = time.time()
                 
-                # Log traffic statistics - but keep baseline IPs alive
-                for ip, stats in list(self.traffic_stats.items()):
-                    if ip in baseline_ips:
-                        # Keep baseline IPs active by updating their last_seen periodically
-                        if current_time - stats['last_seen'] > 240:  # Update every 4 minutes
-                            stats['last_seen'] = current_time
-                    elif current_time - stats['last_seen'] > 300:  # 5 minutes timeout for real traffic
-                        del self.traffic_stats[ip]
+                # Keep baseline IPs alive; idle sources and flows expire on their own
+                for ip in BASELINE_IPS:
+                    stats = self.traffic_stats.touch(ip, current_time)
+                    stats['last_seen'] = current_time
+                    if not stats['packets']:
+                        stats['packets'] = 1
+                self.flow_stats.expire(current_time)
                 
-                # Log flow statistics
-                active_flows = len([f for f in self.flow_stats.values() 
-                                   if current_time - f['last_packet_time'] < 60])
+                # Keep looking for topology hosts that have not shown up yet
+                self._probe_hosts()
                 
                 self.logger.info(f"Active IPs: {len(self.traffic_stats)}, "
-                               f"Active Flows: {active_flows}, "
+                               f"Active Flows: {len(self.flow_stats)}, "
                                f"Suspicious IPs: {len(self.suspicious_ips)}, "
                                f"Malicious IPs: {len(self.malicious_ips)}")
                 
@@ -514,11 +1304,260 @@ class HoneypotSDNController(app_manager.RyuApp):
             except Exception as e:
                 self.logger.error(f"Monitoring error: {e}")
 
+    def _event_stats_loop(self):
+        """Publish a counter snapshot every EVENT_STATS_INTERVAL while a dashboard listens"""
+        while True:
+            hub.sleep(EVENT_STATS_INTERVAL)
+            if not self.events.active:
+                continue
+            try:
+                self.events.publish('stats', self.stats_event())
+            except Exception as e:
+                self.logger.error(f"Event stream stats error: {e}")
+
+    def _connection_stats_loop(self):
+        """Poll the SYN counters of every switch's TABLE_CLASSIFY every CONNECTION_STATS_INTERVAL"""
+        while True:
+            hub.sleep(CONNECTION_STATS_INTERVAL)
+            for datapath in list(self.datapaths.values()):
+                try:
+                    parser = datapath.ofproto_parser
+                    datapath.send_msg(parser.OFPFlowStatsRequest(datapath, table_id=TABLE_CLASSIFY))
+                except Exception as e:
+                    self.logger.error(f"Flow stats request to s{datapath.id} failed: {e}")
+
+    def stats_snapshot(self):
+        """Controller statistics as served by /api/stats"""
+        self.traffic_stats.expire()
+        return {
+            'active_ips': len(self.traffic_stats),
+            'suspicious_ips': list(self.suspicious_ips),
+            'malicious_ips': list(self.malicious_ips),
+            'flow_count': len(self.suspicious_ips) + len(self.malicious_ips),
+            'last_update': time.strftime('%H:%M:%S')
+        }
+
+    def stats_event(self):
+        """Body of the event stream's 'stats' events: /api/stats plus PacketIn counters"""
+        return dict(self.stats_snapshot(), packet_in=dict(self.packet_in_stats))
+
+    def get_classification(self, source_ip):
+        """Effective class of a source IP"""
+        if source_ip in self.malicious_ips:
+            return 'malicious'
+        if source_ip in self.suspicious_ips:
+            return 'suspicious'
+        return 'normal'
+
+    def _on_classification_change(self, source_ip, old_class, new_class):
+        """Apply switch-side policy for a source that moved between classes"""
+        self.logger.info(f"IP {source_ip} moved from {old_class} to {new_class}")
+        self._publish_classification(source_ip, old_class, new_class)
+        self._push_source_policy(source_ip, new_class)
+
+    def _publish_classification(self, source_ip, old_class, new_class):
+        self.events.publish('classification', {
+            'source_ip': source_ip,
+            'old_classification': old_class,
+            'classification': new_class,
+            'timestamp': time.time()
+        })
+
+    def _push_source_policy(self, source_ip, classification):
+        """
+        Enforce a source's class on the switches right away instead of on its
+        next PacketIn: purge every flow installed for it, then install its
+        meter and honeypot redirection of the service at its ingress switch.
+        Connections made straight to a server's address are redirected
+        reactively, since their return flows would collide with the service's
+        """
+        source_ip_n = ip_to_int(source_ip)
+        self.purge_flows(*source_filter(source_ip_n), source_ip_n=source_ip_n)
+        self._install_source_policy(source_ip, classification)
+
+    def _install_source_policy(self, source_ip, classification):
+        """Meter and service redirection of a source whose old flows are already purged"""
+        self._update_source_meter(source_ip, classification)
+        if classification == 'normal':
+            return
+        
+        datapath = self.datapaths.get(self._get_ingress_switch(source_ip))
+        if datapath is None:
+            self.logger.warning(f"No connected ingress switch for {source_ip}; "
+                                f"redirection will be installed on its next packet")
+            return
+        
+        target_ip = DEEP_HONEYPOT if classification == 'malicious' else TRIAGE_HONEYPOT
+        self._install_redirection_flow(datapath, source_ip, SERVICE_IP, target_ip, SERVICE_PORT)
+
+    def _meter_rate(self, classification):
+        if classification == 'malicious':
+            return CONF.honeypot.malicious_meter_rate
+        return CONF.honeypot.suspicious_meter_rate
+
+    def _police_match(self, parser, source_ip):
+        return parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_src=source_ip)
+
+    def _send_meter(self, datapath, command, meter_id, classification=None):
+        """Add, modify or delete a per-source drop meter"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        
+        bands = []
+        if command != ofproto.OFPMC_DELETE:
+            bands = [parser.OFPMeterBandDrop(rate=self._meter_rate(classification),
+                                             burst_size=CONF.honeypot.meter_burst_size)]
+        mod = parser.OFPMeterMod(datapath=datapath, command=command,
+                                 flags=ofproto.OFPMF_PKTPS | ofproto.OFPMF_BURST,
+                                 meter_id=meter_id, bands=bands)
+        datapath.send_msg(mod)
+
+    def _install_police_flow(self, datapath, source_ip, meter_id, classification):
+        """
+        Meter everything the source sends before it reaches the service
+        table; malicious sources only reach the deep honeypot, so only their
+        web traffic goes on to be classified and redirected and the rest is
+        dropped here
+        """
+        parser = datapath.ofproto_parser
+        
+        source_ip_n = ip_to_int(source_ip)
+        cookie = make_cookie(KIND_POLICE, source_ip_n)
+        # The edge port SYN counters sit below the police flows, so the
+        # source's web connections are counted here instead
+        for web_port in sorted(WEB_PORTS):
+            syn_match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_src=source_ip,
+                                        ip_proto=6, tcp_dst=web_port,
+                                        tcp_flags=(tcp.TCP_SYN, tcp.TCP_SYN | tcp.TCP_ACK))
+            self.add_flow(datapath, 152, syn_match, [], meter_id=meter_id, cookie=cookie,
+                          table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE)
+        if classification == 'malicious':
+            for web_port in sorted(WEB_PORTS):
+                web_match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_IP, ipv4_src=source_ip,
+                                            ip_proto=6, tcp_dst=web_port)
+                self.add_flow(datapath, 151, web_match, [], meter_id=meter_id, cookie=cookie,
+                              table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE)
+            # Replaces the source's metered pass-through flow if it had one
+            self.add_flow(datapath, 150, self._police_match(parser, source_ip), [],
+                          meter_id=meter_id, cookie=make_cookie(KIND_DROP, source_ip_n),
+                          table_id=TABLE_CLASSIFY)
+            return
+        self.add_flow(datapath, 150, self._police_match(parser, source_ip), [], meter_id=meter_id,
+                      cookie=cookie, table_id=TABLE_CLASSIFY, goto_table=TABLE_SERVICE)
+
+    def _update_source_meter(self, source_ip, classification):
+        """
+        Attach, retune or detach the rate limiting meter of a source at its
+        ingress edge switch
+        """
+        meter = self.source_meters.get(source_ip)
+        
+        if classification == 'normal':
+            if meter is None:
+                return
+            dpid, meter_id, _ = self.source_meters.pop(source_ip)
+            datapath = self.datapaths.get(dpid)
+            if datapath is not None:
+                # The police flow went with the source's cookie purge
+                self._send_meter(datapath, datapath.ofproto.OFPMC_DELETE, meter_id)
+            self._free_meter_ids[dpid].append(meter_id)
+            self.logger.info(f"Detached meter {meter_id} from {source_ip} on s{dpid}")
+            return
+        
+        if meter is not None:
+            dpid, meter_id, _ = meter
+            datapath = self.datapaths.get(dpid)
+            if datapath is not None:
+                self._send_meter(datapath, datapath.ofproto.OFPMC_MODIFY, meter_id, classification)
+                self._install_police_flow(datapath, source_ip, meter_id, classification)
+            self.source_meters[source_ip] = (dpid, meter_id, classification)
+            self.logger.info(f"Meter {meter_id} for {source_ip} on s{dpid} now at "
+                             f"{self._meter_rate(classification)} pkt/s ({classification})")
+            return
+        
+        dpid = self._get_ingress_switch(source_ip)
+        datapath = self.datapaths.get(dpid)
+        if datapath is None:
+            self.logger.warning(f"No connected ingress switch for {source_ip}; meter not attached")
+            return
+        
+        free_ids = self._free_meter_ids[dpid]
+        if free_ids:
+            meter_id = free_ids.pop()
+        else:
+            meter_id = self._next_meter_id[dpid]
+            self._next_meter_id[dpid] += 1
+        
+        self._send_meter(datapath, datapath.ofproto.OFPMC_ADD, meter_id, classification)
+        self._install_police_flow(datapath, source_ip, meter_id, classification)
+        self.source_meters[source_ip] = (dpid, meter_id, classification)
+        self.logger.info(f"Attached meter {meter_id} to {source_ip} on s{dpid} at "
+                         f"{self._meter_rate(classification)} pkt/s ({classification})")
+
+    def _reinstall_source_meters(self, datapath):
+        """Restore meters and police flows after a switch (re)connects"""
+        ofproto = datapath.ofproto
+        self._send_meter(datapath, ofproto.OFPMC_DELETE, ofproto.OFPM_ALL)
+        for source_ip, (dpid, meter_id, classification) in self.source_meters.items():
+            if dpid == datapath.id:
+                self._send_meter(datapath, ofproto.OFPMC_ADD, meter_id, classification)
+                self._install_police_flow(datapath, source_ip, meter_id, classification)
+
     def update_classification(self, source_ip, classification, risk_score, ml_prediction=None):
         """
         Enhanced classification update with ML model integration
         """
-        self.logger.info(f"[DEBUG] Updating classification: IP={source_ip}, Class={classification}, Risk={risk_score}, ML={ml_prediction}")
+        old_class = self.get_classification(source_ip)
+        self._apply_verdict(source_ip, classification, risk_score, ml_prediction)
+        new_class = self.get_classification(source_ip)
+        if new_class != old_class:
+            self._on_classification_change(source_ip, old_class, new_class)
+        return new_class
+
+    def update_classifications(self, updates):
+        """
+        Apply a batch of verdicts (dicts like the classification POST body).
+        Switches are updated once per source whose class changed over the
+        whole batch: every such source is purged first, with one barrier per
+        switch, then its new policy is installed. Returns one
+        (source_ip, applied_classification, error) tuple per update.
+        """
+        results = []
+        before = {}
+        for data in updates:
+            try:
+                source_ip = data['source_ip']
+                old_class = self.get_classification(source_ip)
+                self._apply_verdict(source_ip, data['classification'], data['risk_score'],
+                                    data.get('ml_prediction'))
+            except Exception as e:
+                results.append((None, None, str(e) or type(e).__name__))
+                continue
+            before.setdefault(source_ip, old_class)
+            results.append((source_ip, self.get_classification(source_ip), None))
+        
+        changed = {}
+        for source_ip, old_class in before.items():
+            new_class = self.get_classification(source_ip)
+            if new_class != old_class:
+                self.logger.info(f"IP {source_ip} moved from {old_class} to {new_class}")
+                self._publish_classification(source_ip, old_class, new_class)
+                changed[source_ip] = new_class
+        if not changed:
+            return results
+        
+        for source_ip in changed:
+            source_ip_n = ip_to_int(source_ip)
+            self.purge_flows(*source_filter(source_ip_n), source_ip_n=source_ip_n, barrier=False)
+        for datapath in self.datapaths.values():
+            datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+        for source_ip, new_class in changed.items():
+            self._install_source_policy(source_ip, new_class)
+        return results
+
+    def _apply_verdict(self, source_ip, classification, risk_score, ml_prediction=None):
+        """Move source_ip between the suspicious/malicious sets according to one verdict"""
+        self.logger.debug(f"Updating classification: IP={source_ip}, Class={classification}, Risk={risk_score}, ML={ml_prediction}")
         
         # Handle ML prediction if provided
         if ml_prediction is not None:
@@ -575,9 +1614,20 @@ class HoneypotController(ControllerBase):
             ml_prediction = data.get('ml_prediction', None)  # Binary ML prediction (1 or 0)
             honeypot_type = data.get('honeypot_type', 'unknown')
             
-            self.controller.update_classification(source_ip, classification, risk_score, ml_prediction)
+            # Time from receiving the verdict to every switch acknowledging the new flows
+            start = time.perf_counter()
+            with self.controller.classification_lock:
+                new_class = self.controller.update_classification(source_ip, classification, risk_score, ml_prediction)
+            acknowledged = self.controller.wait_for_switches(list(self.controller.datapaths.values()))
+            enforcement_ms = (time.perf_counter() - start) * 1000
             
-            response_data = {'status': 'success', 'source_ip': source_ip}
+            response_data = {
+                'status': 'success',
+                'source_ip': source_ip,
+                'applied_classification': new_class,
+                'enforcement_ms': round(enforcement_ms, 3),
+                'switches_acknowledged': acknowledged
+            }
             if ml_prediction is not None:
                 response_data['ml_prediction_processed'] = ml_prediction
                 
@@ -588,9 +1638,77 @@ class HoneypotController(ControllerBase):
                           body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
                           status=400)
 
+    @route('honeypot', '/honeypot/classification/batch', methods=['POST'])
+    def honeypot_classification_batch(self, req, **kwargs):
+        """
+        Receive many classification updates in one request: a JSON array (or
+        {"updates": [...]}) or newline-delimited JSON, one update per line
+        """
+        try:
+            updates = self._parse_batch(req)
+        except ValueError as e:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
+                          status=400)
+        
+        start = time.perf_counter()
+        with self.controller.classification_lock:
+            applied = self.controller.update_classifications(updates)
+        
+        results = []
+        errors = 0
+        for index, (source_ip, new_class, error) in enumerate(applied):
+            if error is None:
+                results.append({'status': 'success', 'source_ip': source_ip,
+                                'applied_classification': new_class})
+            else:
+                errors += 1
+                results.append({'status': 'error', 'index': index, 'message': error})
+        
+        # One barrier round for the whole batch
+        acknowledged = self.controller.wait_for_switches(list(self.controller.datapaths.values()))
+        enforcement_ms = (time.perf_counter() - start) * 1000
+        
+        response_data = {
+            'status': 'success' if not errors else 'partial',
+            'processed': len(updates) - errors,
+            'errors': errors,
+            'enforcement_ms': round(enforcement_ms, 3),
+            'switches_acknowledged': acknowledged,
+            'results': results
+        }
+        return Response(content_type='application/json',
+                      body=json.dumps(response_data).encode('utf-8'))
+
+    @staticmethod
+    def _parse_batch(req):
+        """List of update dicts from a JSON array/object or NDJSON request body"""
+        body = req.body.decode('utf-8')
+        if req.content_type not in ('application/x-ndjson', 'application/jsonl'):
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None  # Not a single JSON document: try one update per line
+            else:
+                if isinstance(data, dict):
+                    data = data.get('updates', [data])
+                if not isinstance(data, list):
+                    raise ValueError('Expected a JSON array of classification updates')
+                return data
+        
+        updates = []
+        for number, line in enumerate(body.splitlines(), start=1):
+            if line.strip():
+                try:
+                    updates.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f'Line {number}: {e}')
+        return updates
+
     @route('honeypot', '/honeypot/stats', methods=['GET'])
     def get_stats(self, req, **kwargs):
         """Get controller statistics (legacy endpoint)"""
+        self.controller.traffic_stats.expire()
         stats = {
             'active_ips': len(self.controller.traffic_stats),
             'suspicious_ips': list(self.controller.suspicious_ips),
@@ -604,17 +1722,176 @@ class HoneypotController(ControllerBase):
     @route('api', '/api/stats', methods=['GET'])
     def get_api_stats(self, req, **kwargs):
         """Get controller statistics (standard API endpoint)"""
-        stats = {
-            'active_ips': len(self.controller.traffic_stats),
-            'suspicious_ips': list(self.controller.suspicious_ips),
-            'malicious_ips': list(self.controller.malicious_ips),
-            'flow_count': len(self.controller.suspicious_ips) + len(self.controller.malicious_ips),
-            'last_update': time.strftime('%H:%M:%S')
-        }
+        stats = self.controller.stats_snapshot()
         
         return Response(content_type='application/json',
                       body=json.dumps(stats).encode('utf-8'))
 
+    @route('api', '/api/events', methods=['GET'])
+    def get_events(self, req, **kwargs):
+        """
+        Server-sent events: 'classification' on every class change,
+        'flow_install' for per-source flows, 'stats' (the /api/stats body
+        plus PacketIn counters) every second. Starts with a stats snapshot.
+        """
+        controller = self.controller
+        snapshot = controller.stats_event()
+        # eventlet's WSGI server otherwise buffers small writes up to 4 KB
+        req.environ['eventlet.minimum_write_chunk_size'] = 0
+        response = Response(content_type='text/event-stream', charset=None,
+                            app_iter=controller.events.stream([('stats', snapshot)]))
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    @route('api', '/api/events/stats', methods=['GET'])
+    def get_event_stream_stats(self, req, **kwargs):
+        """Event stream subscribers and published/dropped event counts"""
+        return Response(content_type='application/json',
+                      body=json.dumps(self.controller.events.stats()).encode('utf-8'))
+
+    @route('api', '/api/tables', methods=['GET'])
+    def get_table_stats(self, req, **kwargs):
+        """Occupancy and eviction counters of the bounded controller state tables"""
+        tables = {}
+        for table in (self.controller.traffic_stats, self.controller.flow_stats,
+                      self.controller.source_rates, self.controller.installed_flows):
+            table.expire()
+            tables[table.name] = table.stats()
+        
+        return Response(content_type='application/json',
+                      body=json.dumps(tables).encode('utf-8'))
+
+    @route('api', '/api/loadbalancer', methods=['GET'])
+    def get_load_balancer(self, req, **kwargs):
+        """Service SELECT group configuration"""
+        return Response(content_type='application/json',
+                      body=json.dumps(self._load_balancer_state()).encode('utf-8'))
+
+    @route('api', '/api/loadbalancer', methods=['POST'])
+    def set_load_balancer_weights(self, req, **kwargs):
+        """Change service bucket weights, e.g. {"weights": {"10.0.0.1": 3}}"""
+        try:
+            data = json.loads(req.body.decode('utf-8'))
+            self.controller.set_lb_weights(data['weights'])
+            return Response(content_type='application/json',
+                          body=json.dumps(self._load_balancer_state()).encode('utf-8'))
+        except Exception as e:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
+                          status=400)
+
+    @route('api', '/api/loadbalancer/drain/{ip}', methods=['POST'], requirements={'ip': r'\d+\.\d+\.\d+\.\d+'})
+    def drain_server(self, req, ip, **kwargs):
+        """Stop sending new service connections to a normal server"""
+        try:
+            self.controller.set_lb_weights({ip: 0})
+            return Response(content_type='application/json',
+                          body=json.dumps(self._load_balancer_state()).encode('utf-8'))
+        except Exception as e:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
+                          status=400)
+
+    def _load_balancer_state(self):
+        weights = self.controller.lb_weights
+        return {
+            'service_ip': SERVICE_IP,
+            'service_port': SERVICE_PORT,
+            'group_id': SERVICE_GROUP_ID,
+            'weights': weights,
+            'drained': [ip for ip, weight in weights.items() if weight == 0],
+            'switches': len(self.controller.datapaths)
+        }
+
+    @route('api', '/api/meters', methods=['GET'])
+    def get_meters(self, req, **kwargs):
+        """Per-source rate limiting meters currently attached"""
+        meters = {
+            ip: {
+                'switch': f's{dpid}',
+                'meter_id': meter_id,
+                'classification': classification,
+                'rate_pps': self.controller._meter_rate(classification)
+            }
+            for ip, (dpid, meter_id, classification) in self.controller.source_meters.items()
+        }
+        return Response(content_type='application/json',
+                      body=json.dumps(meters).encode('utf-8'))
+
+    @route('api', '/api/topology', methods=['GET'])
+    def get_topology(self, req, **kwargs):
+        """Discovered switches, links and host attachment points"""
+        return Response(content_type='application/json',
+                      body=json.dumps(self.controller.routes.stats()).encode('utf-8'))
+
+    @route('api', '/api/packet-in', methods=['GET'])
+    def get_packet_in_stats(self, req, **kwargs):
+        """
+        Web PacketIns per TCP connection and deduplicated flow installs.
+        Connections are web SYNs counted by the switches, polled every
+        CONNECTION_STATS_INTERVAL, so the ratio lags the PacketIns slightly.
+        """
+        stats = dict(self.controller.packet_in_stats)
+        stats['mode'] = 'syn_only' if CONF.honeypot.syn_only_packet_in else 'all_packets'
+        connections = stats['connections']
+        stats['packet_ins_per_connection'] = (
+            round(stats['web_packet_ins'] / connections, 3) if connections else None)
+        return Response(content_type='application/json',
+                      body=json.dumps(stats).encode('utf-8'))
+
+    @route('api', '/api/rates/{ip}', methods=['GET'], requirements={'ip': r'\d+\.\d+\.\d+\.\d+'})
+    def get_source_rates(self, req, ip, **kwargs):
+        """Windowed web request rates (1 s / 10 s / 60 s) for one source IP"""
+        try:
+            source_rate = self.controller.source_rates.get(ip_to_int(ip))
+            rates = source_rate.as_dict(time.time()) if source_rate else {
+                'rate_1s': 0, 'rate_10s': 0, 'rate_60s': 0, 'requests_60s': 0
+            }
+            rates['source_ip'] = ip
+            return Response(content_type='application/json',
+                          body=json.dumps(rates).encode('utf-8'))
+        except Exception as e:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
+                          status=400)
+
+    @route('api', '/api/flows/purge/source/{ip}', methods=['POST'], requirements={'ip': r'\d+\.\d+\.\d+\.\d+'})
+    def purge_source_flows(self, req, ip, **kwargs):
+        """Delete every flow installed for one source IP on all switches"""
+        try:
+            cookie, cookie_mask = source_filter(ip_to_int(ip))
+            switches = self.controller.purge_source(ip)
+            return self._purge_response(switches, cookie, cookie_mask, source_ip=ip)
+        except Exception as e:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'),
+                          status=400)
+
+    @route('api', '/api/flows/purge/kind/{kind}', methods=['POST'])
+    def purge_kind_flows(self, req, kind, **kwargs):
+        """Delete every flow of one kind (tree, l2, redirect, drop, ...) on all switches"""
+        if kind not in FLOW_KINDS:
+            return Response(content_type='application/json',
+                          body=json.dumps({'status': 'error',
+                                           'message': f"Unknown flow kind '{kind}'",
+                                           'kinds': sorted(FLOW_KINDS)}).encode('utf-8'),
+                          status=400)
+        cookie, cookie_mask = kind_filter(FLOW_KINDS[kind])
+        switches = self.controller.purge_kind(FLOW_KINDS[kind])
+        return self._purge_response(switches, cookie, cookie_mask, kind=kind)
+
+    def _purge_response(self, switches, cookie, cookie_mask, **selector):
+        result = {
+            'status': 'success',
+            'cookie': f'0x{cookie:016x}',
+            'cookie_mask': f'0x{cookie_mask:016x}',
+            'switches': switches
+        }
+        result.update(selector)
+        return Response(content_type='application/json',
+                      body=json.dumps(result).encode('utf-8'))
+
     @route('api', '/api/add-traffic', methods=['POST'])
     def add_traffic(self, req, **kwargs):
         """Add IP to traffic stats for testing purposes"""
@@ -640,27 +1917,36 @@ class HoneypotController(ControllerBase):
     def reset_stats(self, req, **kwargs):
         """Reset controller statistics for fresh demo session"""
         try:
-            # Clear suspicious and malicious IP lists
-            self.controller.suspicious_ips.clear()
-            self.controller.malicious_ips.clear()
+            with self.controller.classification_lock:
+                # Clear suspicious and malicious IP lists, detaching their meters
+                flagged = {ip: self.controller.get_classification(ip)
+                           for ip in self.controller.suspicious_ips | self.controller.malicious_ips}
+                for ip in flagged:
+                    self.controller._update_source_meter(ip, 'normal')
+                self.controller.suspicious_ips.clear()
+                self.controller.malicious_ips.clear()
+                
+                # Every redirect/service/police flow goes in one message per switch
+                self.controller.purge_flows(*per_source_filter())
+                
+                # Event stream subscribers drop the sources from their flagged lists
+                for ip, old_class in flagged.items():
+                    self.controller._publish_classification(ip, old_class, 'normal')
             
             # Keep baseline IPs in traffic_stats but clear other dynamic IPs
-            baseline_ips = {'10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4', '10.0.0.5', '10.0.0.6'}
-            current_time = time.time()
+            traffic_stats = self.controller.traffic_stats
+            baseline_stats = {ip: traffic_stats.get(ip) for ip in BASELINE_IPS if ip in traffic_stats}
+            traffic_stats.clear()
             
-            # Remove non-baseline traffic stats
-            self.controller.traffic_stats = {
-                ip: stats for ip, stats in self.controller.traffic_stats.items() 
-                if ip in baseline_ips
-            }
-            
-            # Reset baseline IP last_seen times to current time
-            for ip in baseline_ips:
-                if ip in self.controller.traffic_stats:
-                    self.controller.traffic_stats[ip]['last_seen'] = current_time
+            # Re-add baseline IPs with last_seen reset to current time
+            current_time = time.time()
+            for ip, stats in baseline_stats.items():
+                stats['last_seen'] = current_time
+                traffic_stats[ip] = stats
             
-            # Clear flow stats
+            # Clear flow stats and request rate windows
             self.controller.flow_stats.clear()
+            self.controller.source_rates.clear()
             
             self.controller.logger.info("🔄 Statistics reset for new demo session")
             
@@ -675,7 +1961,7 @@ class HoneypotController(ControllerBase):
                                   'flow_stats': True
                               },
                               'retained': {
-                                  'baseline_ips': list(baseline_ips)
+                                  'baseline_ips': list(BASELINE_IPS)
                               }
                           }).encode('utf-8'))
         except Exception as e:
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Server-sent event stream of controller activity for the dashboard.
+
+The controller publishes classification changes, per-source flow installs
+and a periodic counter snapshot here; GET /api/events streams them to every
+subscriber as text/event-stream. Each event is serialized once, whatever
+the number of subscribers, and publishing with nobody subscribed returns
+before building anything, so the PacketIn path pays nothing when no
+dashboard is open.
+
+Subscribers get a bounded queue each. A subscriber that stops reading
+loses events instead of growing controller memory; the periodic stats
+event lets it resynchronize its counters.
+"""
+
+import json
+
+from ryu.lib import hub
+
+
+class EventStream(object):
+    """Fan-out of controller events to streaming REST subscribers"""
+
+    def __init__(self, queue_size=1000, heartbeat=15.0):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+
+        self._subscribers = set()
+        self._next_id = 0
+
+        self.published = 0
+        self.dropped = 0
+        self.connections = 0
+
+    @property
+    def active(self):
+        """True while at least one subscriber is connected"""
+        return bool(self._subscribers)
+
+    def publish(self, event, data):
+        """Queue one event for every subscriber; no-op without subscribers"""
+        if not self._subscribers:
+            return
+        self._next_id += 1
+        message = (f"id: {self._next_id}\nevent: {event}\n"
+                   f"data: {json.dumps(data)}\n\n").encode('utf-8')
+        self.published += 1
+        for queue in self._subscribers:
+            if queue.qsize() >= self.queue_size:
+                self.dropped += 1
+                continue
+            queue.put(message)
+
+    def stream(self, initial=()):
+        """
+        Generator of SSE frames for one subscriber, starting with the
+        (event, data) pairs in initial; keep-alive comments are sent while
+        idle so proxies and clients notice dead connections
+        """
+        queue = hub.Queue()
+        self._subscribers.add(queue)
+        self.connections += 1
+        try:
+            yield b'retry: 1000\n\n'
+            for event, data in initial:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+            while True:
+                try:
+                    yield queue.get(timeout=self.heartbeat)
+                except hub.QueueEmpty:
+                    yield b': keep-alive\n\n'
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self):
+        return {
+            'subscribers': len(self._subscribers),
+            'connections': self.connections,
+            'published': self.published,
+            'dropped': self.dropped,
+        }
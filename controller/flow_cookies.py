@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Structured OpenFlow cookies for the flows the controller installs.
+
+Layout of the 64-bit cookie:
+
+    bits 56-63  flow kind (the 0x80 bit marks flows installed for one source)
+    bits 32-55  unused
+    bits  0-31  source IPv4 address the flow was installed for (0 if none)
+
+so a single OFPFC_DELETE with a cookie mask can purge every flow of one
+kind, of one source, or every per-source flow on a switch.
+"""
+
+KIND_SHIFT = 56
+KIND_MASK = 0xff << KIND_SHIFT
+SOURCE_MASK = 0xffffffff
+PER_SOURCE_MASK = 0x80 << KIND_SHIFT
+
+# Infrastructure flows
+KIND_TABLE_MISS = 0x01
+KIND_ROUTE = 0x02
+KIND_ARP = 0x03
+KIND_L2 = 0x04
+KIND_CLASSIFY = 0x05
+KIND_SERVER_REPLY = 0x06
+
+# Flows installed for a single source IP
+KIND_REDIRECT = 0x81
+KIND_SERVICE = 0x82
+KIND_POLICE = 0x83
+KIND_DROP = 0x84
+KIND_ALLOW = 0x85
+
+FLOW_KINDS = {
+    'table_miss': KIND_TABLE_MISS,
+    'route': KIND_ROUTE,
+    'arp': KIND_ARP,
+    'l2': KIND_L2,
+    'classify': KIND_CLASSIFY,
+    'server_reply': KIND_SERVER_REPLY,
+    'redirect': KIND_REDIRECT,
+    'service': KIND_SERVICE,
+    'police': KIND_POLICE,
+    'drop': KIND_DROP,
+    'allow': KIND_ALLOW,
+}
+KIND_NAMES = {value: name for name, value in FLOW_KINDS.items()}
+
+
+def make_cookie(kind, source_ip_n=0):
+    """Cookie for a flow of `kind` installed for the source with integer address source_ip_n"""
+    return (kind << KIND_SHIFT) | (source_ip_n & SOURCE_MASK)
+
+
+def cookie_kind(cookie):
+    return KIND_NAMES.get(cookie >> KIND_SHIFT, 'unknown')
+
+
+def cookie_source(cookie):
+    return cookie & SOURCE_MASK
+
+
+def kind_filter(kind):
+    """(cookie, cookie_mask) selecting every flow of one kind"""
+    return make_cookie(kind), KIND_MASK
+
+
+def source_filter(source_ip_n):
+    """(cookie, cookie_mask) selecting every flow installed for one source"""
+    return (0x80 << KIND_SHIFT) | source_ip_n, PER_SOURCE_MASK | SOURCE_MASK
+
+
+def per_source_filter():
+    """(cookie, cookie_mask) selecting every per-source flow"""
+    return PER_SOURCE_MASK, PER_SOURCE_MASK
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Fixed-capacity state table with LRU + idle-TTL eviction for controller
+per-flow and per-source statistics.
+
+Entries are kept in an OrderedDict in last-touched order. Because the TTL is
+measured from the last touch, that order is also the expiry order: the head
+of the dict is always the next entry to expire, so expiry pops from the head
+until it reaches a live entry (O(1) amortized, no periodic full scans), and
+capacity eviction pops the same head (least recently used).
+"""
+
+import time
+from collections import OrderedDict
+
+
+def flow_key(src_ip_n, dst_ip_n, dst_port):
+    """Pack an IPv4 src/dst pair and TCP destination port into one integer key"""
+    return (src_ip_n << 48) | (dst_ip_n << 16) | dst_port
+
+
+def unpack_flow_key(key):
+    """Reverse of flow_key: (src_ip_n, dst_ip_n, dst_port)"""
+    return key >> 48, (key >> 16) & 0xffffffff, key & 0xffff
+
+
+class FlowTable(object):
+    """Bounded key -> value table with LRU and idle-TTL eviction"""
+
+    def __init__(self, name, capacity, ttl, factory=dict):
+        self.name = name
+        self.capacity = capacity
+        self.ttl = ttl
+        self.factory = factory
+
+        # key -> [last_touch, value], oldest first
+        self._entries = OrderedDict()
+
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        self.inserts = 0
+
+    def touch(self, key, now=None):
+        """Return the value for key (creating it if needed) and mark it as used"""
+        if now is None:
+            now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] = now
+            self._entries.move_to_end(key)
+            self.expire(now)
+            return entry[1]
+
+        self.expire(now)
+        value = self.factory()
+        self._insert(key, value, now)
+        return value
+
+    def get(self, key, default=None):
+        """Look up a value without refreshing its LRU/TTL position"""
+        entry = self._entries.get(key)
+        return default if entry is None else entry[1]
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def expire(self, now=None):
+        """Drop every entry idle for longer than the TTL; returns how many went"""
+        if now is None:
+            now = time.time()
+
+        deadline = now - self.ttl
+        entries = self._entries
+        expired = 0
+        while entries:
+            if next(iter(entries.values()))[0] > deadline:
+                break
+            entries.popitem(last=False)
+            expired += 1
+
+        self.evicted_ttl += expired
+        return expired
+
+    def clear(self):
+        self._entries.clear()
+
+    def _insert(self, key, value, now):
+        if len(self._entries) >= self.capacity:
+            self._entries.popitem(last=False)
+            self.evicted_lru += 1
+        self._entries[key] = [now, value]
+        self.inserts += 1
+
+    def __setitem__(self, key, value):
+        now = time.time()
+        self._entries.pop(key, None)
+        self.expire(now)
+        self._insert(key, value, now)
+
+    def __getitem__(self, key):
+        return self._entries[key][1]
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def keys(self):
+        return list(self._entries)
+
+    def values(self):
+        return [entry[1] for entry in self._entries.values()]
+
+    def items(self):
+        return [(key, entry[1]) for key, entry in self._entries.items()]
+
+    def stats(self):
+        """Occupancy and eviction counters for the REST API"""
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'ttl_seconds': self.ttl,
+            'inserts': self.inserts,
+            'evicted_lru': self.evicted_lru,
+            'evicted_ttl': self.evicted_ttl
+        }
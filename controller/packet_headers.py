@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Header-only packet decoder for the controller PacketIn fast path.
+
+Reads the few Ethernet/ARP/IPv4/TCP fields the controller actually uses
+straight out of the raw frame at fixed offsets, instead of building a full
+ryu Packet and walking its protocol list several times per PacketIn.
+"""
+
+import socket
+import struct
+
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ether_types
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import tcp
+from ryu.lib.packet import arp
+
+IPPROTO_TCP = 6
+
+# Fixed header layouts (network byte order)
+_ETH_HDR = struct.Struct('!6s6sH')             # dst, src, ethertype
+_IPV4_HDR = struct.Struct('!BxxxxxHxBxx4s4s')  # ver/ihl, flags/frag, proto, src, dst
+_TCP_HDR = struct.Struct('!HHxxxxxxxxxB')      # src port, dst port, flags
+_ARP_HDR = struct.Struct('!xxxxxxH6s4s6s4s')   # opcode, sha, spa, tha, tpa
+
+_ETH_LEN = _ETH_HDR.size
+_IP_FRAG_OFFSET_MASK = 0x1fff
+
+_inet_ntoa = socket.inet_ntoa
+_from_bytes = int.from_bytes
+
+
+class PacketHeaders(object):
+    """Compact header record handed to every PacketIn handler"""
+
+    __slots__ = ('eth_dst', 'eth_src', 'ethertype',
+                 'ip_src', 'ip_dst', 'ip_src_n', 'ip_dst_n', 'ip_proto',
+                 'src_port', 'dst_port', 'tcp_flags', 'arp_opcode')
+
+    def __init__(self, eth_dst, eth_src, ethertype):
+        self.eth_dst = eth_dst
+        self.eth_src = eth_src
+        self.ethertype = ethertype
+        # IPv4 addresses (ARP sender/target addresses for ARP frames)
+        self.ip_src = None
+        self.ip_dst = None
+        self.ip_src_n = 0
+        self.ip_dst_n = 0
+        self.ip_proto = None
+        self.src_port = None
+        self.dst_port = None
+        self.tcp_flags = 0
+        self.arp_opcode = None
+
+    def __repr__(self):
+        return (f"PacketHeaders({self.eth_src}->{self.eth_dst} type=0x{self.ethertype:04x} "
+                f"ip={self.ip_src}->{self.ip_dst} proto={self.ip_proto} "
+                f"ports={self.src_port}->{self.dst_port})")
+
+
+def ip_to_int(ip):
+    """Dotted-quad IPv4 string to its 32-bit integer value"""
+    return _from_bytes(socket.inet_aton(ip), 'big')
+
+
+def int_to_ip(value):
+    """32-bit integer IPv4 address to its dotted-quad string"""
+    return socket.inet_ntoa(value.to_bytes(4, 'big'))
+
+
+def decode_headers(data):
+    """
+    Decode the controller-relevant headers of a raw Ethernet frame.
+    Returns None for frames the fast path does not handle (truncated,
+    VLAN-tagged, ...); callers fall back to the full ryu parser for those.
+    """
+    if len(data) < _ETH_LEN:
+        return None
+
+    eth_dst, eth_src, ethertype = _ETH_HDR.unpack_from(data, 0)
+    if ethertype == ether_types.ETH_TYPE_8021Q:
+        return None
+
+    hdr = PacketHeaders(eth_dst.hex(':'), eth_src.hex(':'), ethertype)
+
+    if ethertype == ether_types.ETH_TYPE_IP:
+        if len(data) < _ETH_LEN + _IPV4_HDR.size:
+            return None
+        ver_ihl, frag, proto, src, dst = _IPV4_HDR.unpack_from(data, _ETH_LEN)
+        if ver_ihl >> 4 != 4:
+            return None
+        hdr.ip_src = _inet_ntoa(src)
+        hdr.ip_dst = _inet_ntoa(dst)
+        hdr.ip_src_n = _from_bytes(src, 'big')
+        hdr.ip_dst_n = _from_bytes(dst, 'big')
+        hdr.ip_proto = proto
+
+        # Only the first fragment carries the TCP header
+        l4_offset = _ETH_LEN + (ver_ihl & 0x0f) * 4
+        if (proto == IPPROTO_TCP and not frag & _IP_FRAG_OFFSET_MASK
+                and len(data) >= l4_offset + _TCP_HDR.size):
+            hdr.src_port, hdr.dst_port, hdr.tcp_flags = _TCP_HDR.unpack_from(data, l4_offset)
+
+    elif ethertype == ether_types.ETH_TYPE_ARP:
+        if len(data) < _ETH_LEN + _ARP_HDR.size:
+            return None
+        opcode, _sha, spa, _tha, tpa = _ARP_HDR.unpack_from(data, _ETH_LEN)
+        hdr.arp_opcode = opcode
+        hdr.ip_src = _inet_ntoa(spa)
+        hdr.ip_dst = _inet_ntoa(tpa)
+        hdr.ip_src_n = _from_bytes(spa, 'big')
+        hdr.ip_dst_n = _from_bytes(tpa, 'big')
+
+    return hdr
+
+
+def headers_from_packet(pkt):
+    """Build the same header record from a fully parsed ryu Packet (slow path)"""
+    eth = pkt.get_protocol(ethernet.ethernet)
+    hdr = PacketHeaders(eth.dst, eth.src, eth.ethertype)
+
+    ip_pkt = pkt.get_protocol(ipv4.ipv4)
+    arp_pkt = pkt.get_protocol(arp.arp)
+    if ip_pkt is not None:
+        hdr.ip_src = ip_pkt.src
+        hdr.ip_dst = ip_pkt.dst
+        hdr.ip_proto = ip_pkt.proto
+        tcp_pkt = pkt.get_protocol(tcp.tcp)
+        if tcp_pkt is not None:
+            hdr.src_port = tcp_pkt.src_port
+            hdr.dst_port = tcp_pkt.dst_port
+            hdr.tcp_flags = tcp_pkt.bits
+    elif arp_pkt is not None:
+        hdr.arp_opcode = arp_pkt.opcode
+        hdr.ip_src = arp_pkt.src_ip
+        hdr.ip_dst = arp_pkt.dst_ip
+
+    if hdr.ip_src is not None:
+        hdr.ip_src_n = ip_to_int(hdr.ip_src)
+        hdr.ip_dst_n = ip_to_int(hdr.ip_dst)
+    return hdr
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Replay pcap captures into the controller's PacketIn handler
+
+Usage:
+    python3 pcap_replay.py CAPTURE.pcap [CAPTURE.pcap ...] [--dpid 4] [--in-port 3]
+                           [--speed 0] [--manifest topology.json] [--csv out.csv]
+
+Each Ethernet frame is delivered to HoneypotSDNController as a PacketIn from
+the chosen switch and port, from the pipeline table that would have punted
+it: web SYNs from the classification table, every other frame as a
+forwarding table miss. With syn_only_packet_in (the default) the rest of a
+web connection never reaches the controller, so those frames are skipped.
+Frames that later packets would hit installed flows for are still
+delivered, so the numbers are an upper bound on controller work.
+
+--speed 0 replays as fast as possible; any other value replays in capture
+time scaled by that factor (1 = real time, 10 = ten times faster). The
+controller's rate thresholds use wall-clock time, so faster replays flag
+sources sooner than the capture itself would.
+
+Reports classification decisions, redirect flows installed and per-packet
+handler time. The controller runs against in-memory switches, no Mininet
+needed.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from collections import Counter
+
+from ryu.lib import pcaplib
+
+from packet_headers import IPPROTO_TCP, decode_headers
+from benchmark import build_layout, packet_in, percentile, start_controller
+from layouts import load_manifest
+
+TCP_SYN = 0x02
+TCP_ACK = 0x10
+LINKTYPE_ETHERNET = 1
+
+
+def read_frames(path):
+    """(timestamp, frame) for every packet of a pcap file, using ryu's pcaplib headers"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    file_header, byteorder = pcaplib.PcapFileHdr.parser(data)
+    if file_header.network != LINKTYPE_ETHERNET:
+        raise ValueError(f"{path}: link type {file_header.network} is not Ethernet")
+
+    # pcaplib.Reader re-slices the rest of the file for every packet, which
+    # is quadratic on large captures; walk a memoryview instead
+    body = memoryview(data)[pcaplib.PcapFileHdr.FILE_HDR_SIZE:]
+    offset = 0
+    while offset + pcaplib.PcapPktHdr.PKT_HDR_SIZE <= len(body):
+        header, frame = pcaplib.PcapPktHdr.parser(body[offset:], byteorder)
+        offset += pcaplib.PcapPktHdr.PKT_HDR_SIZE + header.incl_len
+        yield header.ts_sec + header.ts_usec / 1e6, bytes(frame)
+
+
+def punt_table(ctl, hdr, syn_only):
+    """Pipeline table a frame arriving from a host would reach the controller from, or None"""
+    if hdr is not None and hdr.ip_proto == IPPROTO_TCP and hdr.dst_port in ctl.WEB_PORTS:
+        if not syn_only or hdr.tcp_flags & (TCP_SYN | TCP_ACK) == TCP_SYN:
+            return ctl.TABLE_SERVICE
+        return None
+    return ctl.TABLE_FORWARD
+
+
+def replay(app, datapath, in_port, paths, speed, csv_writer=None):
+    import controller as ctl
+
+    syn_only = ctl.CONF.honeypot.syn_only_packet_in
+    latencies = []
+    decisions = []
+    skipped = 0
+    first_ts = None
+    start = time.perf_counter()
+
+    for path in paths:
+        for ts, frame in read_frames(path):
+            hdr = decode_headers(frame)
+            table_id = punt_table(ctl, hdr, syn_only)
+            if table_id is None:
+                skipped += 1
+                continue
+
+            # Capture time scaled by speed, relative to the first packet
+            if first_ts is None:
+                first_ts = ts
+            if speed:
+                delay = start + (ts - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            src_ip = hdr.ip_src if hdr is not None else None
+            before = app.get_classification(src_ip) if src_ip else None
+            handled = time.perf_counter()
+            packet_in(app, datapath, in_port, frame, table_id)
+            latency = time.perf_counter() - handled
+            latencies.append(latency)
+
+            after = app.get_classification(src_ip) if src_ip else None
+            if after != before:
+                decisions.append((ts - first_ts, src_ip, before, after))
+            if csv_writer is not None:
+                csv_writer.writerow([len(latencies), f'{ts:.6f}', src_ip or '',
+                                     hdr.ip_dst if hdr is not None else '', table_id,
+                                     f'{latency * 1e6:.1f}', after or ''])
+
+    return latencies, decisions, skipped, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay pcap captures into the SDN honeypot controller')
+    parser.add_argument('pcaps', nargs='+', help='pcap files (Ethernet link type)')
+    parser.add_argument('--dpid', type=int, default=4,
+                        help='Switch the frames arrive at (default: s4, where h6 attaches)')
+    parser.add_argument('--in-port', type=int, default=3, help='Switch port the frames arrive on (default: 3)')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Replay speed factor over capture time, 0 = as fast as possible (default)')
+    parser.add_argument('--manifest', help='Topology manifest from topology.py (default: depth-3 tree)')
+    parser.add_argument('--csv', help='Write per-packet timings and classifications to this CSV file')
+    args = parser.parse_args()
+
+    layout = load_manifest(args.manifest) if args.manifest else build_layout()
+    app, datapaths = start_controller(layout)
+    if args.dpid not in datapaths:
+        print(f"Switch s{args.dpid} is not in the topology")
+        sys.exit(1)
+    datapath = datapaths[args.dpid]
+    for dp in datapaths.values():
+        dp.sent.clear()
+        dp.added.clear()
+
+    csv_file = open(args.csv, 'w', newline='') if args.csv else None
+    csv_writer = None
+    if csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(['packet', 'timestamp', 'src', 'dst', 'table', 'latency_us', 'classification'])
+    try:
+        latencies, decisions, skipped, elapsed = replay(app, datapath, args.in_port, args.pcaps,
+                                                        args.speed, csv_writer)
+    except (OSError, ValueError) as e:
+        print(f"Replay failed: {e}")
+        sys.exit(1)
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    if not latencies:
+        print(f"No frames delivered ({skipped} skipped)")
+        return
+
+    pace = f"{args.speed:g}x capture time" if args.speed else "as fast as possible"
+    print(f"Replayed {len(latencies)} PacketIns into s{args.dpid} port {args.in_port}, {pace} "
+          f"({skipped} frames handled by switch flows skipped)")
+
+    print(f"\n  Classification decisions ({len(decisions)}):")
+    for offset, ip, before, after in decisions:
+        print(f"    +{offset:9.3f}s  {ip:<16}{before} -> {after}")
+    final = Counter(app.get_classification(ip) for ip in app.traffic_stats)
+    print("  Sources by final classification: " +
+          ', '.join(f"{name} {final[name]}" for name in ('normal', 'suspicious', 'malicious')))
+
+    added = Counter()
+    sent = Counter()
+    for dp in datapaths.values():
+        added.update(dp.added)
+        sent.update(dp.sent)
+    print(f"\n  Redirect flows installed : {added['redirect']}")
+    print(f"  Drop flows installed     : {added['drop']}")
+    print(f"  FlowMods sent            : {sent['OFPFlowMod']}")
+    print(f"  PacketOuts sent          : {sent['OFPPacketOut']}")
+
+    ordered = sorted(latencies)
+    print(f"\n  Per-packet handler time  : mean {sum(ordered) / len(ordered) * 1e6:.1f} us, "
+          f"p50 {percentile(ordered, 0.5) * 1e6:.1f} us, p99 {percentile(ordered, 0.99) * 1e6:.1f} us, "
+          f"max {ordered[-1] * 1e6:.1f} us")
+    print(f"  Throughput               : {len(latencies) / elapsed:,.0f} PacketIns/sec ({elapsed:.2f}s)")
+    if args.csv:
+        print(f"  Per-packet results written to {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
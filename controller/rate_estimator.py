@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Sliding-window request rate estimator for per-source traffic classification.
+
+Each source keeps a fixed ring of 60 per-second buckets plus running sums for
+the 10 s and 60 s windows, so memory per source is constant and recording an
+event or reading a rate is O(1) amortized (advancing the ring touches at most
+60 buckets, once per elapsed second).
+"""
+
+from array import array
+
+RING_SECONDS = 60
+SHORT_WINDOW = 10
+
+
+class SourceRate(object):
+    """Per-second bucket ring for one source"""
+
+    __slots__ = ('buckets', 'current_second', 'sum_10s', 'sum_60s')
+
+    def __init__(self):
+        self.buckets = array('I', bytes(4 * RING_SECONDS))
+        self.current_second = 0
+        self.sum_10s = 0
+        self.sum_60s = 0
+
+    def _advance(self, second):
+        """Move the ring forward to `second`, dropping buckets that left the windows"""
+        elapsed = second - self.current_second
+        if elapsed <= 0:
+            return
+
+        if elapsed >= RING_SECONDS:
+            self.buckets = array('I', bytes(4 * RING_SECONDS))
+            self.sum_10s = 0
+            self.sum_60s = 0
+        else:
+            buckets = self.buckets
+            for sec in range(self.current_second + 1, second + 1):
+                self.sum_10s -= buckets[(sec - SHORT_WINDOW) % RING_SECONDS]
+                idx = sec % RING_SECONDS
+                self.sum_60s -= buckets[idx]
+                buckets[idx] = 0
+
+        self.current_second = second
+
+    def record(self, now, count=1):
+        """Count `count` events at time `now`"""
+        second = int(now)
+        self._advance(second)
+        self.buckets[second % RING_SECONDS] += count
+        self.sum_10s += count
+        self.sum_60s += count
+
+    def rates(self, now):
+        """Events per second over the last 1 s, 10 s and 60 s"""
+        second = int(now)
+        self._advance(second)
+        return (self.buckets[second % RING_SECONDS],
+                self.sum_10s / SHORT_WINDOW,
+                self.sum_60s / RING_SECONDS)
+
+    def as_dict(self, now):
+        rate_1s, rate_10s, rate_60s = self.rates(now)
+        return {
+            'rate_1s': rate_1s,
+            'rate_10s': round(rate_10s, 3),
+            'rate_60s': round(rate_60s, 3),
+            'requests_60s': self.sum_60s
+        }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Topology-derived routing state for the controller.
+
+Switches and links come from ryu's topology API (ryu-manager --observe-links)
+and are kept in a networkx DiGraph whose edges carry the output port. For
+every destination switch a BFS over the reversed graph gives each switch its
+next-hop port, so a route lookup on the PacketIn path is two dict reads.
+
+Link and switch events only mark the destinations whose shortest-path trees
+they can change; refresh() recomputes just those, which keeps discovery of
+large topologies (one event per link direction) linear per event instead of
+a full all-pairs rebuild each time. A spanning tree of the bidirectional
+links decides which ports flooded traffic may use, so floods stay loop free
+on fat-tree / leaf-spine fabrics.
+"""
+
+from collections import deque
+
+import networkx as nx
+
+
+class RouteTable(object):
+    """Next-hop ports between switches and the attachment points of known hosts"""
+
+    def __init__(self):
+        # dpid -> dpid edges with attributes 'port' (output port on the edge's
+        # source) and 'dst_port' (where it arrives on the edge's target)
+        self.graph = nx.DiGraph()
+        self.switch_ports = {}
+
+        # dpid -> {port: number of link directions using it}
+        self._link_ports = {}
+
+        # ip -> (dpid, port) of hosts we route to
+        self.hosts = {}
+
+        # destination dpid -> {dpid: output port} / {dpid: hop count}
+        self._next_hop = {}
+        self._dist = {}
+        self._dirty = set()
+
+        # dpid -> ports traffic may be flooded to; None until recomputed
+        self._flood_ports = None
+
+    # Switches and ports
+
+    def add_switch(self, dpid, ports):
+        self.graph.add_node(dpid)
+        self.switch_ports[dpid] = set(ports)
+        self._dirty.add(dpid)
+        self._flood_ports = None
+
+    def remove_switch(self, dpid):
+        if dpid not in self.graph:
+            return
+        # Every tree that crossed this switch may change
+        self._dirty.update(dst for dst, hops in self._next_hop.items() if dpid in hops)
+        for neighbor in list(self.graph.successors(dpid)):
+            self.remove_link(dpid, neighbor)
+        for neighbor in list(self.graph.predecessors(dpid)):
+            self.remove_link(neighbor, dpid)
+        self.graph.remove_node(dpid)
+        self.switch_ports.pop(dpid, None)
+        self._link_ports.pop(dpid, None)
+        self._next_hop.pop(dpid, None)
+        self._dist.pop(dpid, None)
+        self._dirty.discard(dpid)
+        self.hosts = {ip: loc for ip, loc in self.hosts.items() if loc[0] != dpid}
+        self._flood_ports = None
+
+    def add_port(self, dpid, port_no):
+        if dpid in self.switch_ports:
+            self.switch_ports[dpid].add(port_no)
+            self._flood_ports = None
+
+    def remove_port(self, dpid, port_no):
+        if dpid not in self.switch_ports:
+            return
+        self.switch_ports[dpid].discard(port_no)
+        self.hosts = {ip: loc for ip, loc in self.hosts.items() if loc != (dpid, port_no)}
+        if dpid in self.graph:
+            for neighbor, attrs in list(self.graph[dpid].items()):
+                if attrs['port'] == port_no:
+                    self.remove_link(dpid, neighbor)
+            for neighbor in list(self.graph.predecessors(dpid)):
+                if self.graph[neighbor][dpid]['dst_port'] == port_no:
+                    self.remove_link(neighbor, dpid)
+        self._flood_ports = None
+
+    # Links (one call per direction, as ryu reports them)
+
+    def add_link(self, src_dpid, src_port, dst_dpid, dst_port):
+        """Directed link src -> dst leaving src on src_port"""
+        if self.graph.has_edge(src_dpid, dst_dpid):
+            attrs = self.graph[src_dpid][dst_dpid]
+            if (attrs['port'], attrs['dst_port']) == (src_port, dst_port):
+                return
+            self.remove_link(src_dpid, dst_dpid)
+        self.graph.add_edge(src_dpid, dst_dpid, port=src_port, dst_port=dst_port)
+        self._ref_link_port(src_dpid, src_port, 1)
+        self._ref_link_port(dst_dpid, dst_port, 1)
+
+        # A host cannot sit behind an inter-switch port
+        self.hosts = {ip: loc for ip, loc in self.hosts.items()
+                      if loc not in ((src_dpid, src_port), (dst_dpid, dst_port))}
+
+        # Destinations that src now reaches in fewer hops through dst
+        for dst, dist in self._dist.items():
+            via = dist.get(dst_dpid)
+            if via is not None and via + 1 < dist.get(src_dpid, float('inf')):
+                self._dirty.add(dst)
+        self._flood_ports = None
+
+    def remove_link(self, src_dpid, dst_dpid):
+        if not self.graph.has_edge(src_dpid, dst_dpid):
+            return
+        attrs = self.graph[src_dpid][dst_dpid]
+        port = attrs['port']
+        self.graph.remove_edge(src_dpid, dst_dpid)
+        self._ref_link_port(src_dpid, port, -1)
+        self._ref_link_port(dst_dpid, attrs['dst_port'], -1)
+
+        # Destinations whose tree used this link
+        for dst, hops in self._next_hop.items():
+            if hops.get(src_dpid) == port:
+                self._dirty.add(dst)
+        self._flood_ports = None
+
+    def _ref_link_port(self, dpid, port_no, delta):
+        refs = self._link_ports.setdefault(dpid, {})
+        count = refs.get(port_no, 0) + delta
+        if count > 0:
+            refs[port_no] = count
+        else:
+            refs.pop(port_no, None)
+
+    def link_ports(self, dpid):
+        """Ports of dpid that connect to another switch"""
+        return set(self._link_ports.get(dpid, ()))
+
+    def edge_ports(self, dpid):
+        """Ports of dpid that face hosts"""
+        return self.switch_ports.get(dpid, set()) - self.link_ports(dpid)
+
+    def is_edge_port(self, dpid, port_no):
+        return (port_no in self.switch_ports.get(dpid, ())
+                and port_no not in self._link_ports.get(dpid, ()))
+
+    # Hosts
+
+    def learn_host(self, ip, dpid, port_no):
+        """Record where a host attaches; True if its location changed"""
+        location = (dpid, port_no)
+        if self.hosts.get(ip) == location:
+            return False
+        self.hosts[ip] = location
+        return True
+
+    def host_location(self, ip):
+        return self.hosts.get(ip)
+
+    # Lookups (O(1), used on the PacketIn path)
+
+    def next_hop(self, dpid, dst_dpid):
+        """Output port on dpid toward switch dst_dpid, or None if unreachable"""
+        hops = self._next_hop.get(dst_dpid)
+        return hops.get(dpid) if hops else None
+
+    def port_toward(self, dpid, ip):
+        """Output port on dpid toward host ip, or None if unknown or unreachable"""
+        location = self.hosts.get(ip)
+        if location is None:
+            return None
+        if location[0] == dpid:
+            return location[1]
+        return self.next_hop(dpid, location[0])
+
+    def flood_ports(self, dpid):
+        """Host ports plus spanning-tree links of dpid, or None for an unknown switch"""
+        if dpid not in self.switch_ports:
+            return None
+        if self._flood_ports is None:
+            self._flood_ports = self._compute_flood_ports()
+        return self._flood_ports.get(dpid)
+
+    # Recomputation
+
+    def refresh(self):
+        """Recompute the next-hop tables of changed destinations; returns them"""
+        changed = set(self._dirty)
+        for dst in changed:
+            if dst in self.graph:
+                self._compute(dst)
+        self._dirty.clear()
+        return changed
+
+    def _compute(self, dst):
+        """BFS toward dst over incoming links: hop counts and next-hop ports"""
+        graph = self.graph
+        dist = {dst: 0}
+        hops = {}
+        queue = deque([dst])
+        while queue:
+            node = queue.popleft()
+            for prev in sorted(graph.predecessors(node)):
+                if prev not in dist:
+                    dist[prev] = dist[node] + 1
+                    hops[prev] = graph[prev][node]['port']
+                    queue.append(prev)
+        self._dist[dst] = dist
+        self._next_hop[dst] = hops
+
+    def _compute_flood_ports(self):
+        # Only links seen in both directions are usable for flooding
+        undirected = self.graph.to_undirected(reciprocal=True)
+        tree_ports = {dpid: set() for dpid in self.switch_ports}
+        for u, v in nx.minimum_spanning_edges(undirected, data=False):
+            tree_ports[u].add(self.graph[u][v]['port'])
+            tree_ports[v].add(self.graph[v][u]['port'])
+
+        flood = {}
+        for dpid, ports in self.switch_ports.items():
+            blocked = self.link_ports(dpid) - tree_ports[dpid]
+            flood[dpid] = frozenset(ports - blocked)
+        return flood
+
+    def stats(self):
+        return {
+            'switches': self.graph.number_of_nodes(),
+            'links': self.graph.number_of_edges(),
+            'hosts': {ip: {'switch': f's{dpid}', 'port': port}
+                      for ip, (dpid, port) in self.hosts.items()},
+            'pending_destinations': len(self._dirty)
+        }
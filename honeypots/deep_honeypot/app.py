@@ -1,15 +1,26 @@
 #!/usr/bin/env python3
 
-from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, send_file
+# Served by eventlet's green-thread WSGI server: sockets and sleeps must be
+# cooperative before anything else opens them
+import eventlet
+eventlet.monkey_patch()
+
+import eventlet.wsgi
+from flask import Flask, Response, request, render_template_string, redirect, url_for, session, jsonify
 import sys
 import os
-import json
 import datetime
-import io
+import resource
 import time
-import requests
 from collections import defaultdict
 
+from fake_files import FakeFileGenerator
+from tarpit import Tarpit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../common'))
+from controller_notifier import ControllerNotifier
+from log_writer import AsyncLogWriter
+
 app = Flask(__name__)
 app.secret_key = 'deep_honeypot_secret_key_666'
 
@@ -17,6 +28,10 @@ app.secret_key = 'deep_honeypot_secret_key_666'
 LOG_DIR = os.path.join(os.path.dirname(__file__), '../../logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Activity log, written in batches by a background thread; entries carry
+# every request header, so serialization happens there too
+activity_log = AsyncLogWriter(os.path.join(LOG_DIR, 'deep_honeypot.log'))
+
 # Track attacker sessions
 attacker_sessions = defaultdict(dict)
 
@@ -38,38 +53,48 @@ def log_extensive(action, source_ip, data=None):
         'data': data
     }
     
-    log_file = os.path.join(LOG_DIR, 'deep_honeypot.log')
-    with open(log_file, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    activity_log.write(log_entry)
+
+# Classification updates go to the controller from a background thread,
+# coalesced per source IP and batched over one keep-alive connection
+controller_notifier = ControllerNotifier(
+    [
+        'http://127.0.0.1:8080',       # Primary - localhost controller
+        'http://192.168.1.100:8080',   # Host system IP fallback
+        'http://10.0.0.1:8080',        # Default gateway fallback
+    ],
+    honeypot_type='deep'
+)
 
 def send_to_controller(classification, source_ip, risk_score=1.0, ml_prediction=1):
-    """Send classification result to SDN controller"""
+    """Queue classification result for the SDN controller (never blocks the request)"""
     # Deep honeypot always classifies as malicious since users shouldn't reach here
-    controller_ips = [
-        '127.0.0.1',       # Primary - localhost controller
-        '192.168.1.100',   # Host system IP fallback
-        '10.0.0.1',        # Default gateway fallback
-    ]
-    
-    for host_ip in controller_ips:
-        try:
-            controller_url = f'http://{host_ip}:8080/honeypot/classification'
-            data = {
-                'source_ip': source_ip,
-                'classification': classification,
-                'risk_score': risk_score * 100,  # Convert to 0-100 scale
-                'honeypot_type': 'deep',
-                'ml_prediction': ml_prediction,  # Binary: 1=malicious, 0=benign
-                'timestamp': datetime.datetime.now().isoformat()
-            }
-            
-            response = requests.post(controller_url, json=data, timeout=1)
-            if response.status_code == 200:
-                return True
-        except Exception as e:
-            continue
-    
-    return False
+    return controller_notifier.notify(classification, source_ip, risk_score, ml_prediction)
+
+# Attackers are slowed down more the longer they keep at it: past 10
+# requests they get the 'sticky' profile, past 100 the 'tarpit' one
+tarpit = Tarpit(default='realistic', escalation=[(10, 'sticky'), (100, 'tarpit')])
+
+# Sizes the fake admin pages advertise; other files get a seeded size
+FAKE_FILE_SIZES = {
+    'passwords.txt': 2 * 1024,
+    'customer_data.xlsx': 450 * 1024,
+    'financial_report.pdf': 1200 * 1024,
+    'backup_keys.zip': 15 * 1024,
+    'db_backup.sql': int(2.4 * 1024 ** 3),
+}
+
+# Downloads are generated while they are sent, seeded per file and session
+fake_files = FakeFileGenerator(secret=app.secret_key, sizes=FAKE_FILE_SIZES)
+
+# Simultaneous connections the server holds open (green threads)
+MAX_CONNECTIONS = 50000
+
+def tarpit_response(profile, body, **kwargs):
+    """Response whose body is dripped to the client at the profile's pace"""
+    # eventlet's WSGI server would otherwise gather small chunks into 4 KB writes
+    request.environ['eventlet.minimum_write_chunk_size'] = 0
+    return Response(tarpit.drip(profile, body), **kwargs)
 
 # HTML Templates
 LOGIN_TEMPLATE = '''
@@ -253,14 +278,16 @@ def login():
         # Send to controller - deep honeypot always indicates malicious activity
         send_to_controller('malicious', client_ip, 1.0, 1)
         
-        # Always "succeed" after a delay to seem realistic
-        time.sleep(1)  # Simulate processing time
+        # Always "succeed" after a delay to seem realistic; the delay holds
+        # a green thread only and grows for persistent attackers
+        tarpit.login_delay(client_ip)
         return redirect(url_for('admin'))
     
     log_extensive('page_visit', client_ip)
     # Even visiting deep honeypot is suspicious
     send_to_controller('suspicious', client_ip, 0.8, 1)
-    return render_template_string(LOGIN_TEMPLATE)
+    profile = tarpit.page_delay(client_ip)
+    return tarpit_response(profile, render_template_string(LOGIN_TEMPLATE), mimetype='text/html')
 
 @app.route('/admin')
 def admin():
@@ -276,9 +303,11 @@ def admin():
     # Admin access in deep honeypot is highly malicious
     send_to_controller('malicious', client_ip, 1.0, 1)
     
-    return render_template_string(FAKE_ADMIN_TEMPLATE,
-                                username=session['username'],
-                                last_login="2024-01-15 14:30:22")
+    profile = tarpit.page_delay(client_ip)
+    return tarpit_response(profile, render_template_string(FAKE_ADMIN_TEMPLATE,
+                                                           username=session['username'],
+                                                           last_login="2024-01-15 14:30:22"),
+                           mimetype='text/html')
 
 @app.route('/admin/files')
 def files():
@@ -293,7 +322,8 @@ def files():
     # File access attempt is malicious
     send_to_controller('malicious', client_ip, 1.0, 1)
     
-    return render_template_string(FAKE_FILE_MANAGER)
+    profile = tarpit.page_delay(client_ip)
+    return tarpit_response(profile, render_template_string(FAKE_FILE_MANAGER), mimetype='text/html')
 
 @app.route('/admin/download/<filename>')
 def download_fake_file(filename):
@@ -309,24 +339,14 @@ def download_fake_file(filename):
     # File download attempt is extremely malicious
     send_to_controller('malicious', client_ip, 1.0, 1)
     
-    # Generate fake file content
-    fake_content = f"""
-    CONFIDENTIAL - {filename}
-    Generated on: {datetime.datetime.now()}
-    
-    This appears to be sensitive data but is actually a honeypot.
-    The attacker has attempted to download: {filename}
-    
-    [Fake data content would go here...]
-    """
-    
-    # Return fake file
-    return send_file(
-        io.BytesIO(fake_content.encode()),
-        as_attachment=True,
-        download_name=filename,
-        mimetype='text/plain'
-    )
+    # Stream a generated file at the attacker's profile download rate
+    profile = tarpit.page_delay(client_ip)
+    fake = fake_files.artifact(filename, session.get('session_id') or client_ip)
+    request.environ['eventlet.minimum_write_chunk_size'] = 0
+    response = Response(tarpit.throttle(profile, fake_files.stream(fake)), mimetype=fake.mimetype)
+    response.headers['Content-Length'] = str(fake.size)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
 
 @app.route('/admin/<path:path>')
 def fake_admin_pages(path):
@@ -351,7 +371,8 @@ def fake_admin_pages(path):
     </body>
     </html>
     '''
-    return fake_page
+    profile = tarpit.page_delay(client_ip)
+    return tarpit_response(profile, fake_page, mimetype='text/html')
 
 @app.route('/logout')
 def logout():
@@ -371,7 +392,33 @@ def health():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'server': 'deep_honeypot'})
 
+@app.route('/api/stats')
+def stats():
+    """Tarpit, fake download, controller update and activity log counters"""
+    return jsonify({
+        'tarpit': tarpit.stats(),
+        'fake_files': fake_files.stats(),
+        'active_sessions': len(attacker_sessions),
+        'controller_notifier': controller_notifier.stats(),
+        'activity_log': activity_log.stats()
+    })
+
+def raise_open_file_limit(connections):
+    """Allow one file descriptor per held connection, as far as the hard limit permits"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = connections + 1024
+    if hard != resource.RLIM_INFINITY:
+        wanted = min(wanted, hard)
+    if wanted > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+        except (ValueError, OSError) as e:
+            print(f"Could not raise open file limit above {soft}: {e}")
+
 if __name__ == '__main__':
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8005
     print(f"Starting Deep Honeypot on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
+    raise_open_file_limit(MAX_CONNECTIONS)
+    # Requests are recorded in deep_honeypot.log; skip per-request access lines
+    eventlet.wsgi.server(eventlet.listen(('0.0.0.0', port), backlog=4096), app,
+                         max_size=MAX_CONNECTIONS, log_output=False) 
\ No newline at end of file
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Cooperative tarpit for the deep honeypot.
+
+Delays and slow-drip responses use eventlet.sleep, so under the eventlet
+WSGI server a stalled attacker costs one green thread (a few KB) instead of
+an OS worker thread, and one process can hold tens of thousands of
+attacker connections open.
+
+Each source IP gets a latency profile. Profiles escalate with the number
+of requests the source has made to the honeypot, and CIDR overrides can
+pin a network to a profile. Within a profile, delays grow by the profile's
+backoff factor with every further request, up to its max_delay.
+Downloads are throttled to the profile's download_rate in small pieces.
+"""
+
+import ipaddress
+import random
+import time
+from collections import OrderedDict
+
+import eventlet
+
+
+class LatencyProfile(object):
+    """How long to stall a source and how slowly to drip response bodies to it"""
+
+    def __init__(self, name, login_delay=1.0, page_delay=0.0, jitter=0.0, backoff=1.0,
+                 max_delay=30.0, drip_bytes=0, drip_interval=1.0, download_rate=0):
+        self.name = name
+        self.login_delay = login_delay
+        self.page_delay = page_delay
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.drip_bytes = drip_bytes
+        self.drip_interval = drip_interval
+        # Bytes per second for file downloads; 0 for unthrottled
+        self.download_rate = download_rate
+
+    def delay(self, base, step):
+        """Delay for the step-th request of a source in this profile"""
+        if base <= 0:
+            return 0.0
+        delay = min(self.max_delay, base * self.backoff ** step)
+        return delay + random.uniform(0, self.jitter)
+
+
+# Built-in profiles: 'realistic' keeps the original one second login delay
+PROFILES = {
+    'realistic': LatencyProfile('realistic', login_delay=1.0, jitter=0.2,
+                                download_rate=1024 * 1024),
+    'sticky': LatencyProfile('sticky', login_delay=2.0, page_delay=0.5, jitter=0.5,
+                             backoff=1.5, max_delay=30.0, drip_bytes=64, drip_interval=0.5,
+                             download_rate=64 * 1024),
+    'tarpit': LatencyProfile('tarpit', login_delay=10.0, page_delay=5.0, jitter=1.0,
+                             backoff=2.0, max_delay=120.0, drip_bytes=1, drip_interval=2.0,
+                             download_rate=256),
+}
+
+
+# Throttled downloads send one piece per THROTTLE_INTERVAL seconds
+THROTTLE_INTERVAL = 0.25
+
+
+class Tarpit(object):
+    """Per-source latency profiles and cooperative delays"""
+
+    def __init__(self, profiles=PROFILES, default='realistic', escalation=(), overrides=None,
+                 max_sources=100000):
+        self.profiles = dict(profiles)
+        self.default = default
+        # (request count, profile name) pairs, lowest count first
+        self.escalation = sorted(escalation)
+        self.overrides = [(ipaddress.ip_network(cidr), name)
+                          for cidr, name in (overrides or {}).items()]
+        self.max_sources = max_sources
+
+        # source ip -> requests seen, least recently active first
+        self._requests = OrderedDict()
+
+        self.active = 0
+        self.peak_active = 0
+        self.counters = {'delays': 0, 'drips': 0, 'delayed_seconds': 0.0, 'dripped_bytes': 0,
+                         'throttled': 0, 'throttled_bytes': 0}
+
+    def record(self, source_ip):
+        """Count one request from source_ip; returns (profile, step within the profile)"""
+        count = self._requests.pop(source_ip, 0) + 1
+        self._requests[source_ip] = count
+        if len(self._requests) > self.max_sources:
+            self._requests.popitem(last=False)
+        return self.profile_for(source_ip, count)
+
+    def profile_for(self, source_ip, count):
+        for network, name in self.overrides:
+            if ipaddress.ip_address(source_ip) in network:
+                return self.profiles[name], count - 1
+        name, start = self.default, 0
+        for threshold, escalated in self.escalation:
+            if count >= threshold:
+                name, start = escalated, threshold
+        return self.profiles[name], count - max(start, 1)
+
+    def login_delay(self, source_ip):
+        profile, step = self.record(source_ip)
+        self._sleep(profile.delay(profile.login_delay, step))
+        return profile
+
+    def page_delay(self, source_ip):
+        profile, step = self.record(source_ip)
+        self._sleep(profile.delay(profile.page_delay, step))
+        return profile
+
+    def drip(self, profile, body):
+        """Body as an iterator of profile.drip_bytes chunks, one per drip_interval"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if not profile.drip_bytes:
+            yield body
+            return
+        self.counters['drips'] += 1
+        self._enter()
+        try:
+            for offset in range(0, len(body), profile.drip_bytes):
+                if offset:
+                    eventlet.sleep(profile.drip_interval)
+                chunk = body[offset:offset + profile.drip_bytes]
+                self.counters['dripped_bytes'] += len(chunk)
+                yield chunk
+        finally:
+            self._leave()
+
+    def throttle(self, profile, chunks):
+        """Pass an iterator of byte chunks through at profile.download_rate"""
+        rate = profile.download_rate
+        if not rate:
+            yield from chunks
+            return
+        piece = max(1, int(rate * THROTTLE_INTERVAL))
+        self.counters['throttled'] += 1
+        self._enter()
+        try:
+            for chunk in chunks:
+                view = memoryview(chunk)
+                for offset in range(0, len(view), piece):
+                    part = view[offset:offset + piece]
+                    self.counters['throttled_bytes'] += len(part)
+                    yield part.tobytes()
+                    eventlet.sleep(len(part) / rate)
+        finally:
+            self._leave()
+
+    def stats(self):
+        return dict(self.counters, delayed_seconds=round(self.counters['delayed_seconds'], 3),
+                    active=self.active, peak_active=self.peak_active,
+                    tracked_sources=len(self._requests), default_profile=self.default)
+
+    def _sleep(self, seconds):
+        if seconds <= 0:
+            return
+        self.counters['delays'] += 1
+        self._enter()
+        start = time.monotonic()
+        try:
+            eventlet.sleep(seconds)
+        finally:
+            self.counters['delayed_seconds'] += time.monotonic() - start
+            self._leave()
+
+    def _enter(self):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def _leave(self):
+        self.active -= 1
@@ -3,15 +3,17 @@
 from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify
 import sys
 import os
-import json
 import datetime
-import requests
-from collections import defaultdict
 import logging
 
 # Import the simplified ML model
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../ml_model'))
-from simulate_model import classify_traffic
+from simulate_model import classify_traffic, ml_model
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../common'))
+from controller_notifier import ControllerNotifier
+from ip_state import IPStateStore
+from log_writer import AsyncLogWriter
 
 app = Flask(__name__)
 app.secret_key = 'triage_honeypot_secret_key_999'
@@ -31,9 +33,23 @@ logger = logging.getLogger(__name__)
 LOG_DIR = os.path.join(os.path.dirname(__file__), '../../logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# Track failed attempts per IP
-failed_attempts = defaultdict(int)
-request_times = defaultdict(list)
+# Request log, written in batches by a background thread
+request_log = AsyncLogWriter(os.path.join(LOG_DIR, 'triage_honeypot.log'))
+
+class AttemptRecord(object):
+    """Failed login attempts of one source IP"""
+    __slots__ = ('failed_attempts',)
+    
+    def __init__(self):
+        self.failed_attempts = 0
+
+# Track failed attempts per IP; IPs idle for an hour, or the least recently
+# seen beyond the entry and memory limits, are forgotten
+attempts = IPStateStore(AttemptRecord, max_entries=100000, max_bytes=32 * 1024 * 1024, idle_ttl=3600)
+
+def failed_attempts(source_ip):
+    record = attempts.peek(source_ip)
+    return record.failed_attempts if record is not None else 0
 
 def log_request(request_type, source_ip, success=False, username=None, extra_data=None):
     """Enhanced logging for honeypot analysis"""
@@ -46,15 +62,13 @@ def log_request(request_type, source_ip, success=False, username=None, extra_dat
         'username': username,
         'user_agent': request.headers.get('User-Agent', ''),
         'method': request.method,
-        'failed_attempts_count': failed_attempts[source_ip],
+        'failed_attempts_count': failed_attempts(source_ip),
         'request_headers': dict(request.headers),
         'form_data': dict(request.form) if request.form else None,
         'extra_data': extra_data
     }
     
-    log_file = os.path.join(LOG_DIR, 'triage_honeypot.log')
-    with open(log_file, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    request_log.write(log_entry)
 
 def analyze_traffic_with_ml(source_ip, username=None):
     """
@@ -65,7 +79,7 @@ def analyze_traffic_with_ml(source_ip, username=None):
     request_data = {
         'username': username or '',
         'user_agent': request.headers.get('User-Agent', ''),
-        'failed_attempts': failed_attempts[source_ip]
+        'failed_attempts': failed_attempts(source_ip)
     }
     
     # Get ML prediction (1 = malicious, 0 = benign)
@@ -81,43 +95,23 @@ def analyze_traffic_with_ml(source_ip, username=None):
     
     return classification, risk_score, ml_prediction
 
+# Classification updates go to the controller from a background thread,
+# coalesced per source IP and batched over one keep-alive connection
+controller_notifier = ControllerNotifier(
+    [
+        'http://127.0.0.1:8080',       # Primary - localhost controller
+        'http://192.168.1.100:8080',   # Host system IP fallback
+        'http://10.0.0.1:8080',        # Default gateway fallback
+    ],
+    honeypot_type='triage'
+)
+
 def send_to_controller(classification, source_ip, risk_score, ml_prediction=None):
-    """Send classification result to SDN controller"""
-    logger.info(f"🔄 FUNCTION CALLED: send_to_controller({classification}, {source_ip}, {risk_score}, {ml_prediction})")
-    
-    # Simple localhost-focused approach
-    controller_ips = [
-        '127.0.0.1',       # Primary - localhost controller
-        '192.168.1.100',   # Host system IP fallback
-        '10.0.0.1',        # Default gateway fallback
-    ]
-    
-    for host_ip in controller_ips:
-        try:
-            controller_url = f'http://{host_ip}:8080/honeypot/classification'
-            data = {
-                'source_ip': source_ip,
-                'classification': classification,
-                'risk_score': risk_score * 100,  # Convert to 0-100 scale
-                'honeypot_type': 'triage',
-                'ml_prediction': ml_prediction,  # Include binary ML prediction
-                'timestamp': datetime.datetime.now().isoformat()
-            }
-            
-            logger.debug(f"[DEBUG] Attempting to send to controller: {controller_url}")
-            logger.debug(f"[DEBUG] Data: {data}")
-            
-            response = requests.post(controller_url, json=data, timeout=1)
-            logger.debug(f"[DEBUG] Response status: {response.status_code}")
-            logger.debug(f"[DEBUG] Response text: {response.text}")
-            logger.info(f"✅ SUCCESS: Sent to controller via {host_ip} - IP={source_ip}, Class={classification}, ML={ml_prediction}, Risk={risk_score:.3f}")
-            return response.status_code == 200
-        except Exception as e:
-            logger.debug(f"[DEBUG] Failed to reach controller at {host_ip}: {e}")
-            continue
-    
-    logger.error(f"[ERROR] Could not reach controller at any IP: {controller_ips}")
-    return False
+    """Queue classification result for the SDN controller (never blocks the request)"""
+    queued = controller_notifier.notify(classification, source_ip, risk_score, ml_prediction)
+    if not queued:
+        logger.warning(f"Controller update queue full, dropped update for {source_ip}")
+    return queued
 
 # HTML Templates (same as normal servers to appear legitimate)
 LOGIN_TEMPLATE = '''
@@ -174,8 +168,9 @@ def login():
         logger.info(f"👤 Login attempt: {username}/{password}")
         
         # Always fail authentication in triage honeypot
-        failed_attempts[client_ip] += 1
-        logger.info(f"📊 Failed attempts for {client_ip}: {failed_attempts[client_ip]}")
+        record = attempts.get(client_ip)
+        record.failed_attempts += 1
+        logger.info(f"📊 Failed attempts for {client_ip}: {record.failed_attempts}")
         
         # Analyze traffic patterns using ML model
         logger.info("🤖 Starting ML analysis...")
@@ -194,9 +189,8 @@ def login():
         logger.info("✅ Logging complete")
         
         # Send results to controller
-        logger.info("🔄 About to call send_to_controller...")
+        logger.info("🔄 Queueing controller update...")
         send_to_controller(classification, client_ip, risk_score, ml_prediction)
-        logger.info("✅ send_to_controller call complete")
         
         # Always show invalid credentials error
         return render_template_string(LOGIN_TEMPLATE, 
@@ -241,10 +235,14 @@ def health():
 @app.route('/api/stats')
 def stats():
     """API endpoint to get honeypot statistics"""
+    failed_attempts_by_ip = {ip: record.failed_attempts for ip, record in attempts.items()}
     return jsonify({
-        'failed_attempts_by_ip': dict(failed_attempts),
-        'total_attempts': sum(failed_attempts.values()),
-        'unique_ips': len(failed_attempts)
+        'failed_attempts_by_ip': failed_attempts_by_ip,
+        'total_attempts': sum(failed_attempts_by_ip.values()),
+        'unique_ips': len(failed_attempts_by_ip),
+        'ip_state': attempts.stats(),
+        'controller_notifier': controller_notifier.stats(),
+        'request_log': request_log.stats()
     })
 
 @app.route('/api/ml_status')
@@ -257,7 +255,8 @@ def ml_status():
             'status': 'operational',
             'test_prediction': test_prediction,
             'test_score': test_score,
-            'model_type': 'simplified_binary'
+            'model_type': 'simplified_binary',
+            'ip_state': ml_model.state_stats()
         })
     except Exception as e:
         return jsonify({
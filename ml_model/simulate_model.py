@@ -1,10 +1,36 @@
 #!/usr/bin/env python3
 
 import json
+import os
+import sys
 import time
 import random
 from datetime import datetime
-from collections import defaultdict
+from collections import deque
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+from ip_state import IPStateStore
+
+class IPRecord(object):
+    """Recent request times and latest classification of one source IP"""
+    __slots__ = ('request_times', 'first_seen', 'risk_score', 'features', 'last_update')
+    
+    def __init__(self, max_history):
+        self.request_times = deque(maxlen=max_history)
+        # Start of the IP's current run of requests; the deque may already
+        # have dropped it once it holds max_history times
+        self.first_seen = None
+        self.risk_score = None
+        self.features = None
+        self.last_update = None
+    
+    def __sizeof__(self):
+        # The deque holds pointers only; each time is a float object of its own
+        size = (object.__sizeof__(self) + sys.getsizeof(self.request_times)
+                + len(self.request_times) * sys.getsizeof(0.0))
+        if self.features is not None:
+            size += sys.getsizeof(self.features)
+        return size
 
 class SimpleMLSimulator:
     """
@@ -14,32 +40,37 @@ class SimpleMLSimulator:
     """
     
     def __init__(self):
-        # Track IP behavior for consistent classification
-        self.ip_behavior = {}
-        self.request_history = defaultdict(list)
-        
         # Simple parameters for classification
         self.malicious_threshold = 0.6
         self.time_window = 300  # 5 minutes in seconds
+        self.max_history = 1000  # Request times kept per IP; older ones are dropped
+        
+        # Track IP behavior for consistent classification; idle, least recently
+        # seen IPs are evicted so spoofed sources cannot grow it without bound
+        self.ips = IPStateStore(lambda: IPRecord(self.max_history),
+                                max_entries=100000, max_bytes=64 * 1024 * 1024, idle_ttl=3600)
         
     def analyze_features(self, source_ip, request_data=None):
         """Extract simple features for classification"""
         current_time = time.time()
         
-        # Clean old requests
-        self.request_history[source_ip] = [
-            req_time for req_time in self.request_history[source_ip]
-            if current_time - req_time < self.time_window
-        ]
+        record = self.ips.get(source_ip)
+        history = record.request_times
+        
+        # Clean old requests; times are appended in order, so they expire from the left
+        while history and current_time - history[0] >= self.time_window:
+            history.popleft()
         
         # Add current request
-        self.request_history[source_ip].append(current_time)
+        if not history:
+            record.first_seen = current_time
+        history.append(current_time)
         
         # Calculate features
         features = {
-            'request_frequency': len(self.request_history[source_ip]),
-            'time_since_first': current_time - min(self.request_history[source_ip]) if self.request_history[source_ip] else 0,
-            'is_rapid_fire': len(self.request_history[source_ip]) > 10,  # More than 10 requests in 5 minutes
+            'request_frequency': len(history),
+            'time_since_first': current_time - record.first_seen,
+            'is_rapid_fire': len(history) > 10,  # More than 10 requests in 5 minutes
             'username_suspicious': False,
             'user_agent_suspicious': False
         }
@@ -91,12 +122,12 @@ class SimpleMLSimulator:
         risk_score += random.uniform(-0.1, 0.1)
         risk_score = max(0.0, min(1.0, risk_score))  # Clamp to [0, 1]
         
-        # Store behavior for consistency
-        self.ip_behavior[source_ip] = {
-            'risk_score': risk_score,
-            'features': features,
-            'last_update': time.time()
-        }
+        # Store behavior for consistency (analyze_features just marked the IP used)
+        record = self.ips.peek(source_ip)
+        if record is not None:
+            record.risk_score = risk_score
+            record.features = features
+            record.last_update = time.time()
         
         # Binary classification
         classification = 1 if risk_score >= self.malicious_threshold else 0
@@ -111,16 +142,22 @@ class SimpleMLSimulator:
     
     def get_ip_status(self, source_ip):
         """Get current status of an IP"""
-        if source_ip in self.ip_behavior:
-            return self.ip_behavior[source_ip]
-        return None
+        record = self.ips.peek(source_ip)
+        if record is None or record.last_update is None:
+            return None
+        return {
+            'risk_score': record.risk_score,
+            'features': record.features,
+            'last_update': record.last_update
+        }
     
     def reset_ip(self, source_ip):
         """Reset tracking for an IP"""
-        if source_ip in self.ip_behavior:
-            del self.ip_behavior[source_ip]
-        if source_ip in self.request_history:
-            del self.request_history[source_ip]
+        self.ips.remove(source_ip)
+    
+    def state_stats(self):
+        """Occupancy and eviction counters of the per-IP state"""
+        return self.ips.stats()
 
 # Global ML model instance
 ml_model = SimpleMLSimulator()
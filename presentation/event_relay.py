@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Relay of the controller's server-sent event stream to dashboard browsers.
+
+One background thread keeps a single streaming GET open to the
+controller's /api/events and reconnects with backoff when it drops. Every
+event it receives is broadcast to the browsers connected to the
+dashboard's own /api/events, each through a small bounded queue, so the
+controller serves one subscriber however many dashboards are open. A
+derive() hook turns controller events into extra dashboard events (the
+monitoring page's chart data) once per event instead of once per browser.
+
+The latest event of each snapshot type is kept and replayed to browsers
+as they connect, so a page renders immediately instead of waiting for
+the next update.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Event types that describe current state rather than a change
+SNAPSHOT_EVENTS = ('controller', 'stats', 'monitoring')
+
+
+class EventRelay(object):
+    """Single upstream SSE subscription fanned out to many browser streams"""
+
+    def __init__(self, url, derive=None, queue_size=100, heartbeat=15.0,
+                 reconnect=1.0, max_reconnect=10.0):
+        self.url = url
+        self.derive = derive
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.reconnect = reconnect
+        self.max_reconnect = max_reconnect
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._latest = {}
+        self._thread = None
+
+        self.connected = False
+        self.counters = {'received': 0, 'broadcast': 0, 'dropped': 0, 'reconnects': 0}
+        self.last_error = None
+
+    def start(self):
+        """Open the upstream subscription once; later calls do nothing"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='controller-events', daemon=True)
+            self._thread.start()
+
+    def stream(self):
+        """Generator of SSE frames for one browser, starting with the latest snapshots"""
+        self.start()
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            initial = [self._latest[event] for event in SNAPSHOT_EVENTS if event in self._latest]
+        try:
+            yield b'retry: 2000\n\n'
+            for message in initial:
+                yield message
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield b': keep-alive\n\n'
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, subscribers=len(self._subscribers),
+                        connected=self.connected, upstream=self.url,
+                        last_error=self.last_error)
+
+    def _broadcast(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+        with self._lock:
+            if event in SNAPSHOT_EVENTS:
+                self._latest[event] = message
+            self.counters['broadcast'] += 1
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self.counters['dropped'] += 1
+
+    def _dispatch(self, event, data):
+        self.counters['received'] += 1
+        self._broadcast(event, data)
+        if self.derive is not None:
+            for derived_event, derived_data in self.derive(event, data):
+                self._broadcast(derived_event, derived_data)
+
+    def _set_connected(self, connected):
+        if connected != self.connected:
+            self.connected = connected
+            self._broadcast('controller', {'status': 'ACTIVE' if connected else 'INACTIVE',
+                                           'timestamp': time.time()})
+
+    def _run(self):
+        delay = self.reconnect
+        session = requests.Session()
+        while True:
+            try:
+                # The controller sends keep-alives, so a silent read means it is gone
+                with session.get(self.url, stream=True, timeout=(2, self.heartbeat * 2),
+                                 headers={'Accept': 'text/event-stream'}) as response:
+                    response.raise_for_status()
+                    self._set_connected(True)
+                    delay = self.reconnect
+                    self._consume(response)
+                self.last_error = 'stream closed by controller'
+            except (requests.RequestException, ValueError) as e:
+                self.last_error = str(e)
+                logger.debug(f"Controller event stream unavailable: {e}")
+            self._set_connected(False)
+            self.counters['reconnects'] += 1
+            time.sleep(delay)
+            delay = min(self.max_reconnect, delay * 2)
+
+    def _consume(self, response):
+        """Parse SSE frames as chunks arrive (iter_lines would wait for full 512-byte reads)"""
+        buffer = b''
+        event, data = 'message', []
+        for chunk in response.iter_content(chunk_size=None):
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                line = line.rstrip(b'\r').decode('utf-8')
+                if not line:
+                    if data:
+                        self._dispatch(event, json.loads('\n'.join(data)))
+                    event, data = 'message', []
+                elif line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:'):
+                    data.append(line[5:].lstrip())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Background health probing of the services shown on the dashboard.
+
+A scheduler thread probes every /health URL at a fixed interval, all of
+them at once from a small thread pool sharing one keep-alive session, so
+a round takes as long as the slowest probe (at most the timeout) instead
+of the sum of them. Results are kept with their probe time and latency,
+and the dashboard endpoint only reads them; it never waits on a service
+except for the first round after startup.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor(object):
+    """Periodic concurrent probes of named health URLs"""
+
+    def __init__(self, targets, interval=5.0, timeout=1.0):
+        self.targets = dict(targets)
+        self.interval = interval
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.targets), pool_maxsize=len(self.targets))
+        self._session.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.targets),
+                                            thread_name_prefix='health-probe')
+
+        self._lock = threading.Lock()
+        # Held for a whole probe round, so concurrent callers share one round
+        self._round_lock = threading.Lock()
+        self._thread = None
+        self._results = {}
+
+        self.rounds = 0
+        self.last_round_at = None
+        self.last_round_ms = None
+
+    def start(self):
+        """Start the probe schedule once; later calls do nothing"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self._thread.start()
+
+    def results(self):
+        """name -> latest probe result; waits only for the first round"""
+        self.start()
+        if not self._results:
+            with self._round_lock:
+                if not self._results:
+                    self._probe_round()
+        with self._lock:
+            return dict(self._results)
+
+    def probe_all(self):
+        """Probe every target concurrently and store the results"""
+        with self._round_lock:
+            self._probe_round()
+
+    def stats(self):
+        with self._lock:
+            return {'targets': len(self.targets), 'interval': self.interval,
+                    'timeout': self.timeout, 'rounds': self.rounds,
+                    'last_round_at': self.last_round_at, 'last_round_ms': self.last_round_ms}
+
+    def _probe_round(self):
+        start = time.perf_counter()
+        futures = {name: self._executor.submit(self._probe, url)
+                   for name, url in self.targets.items()}
+        results = {name: future.result() for name, future in futures.items()}
+        with self._lock:
+            self._results = results
+            self.rounds += 1
+            self.last_round_at = datetime.datetime.now().isoformat()
+            self.last_round_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def _probe(self, url):
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            status_code = response.status_code
+            error = None if status_code == 200 else f'HTTP {status_code}'
+        except requests.RequestException as e:
+            error = str(e) or type(e).__name__
+        return {
+            'reachable': error is None,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            'status_code': status_code,
+            'checked_at': datetime.datetime.now().isoformat(),
+            'error': error,
+        }
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
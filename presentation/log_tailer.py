@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Incremental reader of a JSON-lines honeypot log for the dashboard.
+
+The tailer keeps the log open and remembers how far it has read, so each
+poll parses only the records appended since the previous one, and keeps
+the aggregates the dashboard shows up to date as records arrive:
+
+- attempts per second over the trailing window (total attempts)
+- last-seen time per source IP over the window (unique IPs)
+- the latest record and the last few records
+
+Endpoint cost therefore depends on how much was logged since the last
+request, not on the size of the file. A file that shrinks below the read
+offset (the dashboard's reset truncates it) resets the aggregates; a file
+replaced under the same path (rotation) is read to its end before the new
+one is opened, so no records are lost across rotations.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def record_time(record):
+    """POSIX time of a log record's ISO timestamp (naive timestamps are local time)"""
+    timestamp = record['timestamp'].replace('Z', '+00:00')
+    return datetime.datetime.fromisoformat(timestamp).timestamp()
+
+
+class LogTailer(object):
+    """Rolling aggregates over the trailing window of an appended JSON-lines log"""
+
+    def __init__(self, path, window=3600, recent=10, chunk_size=1 << 16):
+        self.path = path
+        self.window = window
+        self.chunk_size = chunk_size
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b''
+
+        self._recent = deque(maxlen=recent)
+        self._reset_aggregates()
+
+        self.counters = {'bytes_read': 0, 'records': 0, 'parse_errors': 0,
+                         'truncations': 0, 'rotations': 0}
+
+    def snapshot(self):
+        """Read newly appended records, then return the current aggregates"""
+        with self._lock:
+            self._poll()
+            self._expire(time.time())
+            latest = self._latest
+            if latest is not None and latest[0] < time.time() - self.window:
+                latest = None
+            return {
+                'total_attempts': self._attempts,
+                'unique_ips': len(self._last_seen),
+                'latest': latest[1] if latest else None,
+                'recent': list(self._recent),
+            }
+
+    def reset(self):
+        """Forget everything read so far (after the log was truncated on purpose)"""
+        with self._lock:
+            self._close()
+            self._recent.clear()
+            self._reset_aggregates()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, path=self.path, offset=self._offset,
+                        inode=self._inode, window=self.window)
+
+    def _reset_aggregates(self):
+        self._buckets = deque()          # [second, attempts] in time order
+        self._attempts = 0
+        self._last_seen = OrderedDict()  # source ip -> last record time, oldest first
+        self._latest = None              # (time, record)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b''
+
+    def _poll(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Keep reading a file that was rotated away until its replacement appears
+            if self._file is not None:
+                self._read()
+            return
+
+        if self._file is not None and stat.st_ino != self._inode:
+            # Rotated: finish the old file, then start on the new one
+            self._read()
+            self._close()
+            self.counters['rotations'] += 1
+        elif self._file is not None and stat.st_size < self._offset:
+            self._close()
+            self._recent.clear()
+            self._reset_aggregates()
+            self.counters['truncations'] += 1
+
+        if self._file is None:
+            try:
+                self._file = open(self.path, 'rb')
+            except OSError:
+                return
+            self._inode = os.fstat(self._file.fileno()).st_ino
+        self._read()
+
+    def _read(self):
+        self._file.seek(self._offset)
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                break
+            self._offset += len(chunk)
+            self.counters['bytes_read'] += len(chunk)
+            *lines, self._partial = (self._partial + chunk).split(b'\n')
+            for line in lines:
+                if line.strip():
+                    self._ingest(line)
+
+    def _ingest(self, line):
+        try:
+            record = json.loads(line)
+            when = record_time(record)
+            source_ip = record['source_ip']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.counters['parse_errors'] += 1
+            return
+        self.counters['records'] += 1
+        self._recent.append(record)
+
+        if when < time.time() - self.window:
+            return
+        second = int(when)
+        if self._buckets and self._buckets[-1][0] >= second:
+            # Same second, or a record logged slightly out of order
+            self._buckets[-1][1] += 1
+        else:
+            self._buckets.append([second, 1])
+        self._attempts += 1
+
+        self._last_seen[source_ip] = max(when, self._last_seen.pop(source_ip, when))
+        if self._latest is None or when >= self._latest[0]:
+            self._latest = (when, record)
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        while self._buckets and self._buckets[0][0] < cutoff:
+            self._attempts -= self._buckets.popleft()[1]
+        while self._last_seen:
+            ip, seen = next(iter(self._last_seen.items()))
+            if seen >= cutoff:
+                break
+            del self._last_seen[ip]
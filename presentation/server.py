@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, Response, render_template, jsonify
 import os
-import json
 import datetime
 import requests
-import subprocess
-import time
 import markdown
 from markupsafe import Markup
 
+from event_relay import EventRelay
+from stats_cache import StatsCache
+from health_probe import HealthMonitor
+from log_tailer import LogTailer
+
 app = Flask(__name__)
 app.template_folder = 'templates'
 app.static_folder = 'static'
@@ -19,6 +21,47 @@ os.makedirs('templates', exist_ok=True)
 os.makedirs('static/css', exist_ok=True)
 os.makedirs('static/js', exist_ok=True)
 
+CONTROLLER_URL = 'http://localhost:8080'
+
+# Seconds a controller stats snapshot is served before it is fetched again
+CONTROLLER_STATS_TTL = 2.0
+
+controller_session = requests.Session()
+
+def fetch_controller_stats():
+    response = controller_session.get(f'{CONTROLLER_URL}/api/stats', timeout=2)
+    response.raise_for_status()
+    return response.json()
+
+# One snapshot of the controller's /api/stats shared by every endpoint
+controller_stats_cache = StatsCache(fetch_controller_stats, ttl=CONTROLLER_STATS_TTL)
+
+# Service hosts probed on their /health endpoint (h6 is the client host)
+HOST_SERVICE_PORTS = {
+    'h1': 8001,
+    'h2': 8002,
+    'h3': 8003,
+    'h4': 8004,
+    'h5': 8005
+}
+
+# Seconds between background health probe rounds
+HOST_PROBE_INTERVAL = 5.0
+
+host_monitor = HealthMonitor({host: f'http://localhost:{port}/health'
+                              for host, port in HOST_SERVICE_PORTS.items()},
+                             interval=HOST_PROBE_INTERVAL, timeout=1.0)
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../logs')
+
+# Triage honeypot log, read incrementally; aggregates cover the last hour
+triage_log = LogTailer(os.path.join(LOGS_DIR, 'triage_honeypot.log'), window=3600, recent=10)
+
+def controller_snapshot():
+    """(stats, cache metadata, reachable) from the shared controller stats snapshot"""
+    stats, cache_info = controller_stats_cache.get()
+    return stats, cache_info, stats is not None and cache_info['error'] is None
+
 @app.route('/')
 def index():
     """Landing page with project overview"""
@@ -68,72 +111,31 @@ def system_status():
     """Enhanced API endpoint for real-time system status"""
     
     # Check controller status
-    controller_status = 'INACTIVE'
-    controller_stats = {}
-    try:
-        response = requests.get('http://localhost:8080/api/stats', timeout=2)
-        if response.status_code == 200:
-            controller_status = 'ACTIVE'
-            controller_stats = response.json()
-    except:
-        pass
+    controller_stats, cache_info, reachable = controller_snapshot()
+    controller_status = 'ACTIVE' if reachable else 'INACTIVE'
+    controller_stats = controller_stats or {}
     
-    # Check logs for latest activity - start fresh for clean demos
-    logs_dir = 'logs'  # Relative to current directory
+    # Latest activity and attempts within the last hour, from the incremental log reader
+    activity = triage_log.snapshot()
+    honeypot_stats = {'total_attempts': activity['total_attempts'],
+                      'unique_ips': activity['unique_ips']}
     latest_activity = None
-    honeypot_stats = {'total_attempts': 0, 'unique_ips': 0}
-    
-    # Only check logs if they exist and are recent (within last hour for demos)
-    log_file_path = f'{logs_dir}/triage_honeypot.log'
-    if os.path.exists(log_file_path):
-        try:
-            file_mod_time = os.path.getmtime(log_file_path)
-            current_time = time.time()
-            
-            # Only load logs if file was modified within last hour
-            if current_time - file_mod_time < 3600:  # 1 hour
-                with open(log_file_path, 'r') as f:
-                    lines = f.readlines()
-                    # Filter recent lines only (last 10 minutes)
-                    recent_lines = []
-                    for line in lines:
-                        try:
-                            log_entry = json.loads(line)
-                            log_time = datetime.datetime.fromisoformat(log_entry['timestamp'].replace('Z', '+00:00'))
-                            if (datetime.datetime.now(datetime.timezone.utc) - log_time).total_seconds() < 3600:  # 1 hour
-                                recent_lines.append(line)
-                        except:
-                            continue
-                    
-                    honeypot_stats['total_attempts'] = len(recent_lines)
-                    
-                    if recent_lines:
-                        latest = json.loads(recent_lines[-1])
-                        latest_activity = {
-                            'timestamp': latest['timestamp'],
-                            'source_ip': latest['source_ip'],
-                            'request_type': latest['request_type'],
-                            'ml_prediction': latest.get('extra_data', {}).get('ml_prediction', 0),
-                            'risk_score': latest.get('extra_data', {}).get('risk_score', 0.3),
-                            'classification': latest.get('extra_data', {}).get('classification', 'normal')
-                        }
-                    
-                    # Count unique IPs from recent lines
-                    ips = set()
-                    for line in recent_lines:
-                        try:
-                            log_entry = json.loads(line)
-                            ips.add(log_entry['source_ip'])
-                        except:
-                            pass
-                    honeypot_stats['unique_ips'] = len(ips)
-        except:
-            pass
+    latest = activity['latest']
+    if latest is not None:
+        latest_activity = {
+            'timestamp': latest['timestamp'],
+            'source_ip': latest['source_ip'],
+            'request_type': latest.get('request_type'),
+            'ml_prediction': (latest.get('extra_data') or {}).get('ml_prediction', 0),
+            'risk_score': (latest.get('extra_data') or {}).get('risk_score', 0.3),
+            'classification': (latest.get('extra_data') or {}).get('classification', 'normal')
+        }
     
     return jsonify({
         'controller': {
             'status': controller_status,
-            'stats': controller_stats
+            'stats': controller_stats,
+            'cache': cache_info
         },
         'dashboard': {
             'status': 'ACTIVE',  # Dashboard is always active if the server is running
@@ -170,7 +172,7 @@ def reset_stats():
     """Reset system statistics for clean demos"""
     try:
         # Clear ALL log files for clean demo
-        logs_dir = '../logs'  # Go up one directory from presentation/
+        logs_dir = LOGS_DIR  # logs/ next to presentation/
         log_files = [
             'triage_honeypot.log', 
             'deep_honeypot.log', 
@@ -199,14 +201,16 @@ def reset_stats():
                 except PermissionError:
                     # Skip files we can't write to (system logs)
                     continue
+        triage_log.reset()
         
         # Reset controller statistics via API
         controller_reset = False
         try:
-            response = requests.post('http://localhost:8080/api/reset-stats', timeout=5)
+            response = requests.post(f'{CONTROLLER_URL}/api/reset-stats', timeout=5)
             controller_reset = (response.status_code == 200)
         except:
             pass
+        controller_stats_cache.invalidate()
         
         return jsonify({
             'success': True,
@@ -279,13 +283,10 @@ def ml_test():
 @app.route('/api/dashboard-stats')
 def dashboard_stats():
     """Get stats for integrated dashboard functionality"""
-    try:
-        # Get real data from controller
-        response = requests.get('http://localhost:8080/api/stats', timeout=2)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        pass
+    # Get real data from controller
+    stats, cache_info, reachable = controller_snapshot()
+    if reachable:
+        return jsonify(dict(stats, cache=cache_info))
     
     # Return mock data if controller is not available
     return jsonify({
@@ -293,144 +294,159 @@ def dashboard_stats():
         'suspicious_ips': ['192.168.1.100'],
         'malicious_ips': [],
         'flow_count': 15,
-        'last_update': datetime.datetime.now().strftime('%H:%M:%S')
+        'last_update': datetime.datetime.now().strftime('%H:%M:%S'),
+        'cache': cache_info
     })
 
 @app.route('/api/host-status')
 def host_status():
-    """Get real host status - check if services are actually running"""
+    """Get real host status from the latest background health probes"""
     host_status = {}
+    probes = host_monitor.results()
+    _, _, controller_reachable = controller_snapshot()
     
-    # Define host port mappings
-    host_ports = {
-        'h1': 8001,
-        'h2': 8002, 
-        'h3': 8003,
-        'h4': 8004,
-        'h5': 8005,
-        'h6': 'online'  # Client host, always online
-    }
-    
-    for host, port in host_ports.items():
-        if host == 'h6':
+    for host, probe in probes.items():
+        if probe['reachable']:
             host_status[host] = 'online'
-            continue
-            
-        try:
-            # Try to reach the health endpoint of each service
-            response = requests.get(f'http://localhost:{port}/health', timeout=1)
-            if response.status_code == 200:
-                host_status[host] = 'online'
-            else:
-                host_status[host] = 'offline'
-        except:
+        elif probe['status_code'] is not None:
+            host_status[host] = 'offline'
+        else:
             # If service is running in Mininet, we can't reach it via localhost
-            # But we can check if the controller has the service info
-            try:
-                controller_response = requests.get('http://localhost:8080/api/stats', timeout=1)
-                if controller_response.status_code == 200:
-                    # If controller is up, assume all services are up (they run in Mininet)
-                    host_status[host] = 'online'
-                else:
-                    host_status[host] = 'offline'
-            except:
-                host_status[host] = 'offline'
+            # If controller is up, assume all services are up (they run in Mininet)
+            host_status[host] = 'online' if controller_reachable else 'offline'
+    host_status['h6'] = 'online'  # Client host, always online
     
+    # Per-host probe latency and time, plus the probe schedule
+    host_status['probes'] = probes
+    host_status['probe_schedule'] = host_monitor.stats()
     return jsonify(host_status)
 
 @app.route('/api/honeypot-logs')
 def honeypot_logs():
     """Get recent honeypot logs"""
     logs = []
-    logs_dir = '../logs'
-    
-    if os.path.exists(f'{logs_dir}/triage_honeypot.log'):
-        try:
-            with open(f'{logs_dir}/triage_honeypot.log', 'r') as f:
-                lines = f.readlines()
-                # Get last 10 entries
-                for line in lines[-10:]:
-                    try:
-                        log_entry = json.loads(line)
-                        logs.append({
-                            'timestamp': log_entry['timestamp'],
-                            'source_ip': log_entry['source_ip'],
-                            'request_type': log_entry['request_type'],
-                            'ml_prediction': log_entry.get('extra_data', {}).get('ml_prediction', 'N/A'),
-                            'risk_score': log_entry.get('extra_data', {}).get('risk_score', 'N/A'),
-                            'classification': log_entry.get('extra_data', {}).get('classification', 'N/A')
-                        })
-                    except:
-                        pass
-        except:
-            pass
+    # Last 10 entries, kept by the incremental log reader
+    for log_entry in triage_log.snapshot()['recent']:
+        extra_data = log_entry.get('extra_data') or {}
+        logs.append({
+            'timestamp': log_entry['timestamp'],
+            'source_ip': log_entry['source_ip'],
+            'request_type': log_entry.get('request_type'),
+            'ml_prediction': extra_data.get('ml_prediction', 'N/A'),
+            'risk_score': extra_data.get('risk_score', 'N/A'),
+            'classification': extra_data.get('classification', 'N/A')
+        })
     
     return jsonify(logs)
 
+@app.route('/api/log-stats')
+def log_stats():
+    """Read offset, inode and record counters of the triage log reader"""
+    return jsonify(triage_log.stats())
+
+def monitoring_payload(controller_data):
+    """Chart and counter data of the monitoring page from a controller /api/stats body"""
+    # Extract actual data from controller
+    active_ips = controller_data.get('active_ips', 0)
+    suspicious_ips_list = controller_data.get('suspicious_ips', [])
+    malicious_ips_list = controller_data.get('malicious_ips', [])
+    suspicious_count = len(suspicious_ips_list)
+    malicious_count = len(malicious_ips_list)
+    
+    # Calculate honeypot interactions (suspicious + malicious traffic)
+    honeypot_interactions = suspicious_count + malicious_count
+    
+    # For traffic distribution, we'll use simple counts
+    # Normal traffic = total active IPs minus unique suspicious/malicious IPs
+    # This allows normal traffic to grow as new legitimate users connect
+    unique_threat_ips = len(set(suspicious_ips_list + malicious_ips_list))
+    baseline_normal = max(6, active_ips - unique_threat_ips)  # Minimum 6 baseline hosts, but can grow
+    
+    return {
+        'active_ips': active_ips,
+        'suspicious_ips': suspicious_count,
+        'malicious_ips': malicious_count,
+        'honeypot_interactions': honeypot_interactions,
+        'traffic_history': {
+            'normal': baseline_normal,
+            'suspicious': max(1, suspicious_count) if suspicious_count > 0 else 0,
+            'malicious': max(1, malicious_count) if malicious_count > 0 else 0
+        },
+        'threat_distribution': {
+            'normal': baseline_normal,
+            'suspicious': suspicious_count,
+            'malicious': malicious_count
+        },
+        'timestamp': datetime.datetime.now().isoformat(),
+        'controller_status': 'active'
+    }
+
+def offline_monitoring_payload(error):
+    """Baseline monitoring data while the controller is unreachable"""
+    return {
+        'active_ips': 6,  # 6 baseline hosts
+        'suspicious_ips': 0,
+        'malicious_ips': 0,
+        'honeypot_interactions': 0,
+        'traffic_history': {
+            'normal': 6,  # Show baseline normal traffic
+            'suspicious': 0,
+            'malicious': 0
+        },
+        'threat_distribution': {
+            'normal': 6,
+            'suspicious': 0,
+            'malicious': 0
+        },
+        'timestamp': datetime.datetime.now().isoformat(),
+        'controller_status': 'offline',
+        'error': error
+    }
+
 @app.route('/api/monitoring-data')
 def monitoring_data():
     """Get monitoring data for charts and statistics"""
-    try:
-        # Get real data from controller
-        response = requests.get('http://localhost:8080/api/stats', timeout=2)
-        if response.status_code == 200:
-            controller_data = response.json()
-            
-            # Extract actual data from controller
-            active_ips = controller_data.get('active_ips', 0)
-            suspicious_ips_list = controller_data.get('suspicious_ips', [])
-            malicious_ips_list = controller_data.get('malicious_ips', [])
-            suspicious_count = len(suspicious_ips_list)
-            malicious_count = len(malicious_ips_list)
-            
-            # Calculate honeypot interactions (suspicious + malicious traffic)
-            honeypot_interactions = suspicious_count + malicious_count
-            
-            # For traffic distribution, we'll use simple counts
-            # Normal traffic = total active IPs minus unique suspicious/malicious IPs
-            # This allows normal traffic to grow as new legitimate users connect
-            unique_threat_ips = len(set(suspicious_ips_list + malicious_ips_list))
-            baseline_normal = max(6, active_ips - unique_threat_ips)  # Minimum 6 baseline hosts, but can grow
-            
-            return jsonify({
-                'active_ips': active_ips,
-                'suspicious_ips': suspicious_count,
-                'malicious_ips': malicious_count,
-                'honeypot_interactions': honeypot_interactions,
-                'traffic_history': {
-                    'normal': baseline_normal,
-                    'suspicious': max(1, suspicious_count) if suspicious_count > 0 else 0,
-                    'malicious': max(1, malicious_count) if malicious_count > 0 else 0
-                },
-                'threat_distribution': {
-                    'normal': baseline_normal,
-                    'suspicious': suspicious_count,
-                    'malicious': malicious_count
-                },
-                'timestamp': datetime.datetime.now().isoformat(),
-                'controller_status': 'active'
-            })
-    except Exception as e:
-        # Controller is not available - return baseline values
-        return jsonify({
-            'active_ips': 6,  # 6 baseline hosts
-            'suspicious_ips': 0,
-            'malicious_ips': 0,
-            'honeypot_interactions': 0,
-            'traffic_history': {
-                'normal': 6,  # Show baseline normal traffic
-                'suspicious': 0,
-                'malicious': 0
-            },
-            'threat_distribution': {
-                'normal': 6,
-                'suspicious': 0,
-                'malicious': 0
-            },
-            'timestamp': datetime.datetime.now().isoformat(),
-            'controller_status': 'offline',
-            'error': str(e)
-        })
+    stats, cache_info, reachable = controller_snapshot()
+    if reachable:
+        return jsonify(dict(monitoring_payload(stats), cache=cache_info))
+    
+    # Controller is not available - return baseline values
+    return jsonify(dict(offline_monitoring_payload(cache_info['error']), cache=cache_info))
+
+# =================== LIVE EVENT STREAM ===================
+
+def derive_dashboard_events(event, data):
+    """Dashboard events computed once per controller event for every browser"""
+    if event == 'stats':
+        # Streamed counters also keep the shared snapshot fresh without polling
+        controller_stats_cache.update(data)
+        return [('monitoring', monitoring_payload(data))]
+    if event == 'controller' and data.get('status') != 'ACTIVE':
+        return [('monitoring', offline_monitoring_payload('controller event stream disconnected'))]
+    return []
+
+# One subscription to the controller, shared by every open dashboard
+event_relay = EventRelay(f'{CONTROLLER_URL}/api/events', derive=derive_dashboard_events)
+
+@app.route('/api/events')
+def events():
+    """
+    Server-sent events relayed from the controller: 'classification',
+    'flow_install', 'stats' and derived 'monitoring' updates, plus
+    'controller' when the upstream connection comes or goes
+    """
+    return Response(event_relay.stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/events/stats')
+def event_stats():
+    """Upstream connection state and relay counters"""
+    return jsonify(event_relay.stats())
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Controller stats snapshot age and fetch/deduplication counters"""
+    return jsonify(controller_stats_cache.stats())
 
 if __name__ == '__main__':
     port = 9000
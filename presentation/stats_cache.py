@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Shared, background-refreshed snapshot of the controller's /api/stats.
+
+Every dashboard endpoint reads the same cached snapshot instead of calling
+the controller itself. A background thread refetches it whenever it is
+older than the TTL, and the controller event stream (when connected)
+replaces it on every 'stats' event, so the poller stays idle while the
+stream is live. Concurrent refreshes are deduplicated (singleflight): one
+caller fetches, the others wait for its result. Controller load is thus at
+most one request per TTL, and request latency does not depend on how many
+dashboards are open.
+
+Readers get the snapshot together with metadata saying how old it is,
+where it came from and whether the last refresh failed.
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCache(object):
+    """TTL-bounded snapshot of one fetch() result, refreshed in the background"""
+
+    def __init__(self, fetch, ttl=2.0, retry=1.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry = retry
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._inflight = None
+        self._thread = None
+        self._forced = False
+
+        # Last good value and when it was obtained
+        self._data = None
+        self._fetched_at = None
+        self._source = None
+        # Outcome of the most recent refresh attempt
+        self._checked_at = None
+        self._error = None
+
+        self.counters = {'fetches': 0, 'failures': 0, 'deduplicated': 0, 'pushed': 0}
+
+    def start(self):
+        """Start the background refresher once; later calls do nothing"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='stats-cache', daemon=True)
+            self._thread.start()
+
+    def get(self):
+        """
+        (data, metadata) of the current snapshot. Only the very first call
+        waits for the controller; after that the background thread keeps the
+        snapshot fresh. data is None until a fetch has succeeded.
+        """
+        self.start()
+        if self._checked_at is None:
+            self.refresh()
+        with self._lock:
+            return self._data, self._metadata()
+
+    @property
+    def available(self):
+        """True if the latest refresh attempt reached the controller"""
+        return self._data is not None and self._error is None
+
+    def update(self, data, source='stream'):
+        """Replace the snapshot with data pushed from elsewhere (the event stream)"""
+        with self._lock:
+            now = time.time()
+            self._data = data
+            self._fetched_at = now
+            self._checked_at = now
+            self._source = source
+            self._error = None
+            self.counters['pushed'] += 1
+
+    def invalidate(self):
+        """Mark the snapshot stale and refresh it in the background now"""
+        self._forced = True
+        self._wakeup.set()
+
+    def refresh(self):
+        """Fetch a new snapshot, or wait for the fetch already in progress"""
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = threading.Event()
+                self._forced = False
+                leader = True
+            else:
+                leader = False
+                self.counters['deduplicated'] += 1
+        if not leader:
+            inflight.wait()
+            return
+
+        try:
+            data = self.fetch()
+            error = None
+        except Exception as e:
+            data = None
+            error = str(e) or type(e).__name__
+        with self._lock:
+            now = time.time()
+            self.counters['fetches'] += 1
+            self._checked_at = now
+            self._error = error
+            if error is None:
+                self._data = data
+                self._fetched_at = now
+                self._source = 'poll'
+            else:
+                self.counters['failures'] += 1
+                logger.debug(f"Controller stats refresh failed: {error}")
+            self._inflight = None
+        inflight.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, ttl=self.ttl, **self._metadata())
+
+    def _age(self, now):
+        return None if self._fetched_at is None else now - self._fetched_at
+
+    def _metadata(self):
+        now = time.time()
+        age = self._age(now)
+        return {
+            'fetched_at': (datetime.datetime.fromtimestamp(self._fetched_at).isoformat()
+                           if self._fetched_at is not None else None),
+            'age_seconds': round(age, 3) if age is not None else None,
+            'stale': age is None or age > self.ttl or self._error is not None,
+            'source': self._source,
+            'error': self._error,
+        }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                age = self._age(time.time())
+                due = age is None or age >= self.ttl or self._error is not None or self._forced
+            if not due:
+                wait = self.ttl - age
+            else:
+                self.refresh()
+                wait = self.retry if self._error is not None else self.ttl
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
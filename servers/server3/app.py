@@ -3,7 +3,6 @@
 from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify
 import sys
 import os
-import json
 import datetime
 
 app = Flask(__name__)
@@ -16,10 +15,16 @@ VALID_CREDENTIALS = {
     'test': 'test123'
 }
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../common'))
+from log_writer import AsyncLogWriter
+
 # Logging directory
 LOG_DIR = os.path.join(os.path.dirname(__file__), '../../logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Request log, written in batches by a background thread
+request_log = AsyncLogWriter(os.path.join(LOG_DIR, 'normal_server_3.log'))
+
 def log_request(request_type, source_ip, success=False, username=None):
     """Log requests to file"""
     log_entry = {
@@ -33,9 +38,7 @@ def log_request(request_type, source_ip, success=False, username=None):
         'method': request.method
     }
     
-    log_file = os.path.join(LOG_DIR, 'normal_server_3.log')
-    with open(log_file, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    request_log.write(log_entry)
 
 # HTML Templates
 LOGIN_TEMPLATE = '''
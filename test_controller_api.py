@@ -42,6 +42,26 @@ def send_classification(source_ip: str, classification: str, risk_score: float,
         print(f"❌ Error sending classification: {e}")
         return False
 
+def send_classification_batch(updates: List[Dict]):
+    """Birden fazla classification verisini tek istekte gönder"""
+    url = f"{CONTROLLER_URL}/honeypot/classification/batch"
+    
+    try:
+        start = time.perf_counter()
+        response = requests.post(url, json=updates, timeout=30)
+        elapsed = time.perf_counter() - start
+        if response.status_code == 200:
+            result = response.json()
+            print(f"✅ Sent {len(updates)} classifications in {elapsed:.2f}s "
+                  f"({len(updates) / elapsed:,.0f}/s), errors: {result.get('errors', 0)}")
+            return result
+        else:
+            print(f"❌ Failed to send batch: {response.status_code}")
+            return None
+    except Exception as e:
+        print(f"❌ Error sending batch: {e}")
+        return None
+
 def add_to_traffic_stats(source_ip: str):
     """IP'yi controller'ın traffic_stats'ına ekle"""
     url = f"{CONTROLLER_URL}/api/add-traffic"
@@ -121,6 +141,23 @@ def simulate_attack_scenario():
         send_classification(attacker_ip, classification, risk, ml_pred, "deep")
         time.sleep(2)
 
+def simulate_mass_scan(count: int = 10000):
+    """Toplu tarama simülasyonu - tüm kararlar tek batch isteğinde"""
+    print(f"🌐 Simulating mass scan from {count} sources...")
+    
+    updates = []
+    for i in range(count):
+        risk = random.uniform(0.4, 1.0)
+        updates.append({
+            'source_ip': f"198.18.{(i >> 8) & 0xff}.{i & 0xff}",
+            'classification': 'malicious' if risk > 0.8 else 'suspicious',
+            'risk_score': risk * 100,  # 0-100 scale
+            'honeypot_type': 'test',
+            'ml_prediction': 1 if risk > 0.85 else 0,
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+    send_classification_batch(updates)
+
 def continuous_monitoring():
     """Sürekli monitoring simülasyonu"""
     print("🔄 Starting continuous monitoring simulation...")
@@ -175,9 +212,10 @@ def main():
         print("4. Gerçekçi saldırı senaryosu")
         print("5. Sürekli monitoring simülasyonu")
         print("6. Controller istatistikleri")
+        print("7. Toplu tarama simülasyonu (batch)")
         print("0. Çıkış")
         
-        choice = input("\nSeçiminiz (0-6): ").strip()
+        choice = input("\nSeçiminiz (0-7): ").strip()
         
         if choice == "1":
             simulate_normal_traffic()
@@ -193,6 +231,8 @@ def main():
             stats = get_controller_stats()
             if stats:
                 print(json.dumps(stats, indent=2))
+        elif choice == "7":
+            simulate_mass_scan()
         elif choice == "0":
             print("👋 Goodbye!")
             break
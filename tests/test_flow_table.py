@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""LRU and idle-TTL eviction of the controller's bounded state tables"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../controller'))
+from flow_table import FlowTable, flow_key, unpack_flow_key
+
+
+class FlowTableTest(unittest.TestCase):
+
+    def test_touch_creates_once_and_returns_same_value(self):
+        table = FlowTable('t', capacity=4, ttl=10)
+        value = table.touch('a', now=100)
+        value['n'] = 1
+        self.assertIs(table.touch('a', now=101), value)
+        self.assertEqual(table.inserts, 1)
+
+    def test_capacity_evicts_least_recently_touched(self):
+        table = FlowTable('t', capacity=2, ttl=100)
+        table.touch('a', now=1)
+        table.touch('b', now=2)
+        table.touch('a', now=3)
+        table.touch('c', now=4)
+        self.assertEqual(sorted(table.keys()), ['a', 'c'])
+        self.assertEqual(table.evicted_lru, 1)
+
+    def test_idle_entries_expire_from_the_head(self):
+        table = FlowTable('t', capacity=10, ttl=10)
+        table.touch('a', now=0)
+        table.touch('b', now=5)
+        table.touch('a', now=8)
+        self.assertEqual(table.expire(now=16), 1)
+        self.assertEqual(table.keys(), ['a'])
+        self.assertEqual(table.expire(now=18), 1)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.evicted_ttl, 2)
+
+    def test_get_does_not_refresh(self):
+        table = FlowTable('t', capacity=10, ttl=10)
+        table.touch('a', now=0)
+        table.touch('b', now=1)
+        self.assertIsNotNone(table.get('a'))
+        table.expire(now=10)
+        self.assertNotIn('a', table)
+        self.assertIn('b', table)
+
+    def test_pop_and_clear(self):
+        table = FlowTable('t', capacity=10, ttl=10)
+        table.touch('a', now=0)['n'] = 1
+        table.touch('b', now=0)
+        self.assertEqual(table.pop('a'), {'n': 1})
+        self.assertIsNone(table.pop('a'))
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_flow_key_round_trip(self):
+        key = flow_key(0x0a000006, 0x0a000001, 8001)
+        self.assertEqual(unpack_flow_key(key), (0x0a000006, 0x0a000001, 8001))
+
+
+if __name__ == '__main__':
+    unittest.main()
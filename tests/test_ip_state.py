@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Idle, count and memory bounds of the per-source-IP state store"""
+
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+import ip_state
+from ip_state import ENTRY_OVERHEAD, IPStateStore
+
+
+class Record(object):
+    __slots__ = ('items',)
+
+    def __init__(self):
+        self.items = []
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.items) + 1000 * len(self.items)
+
+
+class IPStateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        clock = types.SimpleNamespace(monotonic=lambda: self.now)
+        patcher = mock.patch.object(ip_state, 'time', clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_creates_once(self):
+        store = IPStateStore(Record)
+        record = store.get('10.0.0.1')
+        self.assertIs(store.get('10.0.0.1'), record)
+        self.assertEqual(store.stats()['created'], 1)
+        self.assertEqual(store.stats()['hits'], 1)
+
+    def test_peek_neither_creates_nor_refreshes(self):
+        store = IPStateStore(Record, idle_ttl=10)
+        self.assertIsNone(store.peek('10.0.0.1'))
+        self.assertNotIn('10.0.0.1', store)
+        store.get('10.0.0.1')
+        self.now += 6
+        store.peek('10.0.0.1')
+        self.now += 6
+        self.assertEqual(store.items(), [])
+        self.assertEqual(store.stats()['evicted_idle'], 1)
+
+    def test_idle_records_expire(self):
+        store = IPStateStore(Record, idle_ttl=10)
+        store.get('10.0.0.1')
+        self.now += 5
+        store.get('10.0.0.2')
+        self.now += 5
+        store.get('10.0.0.3')
+        self.assertEqual([ip for ip, _ in store.items()], ['10.0.0.2', '10.0.0.3'])
+        self.assertEqual(store.stats()['evicted_idle'], 1)
+
+    def test_least_recently_used_evicted_over_max_entries(self):
+        store = IPStateStore(Record, max_entries=2)
+        store.get('10.0.0.1')
+        store.get('10.0.0.2')
+        store.get('10.0.0.1')
+        store.get('10.0.0.3')
+        self.assertEqual(sorted(ip for ip, _ in store.items()), ['10.0.0.1', '10.0.0.3'])
+        self.assertEqual(store.stats()['evicted_lru'], 1)
+
+    def test_memory_budget_counts_container_contents(self):
+        empty = ENTRY_OVERHEAD + sys.getsizeof('10.0.0.1') + sys.getsizeof(Record())
+        store = IPStateStore(Record, max_bytes=3 * empty + 1000 - empty // 2)
+        for last in range(1, 4):
+            store.get(f'10.0.0.{last}')
+        self.assertEqual(store.stats()['estimated_bytes'], 3 * empty)
+
+        # Growth is measured on the next access and evicts the oldest records
+        store.get('10.0.0.3').items.append(1)
+        store.get('10.0.0.3')
+        self.assertEqual(store.stats()['evicted_memory'], 1)
+        self.assertNotIn('10.0.0.1', store)
+        self.assertLessEqual(store.stats()['estimated_bytes'], store.max_bytes)
+
+    def test_single_record_over_budget_is_kept(self):
+        store = IPStateStore(Record, max_bytes=1)
+        store.get('10.0.0.1')
+        self.assertIn('10.0.0.1', store)
+        store.get('10.0.0.2')
+        self.assertEqual([ip for ip, _ in store.items()], ['10.0.0.2'])
+
+    def test_remove_releases_bytes(self):
+        store = IPStateStore(Record)
+        store.get('10.0.0.1')
+        store.remove('10.0.0.1')
+        store.remove('10.0.0.1')
+        stats = store.stats()
+        self.assertEqual((stats['entries'], stats['estimated_bytes'], stats['removed']), (0, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Incremental reading of the honeypot log across appends, truncation and rotation"""
+
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../presentation'))
+import log_tailer
+from log_tailer import LogTailer
+
+NOW = 1700000000.0
+
+
+def entry(source_ip, at=NOW):
+    timestamp = datetime.datetime.fromtimestamp(at, datetime.timezone.utc).isoformat()
+    return {'timestamp': timestamp, 'source_ip': source_ip, 'path': '/login'}
+
+
+class LogTailerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = NOW
+        clock = types.SimpleNamespace(time=lambda: self.now)
+        patcher = mock.patch.object(log_tailer, 'time', clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'honeypot.log')
+
+    def tailer(self, **kwargs):
+        tailer = LogTailer(self.path, **kwargs)
+        self.addCleanup(tailer.reset)
+        return tailer
+
+    def append(self, *records, path=None, raw=b''):
+        with open(path or self.path, 'ab') as f:
+            for record in records:
+                f.write(json.dumps(record).encode() + b'\n')
+            f.write(raw)
+
+    def test_missing_file(self):
+        snapshot = self.tailer().snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['latest']), (0, None))
+
+    def test_reads_only_appended_records(self):
+        tailer = self.tailer(recent=2)
+        self.append(entry('10.0.0.1'), entry('10.0.0.2'))
+        self.assertEqual(tailer.snapshot()['total_attempts'], 2)
+        read = tailer.stats()['bytes_read']
+
+        self.append(entry('10.0.0.1'))
+        snapshot = tailer.snapshot()
+        self.assertEqual(snapshot['total_attempts'], 3)
+        self.assertEqual(snapshot['unique_ips'], 2)
+        self.assertEqual([r['source_ip'] for r in snapshot['recent']], ['10.0.0.2', '10.0.0.1'])
+        self.assertEqual(tailer.stats()['bytes_read'], os.path.getsize(self.path))
+        self.assertGreater(tailer.stats()['bytes_read'], read)
+
+    def test_partial_line_waits_for_newline(self):
+        tailer = self.tailer()
+        line = json.dumps(entry('10.0.0.1')).encode()
+        self.append(raw=line[:10])
+        self.assertEqual(tailer.snapshot()['total_attempts'], 0)
+        self.append(raw=line[10:] + b'\n')
+        self.assertEqual(tailer.snapshot()['total_attempts'], 1)
+        self.assertEqual(tailer.stats()['parse_errors'], 0)
+
+    def test_bad_lines_are_counted(self):
+        tailer = self.tailer()
+        self.append(entry('10.0.0.1'), {'timestamp': 'never'}, raw=b'not json\n')
+        self.assertEqual(tailer.snapshot()['total_attempts'], 1)
+        self.assertEqual(tailer.stats()['parse_errors'], 2)
+
+    def test_window_expiry(self):
+        tailer = self.tailer(window=60)
+        self.append(entry('10.0.0.1', NOW - 50), entry('10.0.0.2', NOW - 10), entry('10.0.0.3', NOW - 120))
+        snapshot = tailer.snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['unique_ips']), (2, 2))
+        self.assertEqual(snapshot['latest']['source_ip'], '10.0.0.2')
+
+        self.now += 20
+        self.assertEqual(tailer.snapshot()['total_attempts'], 1)
+        self.now += 40
+        snapshot = tailer.snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['unique_ips'], snapshot['latest']),
+                         (0, 0, None))
+
+    def test_truncation_resets_aggregates(self):
+        tailer = self.tailer()
+        self.append(entry('10.0.0.1'), entry('10.0.0.2'))
+        tailer.snapshot()
+        open(self.path, 'wb').close()
+        self.append(entry('10.0.0.3'))
+
+        snapshot = tailer.snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['unique_ips']), (1, 1))
+        self.assertEqual([r['source_ip'] for r in snapshot['recent']], ['10.0.0.3'])
+        self.assertEqual(tailer.stats()['truncations'], 1)
+
+    def test_rotation_keeps_records_written_before_the_rename(self):
+        tailer = self.tailer()
+        self.append(entry('10.0.0.1'))
+        tailer.snapshot()
+        self.append(entry('10.0.0.2'))
+        os.rename(self.path, self.path + '.1')
+
+        # Rotated away, replacement not created yet
+        self.assertEqual(tailer.snapshot()['total_attempts'], 2)
+        self.append(entry('10.0.0.3'), path=self.path + '.1')
+        self.append(entry('10.0.0.4'))
+        snapshot = tailer.snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['unique_ips']), (4, 4))
+        self.assertEqual(tailer.stats()['rotations'], 1)
+        self.assertEqual(tailer.stats()['offset'], os.path.getsize(self.path))
+
+    def test_reset(self):
+        tailer = self.tailer()
+        self.append(entry('10.0.0.1'))
+        tailer.snapshot()
+        tailer.reset()
+        open(self.path, 'wb').close()
+        snapshot = tailer.snapshot()
+        self.assertEqual((snapshot['total_attempts'], snapshot['recent']), (0, []))
+        self.assertEqual(tailer.stats()['truncations'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
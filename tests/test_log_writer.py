@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Batching, size-based rotation and backup pruning of the async log writer"""
+
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+from log_writer import AsyncLogWriter
+
+
+class AsyncLogWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'service.log')
+
+    def writer(self, **kwargs):
+        writer = AsyncLogWriter(self.path, flush_interval=60, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def lines(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            return [json.loads(line) for line in f]
+
+    def test_flush_writes_queued_entries_in_order(self):
+        writer = self.writer(batch_size=4)
+        for n in range(10):
+            self.assertTrue(writer.write({'n': n}))
+        self.assertTrue(writer.flush())
+        self.assertEqual([e['n'] for e in self.lines(self.path)], list(range(10)))
+        self.assertEqual(writer.stats()['written'], 10)
+        self.assertEqual(writer.stats()['batches'], 3)
+
+    def test_full_queue_drops(self):
+        writer = self.writer(max_queue=3, batch_size=100)
+        results = [writer.write({'n': n}) for n in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(writer.stats()['dropped'], 2)
+        writer.flush()
+        self.assertEqual(len(self.lines(self.path)), 3)
+
+    def test_rotates_past_max_bytes_and_prunes_backups(self):
+        writer = self.writer(max_bytes=100, backups=2, compress=False)
+        for n in range(5):
+            writer.write({'n': n, 'pad': 'x' * 60})
+            writer.flush()
+
+        self.assertEqual(writer.stats()['rotations'], 4)
+        rotated = sorted(glob.glob(self.path + '.*'))
+        self.assertEqual(len(rotated), 2)
+        # The newest two backups and the live file hold the last three entries
+        self.assertEqual([self.lines(p)[0]['n'] for p in rotated + [self.path]], [2, 3, 4])
+
+    def test_rotated_files_are_compressed(self):
+        writer = self.writer(max_bytes=100, backups=1)
+        for n in range(3):
+            writer.write({'n': n, 'pad': 'x' * 60})
+            writer.flush()
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            rotated = glob.glob(self.path + '.*')
+            if len(rotated) == 1 and rotated[0].endswith('.gz'):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(rotated), 1)
+        self.assertEqual(self.lines(rotated[0])[0]['n'], 1)
+
+    def test_reopens_after_truncation_in_append_mode(self):
+        writer = self.writer()
+        writer.write({'n': 0})
+        writer.flush()
+        open(self.path, 'wb').close()
+        writer.write({'n': 1})
+        writer.flush()
+        self.assertEqual(self.lines(self.path), [{'n': 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Per-second bucket ring behind the controller's 1 s / 10 s / 60 s request rates"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../controller'))
+from rate_estimator import RING_SECONDS, SHORT_WINDOW, SourceRate
+
+
+class SourceRateTest(unittest.TestCase):
+
+    def test_rates_within_one_second(self):
+        rate = SourceRate()
+        for _ in range(30):
+            rate.record(1000.2)
+        self.assertEqual(rate.rates(1000.9), (30, 30 / SHORT_WINDOW, 30 / RING_SECONDS))
+
+    def test_short_window_rolls_over(self):
+        rate = SourceRate()
+        rate.record(1000, count=10)
+        rate.record(1005, count=5)
+        self.assertEqual(rate.rates(1009)[1], 15 / SHORT_WINDOW)
+        # Second 1000 leaves the 10 s window at 1010, second 1005 at 1015
+        self.assertEqual(rate.rates(1010)[1], 5 / SHORT_WINDOW)
+        self.assertEqual(rate.rates(1015)[1], 0)
+        self.assertEqual(rate.rates(1015)[2], 15 / RING_SECONDS)
+
+    def test_long_window_rolls_over(self):
+        rate = SourceRate()
+        rate.record(1000, count=6)
+        rate.record(1030, count=3)
+        self.assertEqual(rate.sum_60s, 9)
+        rate.rates(1060)
+        self.assertEqual(rate.sum_60s, 3)
+        rate.rates(1090)
+        self.assertEqual(rate.sum_60s, 0)
+
+    def test_gap_longer_than_ring_clears_everything(self):
+        rate = SourceRate()
+        rate.record(1000, count=7)
+        rate.record(1000 + 5 * RING_SECONDS)
+        self.assertEqual(rate.rates(1000 + 5 * RING_SECONDS), (1, 1 / SHORT_WINDOW, 1 / RING_SECONDS))
+
+    def test_sums_match_buckets_after_many_seconds(self):
+        rate = SourceRate()
+        for second in range(2000, 2200):
+            rate.record(second + 0.5, count=second % 7)
+            self.assertEqual(rate.sum_60s, sum(rate.buckets))
+            self.assertEqual(rate.sum_10s,
+                             sum(s % 7 for s in range(max(2000, second - SHORT_WINDOW + 1), second + 1)))
+
+    def test_as_dict(self):
+        rate = SourceRate()
+        rate.record(1000, count=3)
+        self.assertEqual(rate.as_dict(1000), {'rate_1s': 3, 'rate_10s': 0.3, 'rate_60s': 0.05,
+                                              'requests_60s': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
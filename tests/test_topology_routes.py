@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Next-hop tables, their invalidation on link changes, and loop-free flooding"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../controller'))
+from topology_routes import RouteTable
+
+
+def add_bidirectional(routes, a, a_port, b, b_port):
+    routes.add_link(a, a_port, b, b_port)
+    routes.add_link(b, b_port, a, a_port)
+
+
+def square():
+    """s1-s2-s3-s4-s1 ring, ports 1/2 toward the neighbours, port 3 for a host"""
+    routes = RouteTable()
+    for dpid in (1, 2, 3, 4):
+        routes.add_switch(dpid, [1, 2, 3])
+    add_bidirectional(routes, 1, 2, 2, 1)
+    add_bidirectional(routes, 2, 2, 3, 1)
+    add_bidirectional(routes, 3, 2, 4, 1)
+    add_bidirectional(routes, 4, 2, 1, 1)
+    routes.refresh()
+    return routes
+
+
+class RouteTableTest(unittest.TestCase):
+
+    def test_next_hops_follow_shortest_paths(self):
+        routes = square()
+        self.assertEqual(routes.next_hop(1, 2), 2)
+        self.assertEqual(routes.next_hop(1, 4), 1)
+        self.assertEqual(routes.next_hop(2, 3), 2)
+        self.assertIsNone(routes.next_hop(1, 1))
+
+    def test_host_routes(self):
+        routes = square()
+        self.assertTrue(routes.learn_host('10.0.0.3', 3, 3))
+        self.assertFalse(routes.learn_host('10.0.0.3', 3, 3))
+        self.assertEqual(routes.port_toward(3, '10.0.0.3'), 3)
+        self.assertEqual(routes.port_toward(2, '10.0.0.3'), 2)
+        self.assertIsNone(routes.port_toward(2, '10.0.0.9'))
+
+    def test_edge_ports_exclude_links(self):
+        routes = square()
+        self.assertEqual(routes.edge_ports(1), {3})
+        self.assertTrue(routes.is_edge_port(1, 3))
+        self.assertFalse(routes.is_edge_port(1, 2))
+
+    def test_link_removal_only_dirties_affected_destinations(self):
+        routes = RouteTable()
+        # Five-switch ring: port 1 toward dpid - 1, port 2 toward dpid + 1
+        for dpid in range(1, 6):
+            routes.add_switch(dpid, [1, 2, 3])
+        for dpid in range(1, 6):
+            add_bidirectional(routes, dpid, 2, dpid % 5 + 1, 1)
+        routes.refresh()
+
+        routes.remove_link(3, 4)
+        routes.remove_link(4, 3)
+        # Destination 1 is reached from s3 via s2 and from s4 via s5, so its
+        # tree never crossed s3 <-> s4 and is left alone
+        self.assertEqual(routes.refresh(), {2, 3, 4, 5})
+        self.assertEqual(routes.next_hop(3, 4), 1)
+        self.assertEqual(routes.next_hop(4, 3), 2)
+        self.assertEqual(routes.next_hop(3, 1), 1)
+
+    def test_link_removal_reroutes_around_the_ring(self):
+        routes = square()
+        routes.remove_link(1, 2)
+        routes.remove_link(2, 1)
+        self.assertIn(2, routes.refresh())
+        self.assertEqual(routes.next_hop(1, 2), 1)
+        self.assertEqual(routes.next_hop(2, 1), 2)
+
+    def test_shorter_link_dirties_destinations_it_improves(self):
+        routes = square()
+        routes.add_switch(1, [1, 2, 3, 4])
+        routes.add_switch(3, [1, 2, 3, 4])
+        routes.refresh()
+        add_bidirectional(routes, 1, 4, 3, 4)
+        self.assertIn(3, routes.refresh())
+        self.assertEqual(routes.next_hop(1, 3), 4)
+
+    def test_port_removal_forgets_host_and_link(self):
+        routes = square()
+        routes.learn_host('10.0.0.1', 1, 3)
+        routes.remove_port(1, 3)
+        self.assertIsNone(routes.host_location('10.0.0.1'))
+        routes.remove_port(1, 2)
+        routes.refresh()
+        self.assertEqual(routes.next_hop(1, 2), 1)
+
+    def test_switch_removal_reroutes(self):
+        routes = square()
+        routes.remove_switch(2)
+        routes.refresh()
+        self.assertEqual(routes.next_hop(1, 3), 1)
+        self.assertIsNone(routes.next_hop(2, 3))
+
+    def test_flooding_blocks_one_ring_link(self):
+        routes = square()
+        blocked = 0
+        for dpid in (1, 2, 3, 4):
+            ports = routes.flood_ports(dpid)
+            self.assertIn(3, ports)
+            blocked += 3 - len(ports)
+        # A spanning tree of the four-switch ring drops exactly one link (both ends)
+        self.assertEqual(blocked, 2)
+        self.assertIsNone(routes.flood_ports(9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Switch/host layouts for the honeypot SDN network.
+
+build_layout() describes a tree, fat-tree or leaf-spine fabric with a chosen
+number of normal servers, honeypots and client hosts as a plain dict: the
+switches with their port numbers, every link with the port on each end, and
+every host with its address, role, service port and attachment point. The
+same dict is what topology.py builds in Mininet and what it writes as the
+JSON manifest the controller loads (--topology-manifest), so both agree on
+every port number without LLDP discovery or ARP probing.
+
+No Mininet import here: benchmarks use the layouts without a network.
+"""
+
+import ipaddress
+import json
+
+SHAPES = ('tree', 'fattree', 'leafspine')
+
+# Virtual service address the controller answers for; never given to a host
+SERVICE_IP = '10.0.0.100'
+HOST_NETWORK = ipaddress.ip_network('10.0.0.0/16')
+
+# Service port of each role (normal servers cycle through the three server apps)
+SERVER_PORTS = (8001, 8002, 8003)
+TRIAGE_PORT = 8004
+DEEP_PORT = 8005
+
+
+def build_layout(shape='tree', depth=3, fanout=2, spines=2, leaves=4,
+                 servers=3, triage=1, deep=1, clients=1):
+    """
+    Layout dict for one fabric.
+
+    tree:      depth levels of switches, each with fanout children
+    fattree:   k-ary fat-tree with k = fanout (even): (k/2)^2 core switches,
+               k pods of k/2 aggregation and k/2 edge switches
+    leafspine: every one of leaves leaf switches linked to every spine
+
+    Hosts attach to the bottom switches: normal servers and clients round
+    robin from the first one, honeypots together on the last one. The
+    defaults reproduce the original depth-3 tree with h1-h6.
+    """
+    if shape == 'tree':
+        switch_links, bottom = _tree(depth, fanout)
+    elif shape == 'fattree':
+        switch_links, bottom = _fat_tree(fanout)
+    elif shape == 'leafspine':
+        switch_links, bottom = _leaf_spine(spines, leaves)
+    else:
+        raise ValueError(f"Unknown topology shape {shape!r} (expected one of {SHAPES})")
+    if min(servers, triage, deep, clients) < 0:
+        raise ValueError("Host counts must not be negative")
+
+    next_port = {}
+    switches = sorted({dpid for link in switch_links for dpid in link} | set(bottom))
+    for dpid in switches:
+        next_port[dpid] = 1
+
+    def take_port(dpid):
+        port = next_port[dpid]
+        next_port[dpid] = port + 1
+        return port
+
+    links = []
+    for src, dst in switch_links:
+        links.append({'src': src, 'src_port': take_port(src),
+                      'dst': dst, 'dst_port': take_port(dst)})
+
+    roles = ([('normal_server', SERVER_PORTS[i % len(SERVER_PORTS)]) for i in range(servers)]
+             + [('triage_honeypot', TRIAGE_PORT)] * triage
+             + [('deep_honeypot', DEEP_PORT)] * deep
+             + [('external_source', None)] * clients)
+    addresses = _host_addresses(len(roles))
+    prefix = 24 if all(ip in ipaddress.ip_network('10.0.0.0/24') for ip in addresses) else 16
+
+    hosts = []
+    placed = {'normal_server': 0, 'external_source': 0}
+    for index, ((role, service_port), ip) in enumerate(zip(roles, addresses), start=1):
+        if role in placed:
+            dpid = bottom[placed[role] % len(bottom)]
+            placed[role] += 1
+        else:
+            dpid = bottom[-1]
+        hosts.append({
+            'name': f'h{index}',
+            'ip': str(ip),
+            'prefix': prefix,
+            'mac': _host_mac(ip),
+            'role': role,
+            'service_port': service_port,
+            'switch': dpid,
+            'port': take_port(dpid),
+        })
+
+    return {
+        'shape': shape,
+        'params': {'depth': depth, 'fanout': fanout, 'spines': spines, 'leaves': leaves,
+                   'servers': servers, 'triage': triage, 'deep': deep, 'clients': clients},
+        'service_ip': SERVICE_IP,
+        'switches': [{'dpid': dpid, 'name': f's{dpid}', 'ports': list(range(1, next_port[dpid]))}
+                     for dpid in switches],
+        'links': links,
+        'hosts': hosts,
+    }
+
+
+def write_manifest(layout, path):
+    with open(path, 'w') as f:
+        json.dump(layout, f, indent=2)
+
+
+def load_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _tree(depth, fanout):
+    """Links of a complete tree numbered breadth first from s1, and its leaves"""
+    if depth < 1 or fanout < 1:
+        raise ValueError("Tree depth and fanout must be at least 1")
+    links = []
+    level = [1]
+    next_dpid = 2
+    for _ in range(depth - 1):
+        children = []
+        for parent in level:
+            for _ in range(fanout):
+                links.append((parent, next_dpid))
+                children.append(next_dpid)
+                next_dpid += 1
+        level = children
+    return links, level
+
+
+def _fat_tree(k):
+    """Links of a k-ary fat-tree (core, then aggregation, then edge switches) and its edge switches"""
+    if k < 2 or k % 2:
+        raise ValueError("Fat-tree fanout (k) must be an even number of at least 2")
+    half = k // 2
+    core = list(range(1, half * half + 1))
+    next_dpid = len(core) + 1
+    links = []
+    edges = []
+    for _ in range(k):
+        aggregation = list(range(next_dpid, next_dpid + half))
+        edge = list(range(next_dpid + half, next_dpid + k))
+        next_dpid += k
+        # Aggregation switch i of every pod reaches core switches i*k/2 .. (i+1)*k/2 - 1
+        for i, agg in enumerate(aggregation):
+            for core_dpid in core[i * half:(i + 1) * half]:
+                links.append((core_dpid, agg))
+        for agg in aggregation:
+            for edge_dpid in edge:
+                links.append((agg, edge_dpid))
+        edges.extend(edge)
+    return links, edges
+
+
+def _leaf_spine(spines, leaves):
+    """Links of a two-tier Clos fabric (spines first) and its leaf switches"""
+    if spines < 1 or leaves < 1:
+        raise ValueError("Leaf-spine needs at least one spine and one leaf")
+    spine_ids = list(range(1, spines + 1))
+    leaf_ids = list(range(spines + 1, spines + leaves + 1))
+    links = [(spine, leaf) for spine in spine_ids for leaf in leaf_ids]
+    return links, leaf_ids
+
+
+def _host_addresses(count):
+    """Consecutive host addresses from 10.0.0.1, skipping the service IP and .0/.255"""
+    service = ipaddress.ip_address(SERVICE_IP)
+    addresses = []
+    for ip in HOST_NETWORK.hosts():
+        if len(addresses) == count:
+            break
+        last_octet = int(ip) & 0xff
+        if ip == service or last_octet in (0, 255):
+            continue
+        addresses.append(ip)
+    if len(addresses) < count:
+        raise ValueError(f"{count} hosts do not fit in {HOST_NETWORK}")
+    return addresses
+
+
+def _host_mac(ip):
+    """MAC from the host part of the address (10.0.1.5 -> 00:00:00:00:01:05)"""
+    value = int(ip) & 0xffffff
+    return ':'.join(f'{b:02x}' for b in value.to_bytes(6, 'big'))
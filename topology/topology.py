@@ -1,69 +1,48 @@
 #!/usr/bin/env python3
 
-from mininet.net import Mininet
-from mininet.node import Controller, RemoteController, OVSKernelSwitch, Host, OVSController
-from mininet.cli import CLI
-from mininet.log import setLogLevel, info
-from mininet.link import TCLink, Intf
-from mininet.topo import Topo
-from mininet.util import dumpNodeConnections
+# Mininet is imported where the network is built, so --manifest-only runs without it
+import argparse
 import time
 import sys
 import os
 
-class HoneypotSDNTopo(Topo):
-    """Tree topology with depth=3 for honeypot SDN project"""
+from layouts import SHAPES, build_layout, write_manifest
+
+def build_topo(layout):
+    """Tree, fat-tree or leaf-spine Mininet topology for honeypot SDN project, built from a layout"""
+    from mininet.topo import Topo
     
-    def __init__(self):
-        # Initialize topology
-        Topo.__init__(self)
-        
-        # Create switches for tree topology (depth=3)
-        # Root switch
-        root_switch = self.addSwitch('s1')
-        
-        # Level 2 switches
-        s2 = self.addSwitch('s2')
-        s3 = self.addSwitch('s3')
-        
-        # Level 3 switches  
-        s4 = self.addSwitch('s4')
-        s5 = self.addSwitch('s5')
-        s6 = self.addSwitch('s6')
-        s7 = self.addSwitch('s7')
-        
-        # Connect switches in tree structure
-        self.addLink(root_switch, s2)
-        self.addLink(root_switch, s3)
-        self.addLink(s2, s4)
-        self.addLink(s2, s5)
-        self.addLink(s3, s6)
-        self.addLink(s3, s7)
-        
-        # Add hosts
-        # Normal servers
-        h1 = self.addHost('h1', ip='10.0.0.1/24')  # Normal server 1
-        h2 = self.addHost('h2', ip='10.0.0.2/24')  # Normal server 2
-        h3 = self.addHost('h3', ip='10.0.0.3/24')  # Normal server 3
-        
-        # Honeypots
-        triage_hp = self.addHost('h4', ip='10.0.0.4/24')  # Triage honeypot
-        deep_hp = self.addHost('h5', ip='10.0.0.5/24')    # Deep honeypot
-        
-        # External source host for testing
-        external_source = self.addHost('h6', ip='10.0.0.6/24')     # External source for testing
-        
-        # Connect hosts to leaf switches
-        self.addLink(h1, s4)
-        self.addLink(h2, s5) 
-        self.addLink(h3, s6)
-        self.addLink(triage_hp, s7)
-        self.addLink(deep_hp, s7)
-        self.addLink(external_source, s4)
+    topo = Topo()
+    
+    # Switches are named s<dpid> so the datapath IDs match the manifest
+    for switch in layout['switches']:
+        topo.addSwitch(switch['name'], dpid=f"{switch['dpid']:016x}")
+    
+    # Explicit port numbers on both ends, as recorded in the manifest
+    for link in layout['links']:
+        topo.addLink(f"s{link['src']}", f"s{link['dst']}",
+                     port1=link['src_port'], port2=link['dst_port'])
+    
+    # Normal servers, honeypots and external sources on the bottom switches
+    for host in layout['hosts']:
+        topo.addHost(host['name'], ip=f"{host['ip']}/{host['prefix']}", mac=host['mac'])
+        topo.addLink(host['name'], f"s{host['switch']}", port2=host['port'])
+    return topo
 
-def setup_network():
+def setup_network(layout=None):
     """Setup and run the honeypot SDN network"""
-    topo = HoneypotSDNTopo()
+    from mininet.net import Mininet
+    from mininet.node import RemoteController, OVSKernelSwitch, Host
+    from mininet.cli import CLI
+    from mininet.log import setLogLevel, info
+    from mininet.link import TCLink
+    from mininet.util import dumpNodeConnections
+    
+    setLogLevel('info')
+    
+    # Default: tree with depth=3, three normal servers, two honeypots and one external source
+    layout = layout or build_layout()
+    topo = build_topo(layout)
     
     # Create network with custom controller (will be Ryu)
     net = Mininet(
@@ -87,7 +66,7 @@ def setup_network():
     dumpNodeConnections(net.hosts)
     
     info("*** Setting up host routes and services...\n")
-    setup_host_services(net)
+    setup_host_services(net, layout)
     
     info("*** Starting CLI (type 'exit' to quit)\n")
     CLI(net)
@@ -95,9 +74,9 @@ def setup_network():
     info("*** Stopping network\n")
     net.stop()
 
-def setup_host_services(net):
+def setup_host_services(net, layout):
     """Setup services on each host"""
-    hosts = net.hosts
+    from mininet.log import info
     
     # Get the current working directory (should be the project root)
     project_root = os.path.dirname(os.path.abspath(__file__))
@@ -107,35 +86,24 @@ def setup_host_services(net):
     logs_dir = os.path.join(project_root, 'logs')
     os.makedirs(logs_dir, exist_ok=True)
     
+    # Service app directory for each service port
+    service_paths = {
+        8001: f'{project_root}/servers/server1',
+        8002: f'{project_root}/servers/server2',
+        8003: f'{project_root}/servers/server3',
+        8004: f'{project_root}/honeypots/triage_honeypot',
+        8005: f'{project_root}/honeypots/deep_honeypot',
+    }
+    
+    # External sources have no service port and need no services
+    service_hosts = [h for h in layout['hosts'] if h['service_port'] is not None]
+    
     # Start web services on each host
-    for host in hosts:
-        # h6 is external source - no services needed
-        if host.name == 'h6':
-            continue
-            
-        # Define service ports (unique for each host)
-        if host.name == 'h1':
-            port = 8001
-            service_type = 'normal'
-            service_path = f'{project_root}/servers/server1'
-        elif host.name == 'h2': 
-            port = 8002
-            service_type = 'normal'
-            service_path = f'{project_root}/servers/server2'
-        elif host.name == 'h3':
-            port = 8003 
-            service_type = 'normal'
-            service_path = f'{project_root}/servers/server3'
-        elif host.name == 'h4':
-            port = 8004
-            service_type = 'triage_honeypot'
-            service_path = f'{project_root}/honeypots/triage_honeypot'
-        elif host.name == 'h5':
-            port = 8005
-            service_type = 'deep_honeypot'
-            service_path = f'{project_root}/honeypots/deep_honeypot'
-        else:  # Unknown host
-            continue
+    for spec in service_hosts:
+        host = net.get(spec['name'])
+        port = spec['service_port']
+        service_type = spec['role']
+        service_path = service_paths[port]
             
         info(f"Starting {service_type} service on {host.name} at port {port}\n")
         info(f"Service path: {service_path}\n")
@@ -156,22 +124,9 @@ def setup_host_services(net):
     
     # Check if services started successfully (with timeout)
     info("*** Checking service status...\n")
-    for host in hosts:
-        if host.name == 'h6':
-            continue
-        
-        if host.name == 'h1':
-            port = 8001
-        elif host.name == 'h2':
-            port = 8002
-        elif host.name == 'h3':
-            port = 8003
-        elif host.name == 'h4':
-            port = 8004
-        elif host.name == 'h5':
-            port = 8005
-        else:
-            continue
+    for spec in service_hosts:
+        host = net.get(spec['name'])
+        port = spec['service_port']
             
         # Test if the service is listening with timeout
         try:
@@ -193,11 +148,48 @@ def setup_host_services(net):
         except Exception as e:
             info(f"⚠️ {host.name} service status check failed: {e}\n")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Honeypot SDN Mininet topology')
+    parser.add_argument('--shape', choices=SHAPES, default='tree',
+                        help='Switch fabric (default: tree)')
+    parser.add_argument('--depth', type=int, default=3, help='Tree depth (default: 3)')
+    parser.add_argument('--fanout', type=int, default=2,
+                        help='Tree fanout, or k of the k-ary fat-tree (default: 2)')
+    parser.add_argument('--spines', type=int, default=2, help='Leaf-spine spine switches (default: 2)')
+    parser.add_argument('--leaves', type=int, default=4, help='Leaf-spine leaf switches (default: 4)')
+    parser.add_argument('--servers', type=int, default=3, help='Normal servers (default: 3)')
+    parser.add_argument('--triage', type=int, default=1, help='Triage honeypots (default: 1)')
+    parser.add_argument('--deep', type=int, default=1, help='Deep honeypots (default: 1)')
+    parser.add_argument('--clients', type=int, default=1,
+                        help='Attacker/client hosts without services (default: 1)')
+    parser.add_argument('--manifest', help='Write the host/port manifest JSON for the controller here')
+    parser.add_argument('--manifest-only', action='store_true',
+                        help='Only write the manifest, do not start Mininet')
+    return parser.parse_args()
+
 if __name__ == '__main__':
+    args = parse_args()
+    try:
+        layout = build_layout(args.shape, depth=args.depth, fanout=args.fanout,
+                              spines=args.spines, leaves=args.leaves, servers=args.servers,
+                              triage=args.triage, deep=args.deep, clients=args.clients)
+    except ValueError as e:
+        print(f"Invalid topology: {e}")
+        sys.exit(1)
+    
+    if args.manifest:
+        write_manifest(layout, args.manifest)
+        print(f"Wrote {len(layout['switches'])} switches, {len(layout['links'])} links and "
+              f"{len(layout['hosts'])} hosts to {args.manifest}")
+    if args.manifest_only:
+        if not args.manifest:
+            print("--manifest-only needs --manifest PATH")
+            sys.exit(1)
+        sys.exit(0)
+    
     # Ensure script is run with sudo
     if os.geteuid() != 0:
         print("This script must be run with sudo privileges!")
         sys.exit(1)
         
-    setLogLevel('info')
-    setup_network() 
\ No newline at end of file
+    setup_network(layout) 
\ No newline at end of file